@@ -0,0 +1,54 @@
+"""composite indexes for the expense query shapes
+
+Every expense query filters by user_id, then category_id and/or a date
+range, ordered by date DESC.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY so large production tables are not locked for writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_expenses_user_id_date",
+            "expenses",
+            ["user_id", sa.text("date DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_expenses_user_id_category_id_date",
+            "expenses",
+            ["user_id", "category_id", "date"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_expenses_user_id_date_live",
+            "expenses",
+            ["user_id", sa.text("date DESC")],
+            postgresql_where=sa.text("NOT is_deleted"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in (
+            "ix_expenses_user_id_date_live",
+            "ix_expenses_user_id_category_id_date",
+            "ix_expenses_user_id_date",
+        ):
+            op.drop_index(name, table_name="expenses", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,43 @@
+"""expense_rollups table (per user / category / month aggregates)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "expense_rollups",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), primary_key=True),
+        sa.Column("period_month", sa.Date(), primary_key=True),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+        sa.Column("expense_count", sa.Integer(), nullable=False),
+        sa.Column("min_amount", sa.Float(), nullable=True),
+        sa.Column("max_amount", sa.Float(), nullable=True),
+    )
+    # Backfill from existing rows (same aggregate as rollup_service.rebuild_rollups)
+    op.execute(
+        """
+        INSERT INTO expense_rollups
+            (user_id, category_id, period_month, total_amount, expense_count, min_amount, max_amount)
+        SELECT user_id, category_id, date_trunc('month', date)::date,
+               sum(amount), count(*), min(amount), max(amount)
+        FROM expenses
+        WHERE category_id IS NOT NULL AND NOT is_deleted
+        GROUP BY user_id, category_id, date_trunc('month', date)::date
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("expense_rollups")
@@ -0,0 +1,174 @@
+"""monthly range partitioning of expenses and audit_logs
+
+Each table is rebuilt as `PARTITION BY RANGE` on its time column, with
+one partition per month that has data, the current month plus the next
+three, and a DEFAULT partition for anything else. The primary keys become
+(id, <partition key>) because Postgres requires unique constraints on a
+partitioned table to include the partition key; ids still come from the
+original sequences. Further partitions are created by
+app.services.partition_service.
+
+This rewrites both tables under an exclusive lock: run it in a
+maintenance window.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+EXPENSE_COLUMNS = (
+    "id, title, amount, date, description, category_id, user_id, "
+    "created_at, updated_at, is_deleted, deleted_at"
+)
+AUDIT_COLUMNS = "id, user_id, action, target_type, target_id, data, created_at"
+
+
+def _add_months(month: date, n: int) -> date:
+    years, index = divmod(month.month - 1 + n, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def _bound(table: str, month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00" if table == "audit_logs" else month.isoformat()
+
+
+def _expense_columns():
+    return [
+        sa.Column("id", sa.Integer(), server_default=sa.text("nextval('expenses_id_seq')"), nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def _audit_columns():
+    return [
+        sa.Column("id", sa.Integer(), server_default=sa.text("nextval('audit_logs_id_seq')"), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("action", sa.String(length=200), nullable=False),
+        sa.Column("target_type", sa.String(length=100), nullable=False),
+        sa.Column("target_id", sa.Integer(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    ]
+
+
+def _create_expense_indexes() -> None:
+    op.create_index("ix_expenses_id", "expenses", ["id"])
+    op.create_index("ix_expenses_user_id_date", "expenses", ["user_id", sa.text("date DESC")])
+    op.create_index("ix_expenses_user_id_category_id_date", "expenses", ["user_id", "category_id", "date"])
+    op.create_index(
+        "ix_expenses_user_id_date_live",
+        "expenses",
+        ["user_id", sa.text("date DESC")],
+        postgresql_where=sa.text("NOT is_deleted"),
+    )
+
+
+EXPENSE_INDEXES = (
+    "ix_expenses_id",
+    "ix_expenses_user_id_date",
+    "ix_expenses_user_id_category_id_date",
+    "ix_expenses_user_id_date_live",
+)
+
+
+def _rename_old(table: str, indexes) -> str:
+    old = f"{table}_unpartitioned"
+    op.rename_table(table, old)
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+    for name in indexes:
+        op.drop_index(name, table_name=old)
+    return old
+
+
+def _partition_months(table: str, source: str, month_expr: str):
+    current = date.today().replace(day=1)
+    months = {_add_months(current, n) for n in range(MONTHS_AHEAD + 1)}
+    rows = op.get_bind().execute(sa.text(
+        f"SELECT DISTINCT {month_expr} FROM {source} WHERE {month_expr} IS NOT NULL"
+    ))
+    months.update(row[0] for row in rows)
+    return sorted(months)
+
+
+def _create_partitions(table: str, months) -> None:
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    for month in months:
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{_bound(table, month)}') TO ('{_bound(table, _add_months(month, 1))}')"
+        )
+
+
+def upgrade() -> None:
+    # ---------- expenses: RANGE (date) ----------
+    old = _rename_old("expenses", EXPENSE_INDEXES)
+    op.create_table(
+        "expenses",
+        *_expense_columns(),
+        sa.PrimaryKeyConstraint("id", "date", name="expenses_pkey"),
+        postgresql_partition_by="RANGE (date)",
+    )
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY expenses.id")
+    _create_partitions("expenses", _partition_months("expenses", old, "date_trunc('month', date)::date"))
+    op.execute(f"INSERT INTO expenses ({EXPENSE_COLUMNS}) SELECT {EXPENSE_COLUMNS} FROM {old}")
+    op.drop_table(old)
+    _create_expense_indexes()
+
+    # ---------- audit_logs: RANGE (created_at), UTC months ----------
+    old = _rename_old("audit_logs", ("ix_audit_logs_id",))
+    op.execute(f"UPDATE {old} SET created_at = now() WHERE created_at IS NULL")
+    op.create_table(
+        "audit_logs",
+        *_audit_columns(),
+        sa.PrimaryKeyConstraint("id", "created_at", name="audit_logs_pkey"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    _create_partitions("audit_logs", _partition_months(
+        "audit_logs", old, "date_trunc('month', created_at AT TIME ZONE 'UTC')::date"
+    ))
+    op.execute(f"INSERT INTO audit_logs ({AUDIT_COLUMNS}) SELECT {AUDIT_COLUMNS} FROM {old}")
+    op.drop_table(old)
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+
+
+def _unpartition(table: str, columns, column_list: str) -> None:
+    partitioned = f"{table}_partitioned"
+    op.rename_table(table, partitioned)
+    op.execute(f"ALTER TABLE {partitioned} RENAME CONSTRAINT {table}_pkey TO {partitioned}_pkey")
+    op.create_table(table, *columns, sa.PrimaryKeyConstraint("id", name=f"{table}_pkey"))
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {partitioned}")
+    op.drop_table(partitioned)  # drops every partition with it
+
+
+def downgrade() -> None:
+    for name in EXPENSE_INDEXES:
+        op.drop_index(name, table_name="expenses")
+    _unpartition("expenses", _expense_columns(), EXPENSE_COLUMNS)
+    _create_expense_indexes()
+
+    op.drop_index("ix_audit_logs_id", table_name="audit_logs")
+    _unpartition("audit_logs", _audit_columns(), AUDIT_COLUMNS)
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
@@ -0,0 +1,60 @@
+"""partial indexes for soft delete
+
+Live-row queries (NOT is_deleted, added to every ORM query by
+app.db.soft_delete) get partial indexes, and the full-table duplicates
+are dropped so deleted rows no longer bloat the hot indexes. The purge
+job gets its own small partial index over deleted rows.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partitioned parents can't build indexes CONCURRENTLY; each partition
+    # is indexed in turn under the parent's lock.
+    op.create_index(
+        "ix_expenses_user_id_category_id_date_live",
+        "expenses",
+        ["user_id", "category_id", "date"],
+        postgresql_where=sa.text("NOT is_deleted"),
+    )
+    op.create_index(
+        "ix_expenses_deleted_at",
+        "expenses",
+        ["deleted_at"],
+        postgresql_where=sa.text("is_deleted"),
+    )
+    op.drop_index("ix_expenses_user_id_date", table_name="expenses")
+    op.drop_index("ix_expenses_user_id_category_id_date", table_name="expenses")
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_categories_user_id_live",
+            "categories",
+            ["user_id"],
+            postgresql_where=sa.text("NOT is_deleted"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_categories_user_id_live", table_name="categories",
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.create_index("ix_expenses_user_id_category_id_date", "expenses", ["user_id", "category_id", "date"])
+    op.create_index("ix_expenses_user_id_date", "expenses", ["user_id", sa.text("date DESC")])
+    op.drop_index("ix_expenses_deleted_at", table_name="expenses")
+    op.drop_index("ix_expenses_user_id_category_id_date_live", table_name="expenses")
@@ -0,0 +1,94 @@
+"""money as integer minor units plus a currency
+
+expenses.amount (double precision) becomes expenses.amount_minor
+(BIGINT hundredths of the currency unit) and a 3-letter `currency`,
+defaulting to USD for existing rows. Existing amounts are rounded to the
+nearest cent once, here; from then on sums are exact.
+
+expense_rollups is rebuilt with integer totals and `currency` in its
+primary key (amounts in different currencies are never summed).
+
+Rewrites every expense row: run it in a maintenance window.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def _create_rollups(currency: bool) -> None:
+    amount = sa.BigInteger if currency else sa.Float
+    prefix = "minor" if currency else "amount"
+    columns = [
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), primary_key=True),
+        sa.Column("period_month", sa.Date(), primary_key=True),
+    ]
+    if currency:
+        columns.append(sa.Column("currency", sa.String(length=3), primary_key=True))
+    op.create_table(
+        "expense_rollups",
+        *columns,
+        sa.Column(f"total_{prefix}", amount(), nullable=False),
+        sa.Column("expense_count", sa.Integer(), nullable=False),
+        sa.Column(f"min_{prefix}", amount(), nullable=True),
+        sa.Column(f"max_{prefix}", amount(), nullable=True),
+    )
+
+
+def upgrade() -> None:
+    # Adding columns to the partitioned parent adds them to every partition
+    op.add_column("expenses", sa.Column("amount_minor", sa.BigInteger(), nullable=True))
+    op.add_column(
+        "expenses",
+        sa.Column("currency", sa.String(length=3), nullable=False, server_default="USD"),
+    )
+    op.execute("UPDATE expenses SET amount_minor = round(amount::numeric * 100)::bigint")
+    op.alter_column("expenses", "amount_minor", nullable=False)
+    op.drop_column("expenses", "amount")
+
+    # Same aggregate as rollup_service.rebuild_rollups
+    op.drop_table("expense_rollups")
+    _create_rollups(currency=True)
+    op.execute(
+        """
+        INSERT INTO expense_rollups
+            (user_id, category_id, period_month, currency, total_minor, expense_count, min_minor, max_minor)
+        SELECT user_id, category_id, date_trunc('month', date)::date, currency,
+               sum(amount_minor), count(*), min(amount_minor), max(amount_minor)
+        FROM expenses
+        WHERE category_id IS NOT NULL AND NOT is_deleted
+        GROUP BY user_id, category_id, date_trunc('month', date)::date, currency
+        """
+    )
+
+
+def downgrade() -> None:
+    # Lossy for non-USD rows: the currency is dropped, amounts are kept as-is
+    op.add_column("expenses", sa.Column("amount", sa.Float(), nullable=True))
+    op.execute("UPDATE expenses SET amount = amount_minor / 100.0")
+    op.alter_column("expenses", "amount", nullable=False)
+    op.drop_column("expenses", "currency")
+    op.drop_column("expenses", "amount_minor")
+
+    op.drop_table("expense_rollups")
+    _create_rollups(currency=False)
+    op.execute(
+        """
+        INSERT INTO expense_rollups
+            (user_id, category_id, period_month, total_amount, expense_count, min_amount, max_amount)
+        SELECT user_id, category_id, date_trunc('month', date)::date,
+               sum(amount), count(*), min(amount), max(amount)
+        FROM expenses
+        WHERE category_id IS NOT NULL AND NOT is_deleted
+        GROUP BY user_id, category_id, date_trunc('month', date)::date
+        """
+    )
@@ -0,0 +1,28 @@
+"""fx_rates table (daily exchange rates per currency pair)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "fx_rates",
+        sa.Column("base", sa.String(length=3), primary_key=True),
+        sa.Column("quote", sa.String(length=3), primary_key=True),
+        sa.Column("date", sa.Date(), primary_key=True),
+        sa.Column("rate", sa.Numeric(20, 10), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("fx_rates")
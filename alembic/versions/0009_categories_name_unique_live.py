@@ -0,0 +1,46 @@
+"""category names unique among live rows only
+
+The full unique constraint on categories.name kept counting soft-deleted
+rows, so a deleted name could never be created again (the app-level check
+doesn't see deleted rows, the INSERT then failed). It becomes a partial
+unique index over NOT is_deleted, built before the constraint is dropped
+so uniqueness is enforced throughout.
+
+Downgrade restores the full constraint and fails if a live and a deleted
+category share a name.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_categories_name_live",
+            "categories",
+            ["name"],
+            unique=True,
+            postgresql_where=sa.text("NOT is_deleted"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+    op.drop_constraint("categories_name_key", "categories", type_="unique")
+
+
+def downgrade() -> None:
+    op.create_unique_constraint("categories_name_key", "categories", ["name"])
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "uq_categories_name_live", table_name="categories",
+            postgresql_concurrently=True, if_exists=True,
+        )
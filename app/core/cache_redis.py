@@ -0,0 +1,51 @@
+# app/core/cache_redis.py
+import asyncio
+from typing import Any, Awaitable
+
+from app.core.config import settings
+from app.core.rate_limit_backends import CircuitBreaker
+from app.core.redis_client import redis_client
+
+
+class CacheRedis:
+    """
+    Redis access for the principal and response caches, which are
+    optional. As in ResilientRateLimiter, every call is bounded by a short
+    timeout and guarded by a circuit breaker: during an outage the caches
+    are skipped instead of every request waiting on Redis.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, timeout: float):
+        self.breaker = breaker
+        self.timeout = timeout
+
+    def client(self):
+        """The Redis client, or None while it is missing or the breaker is open."""
+        redis = redis_client.client
+        if redis is None or not self.breaker.allow():
+            return None
+        return redis
+
+    async def call(self, awaitable: Awaitable[Any]) -> Any:
+        """Await a command obtained from client(); failures feed the breaker and re-raise."""
+        try:
+            result = await asyncio.wait_for(awaitable, self.timeout)
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        except BaseException:
+            # Cancelled mid-call: don't leave a half-open trial in flight forever
+            self.breaker.record_abandoned()
+            raise
+        self.breaker.record_success()
+        return result
+
+
+cache_redis = CacheRedis(
+    breaker=CircuitBreaker(
+        "redis-cache",
+        failure_threshold=settings.REDIS_CACHE_BREAKER_FAILURES,
+        reset_timeout=settings.REDIS_CACHE_BREAKER_RESET_SECONDS,
+    ),
+    timeout=settings.REDIS_CACHE_TIMEOUT_MS / 1000,
+)
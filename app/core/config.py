@@ -15,6 +15,20 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = Field(..., env="POSTGRES_USER")
     POSTGRES_PASSWORD: str = Field(..., env="POSTGRES_PASSWORD")
 
+    # Connection pool (per worker process)
+    DB_POOL_SIZE: int = Field(default=10, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(default=20, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: float = Field(default=30, env="DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE: int = Field(default=1800, env="DB_POOL_RECYCLE")
+    # Pre-ping costs a round trip per checkout; with a recycle shorter than
+    # the server/proxy idle timeout it can usually be turned off.
+    DB_POOL_PRE_PING: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    # LIFO keeps a small hot set of connections and lets the rest go idle
+    DB_POOL_USE_LIFO: bool = Field(default=False, env="DB_POOL_USE_LIFO")
+
+    # Use the asyncpg engine for the request path instead of psycopg2
+    DB_ASYNC: bool = Field(default=False, env="DB_ASYNC")
+
     @property
     def DATABASE_URL(self) -> str:
         return (
@@ -22,19 +36,112 @@ class Settings(BaseSettings):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        )
+
     # ---------- Security / JWT ----------
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
     ALGORITHM: str = Field(default="HS256", env="ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=60, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    TOKEN_CACHE_SIZE: int = Field(default=10000, env="TOKEN_CACHE_SIZE")
+    # Users allowed to call admin endpoints (JSON list in the environment)
+    ADMIN_EMAILS: list[str] = Field(default=[], env="ADMIN_EMAILS")
+
+    # ---------- Password Hashing ----------
+    BCRYPT_ROUNDS: int = Field(default=12, env="BCRYPT_ROUNDS")
+    PASSWORD_HASH_WORKERS: int = Field(default=2, env="PASSWORD_HASH_WORKERS")
+    PASSWORD_HASH_MAX_PENDING: int = Field(default=64, env="PASSWORD_HASH_MAX_PENDING")
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = Field(default=1, env="PASSWORD_HASH_RETRY_AFTER_SECONDS")
 
     # ---------- Redis ----------
     REDIS_HOST: str = Field(default="localhost", env="REDIS_HOST")
     REDIS_PORT: int = Field(default=6379, env="REDIS_PORT")
     REDIS_DB: int = Field(default=0, env="REDIS_DB")
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = Field(default=2.0, env="REDIS_CONNECT_TIMEOUT_SECONDS")
+    # Principal/response cache calls: per-call timeout and circuit breaker
+    REDIS_CACHE_TIMEOUT_MS: int = Field(default=50, env="REDIS_CACHE_TIMEOUT_MS")
+    REDIS_CACHE_BREAKER_FAILURES: int = Field(default=5, env="REDIS_CACHE_BREAKER_FAILURES")
+    REDIS_CACHE_BREAKER_RESET_SECONDS: int = Field(default=10, env="REDIS_CACHE_BREAKER_RESET_SECONDS")
+
+    # ---------- Principal Cache ----------
+    PRINCIPAL_CACHE_SIZE: int = Field(default=10000, env="PRINCIPAL_CACHE_SIZE")
+    PRINCIPAL_CACHE_TTL_SECONDS: int = Field(default=30, env="PRINCIPAL_CACHE_TTL_SECONDS")
+    PRINCIPAL_CACHE_REDIS_TTL_SECONDS: int = Field(default=300, env="PRINCIPAL_CACHE_REDIS_TTL_SECONDS")
+
+    # ---------- Response Cache ----------
+    RESPONSE_CACHE_ENABLED: bool = Field(default=True, env="RESPONSE_CACHE_ENABLED")
+    RESPONSE_CACHE_TTL_SECONDS: int = Field(default=300, env="RESPONSE_CACHE_TTL_SECONDS")
+
+    # ---------- Bulk Import ----------
+    IMPORT_BATCH_SIZE: int = Field(default=5000, env="IMPORT_BATCH_SIZE")
+    IMPORT_MAX_ERRORS: int = Field(default=1000, env="IMPORT_MAX_ERRORS")
+    IMPORT_SPOOL_MAX_BYTES: int = Field(default=8 * 1024 * 1024, env="IMPORT_SPOOL_MAX_BYTES")
+
+    # ---------- Export ----------
+    EXPORT_CHUNK_ROWS: int = Field(default=5000, env="EXPORT_CHUNK_ROWS")
+
+    # ---------- Analytics ----------
+    ANALYTICS_CHUNK_ROWS: int = Field(default=50000, env="ANALYTICS_CHUNK_ROWS")
+
+    # ---------- FX Rates ----------
+    # CSV (date,base,quote,rate) upserted into fx_rates at startup, if set
+    FX_RATES_FILE: str | None = Field(default=None, env="FX_RATES_FILE")
+    # Pivot for cross rates when a pair has no direct quote
+    FX_BASE_CURRENCY: str = Field(default="USD", env="FX_BASE_CURRENCY")
+    FX_HOME_CURRENCY: str = Field(default="USD", env="FX_HOME_CURRENCY")
+    # How long a worker trusts its in-memory rate index before reloading it
+    FX_INDEX_TTL_SECONDS: int = Field(default=300, env="FX_INDEX_TTL_SECONDS")
+
+    # ---------- Batch Writes ----------
+    BATCH_MAX_OPERATIONS: int = Field(default=500, env="BATCH_MAX_OPERATIONS")
+
+    # ---------- Audit Log ----------
+    AUDIT_QUEUE_SIZE: int = Field(default=10000, env="AUDIT_QUEUE_SIZE")
+    AUDIT_BATCH_SIZE: int = Field(default=500, env="AUDIT_BATCH_SIZE")
+    AUDIT_FLUSH_INTERVAL_MS: int = Field(default=1000, env="AUDIT_FLUSH_INTERVAL_MS")
+    # What to do when the queue is full: block, drop_oldest or spill
+    AUDIT_OVERFLOW: str = Field(default="spill", env="AUDIT_OVERFLOW")
+    AUDIT_SPILL_PATH: str = Field(default="audit_spill.ndjson", env="AUDIT_SPILL_PATH")
+    AUDIT_DRAIN_TIMEOUT_SECONDS: float = Field(default=10, env="AUDIT_DRAIN_TIMEOUT_SECONDS")
+    # Audit partitions older than this are detached (or dropped) by the retention job
+    AUDIT_RETENTION_MONTHS: int = Field(default=12, env="AUDIT_RETENTION_MONTHS")
+    AUDIT_RETENTION_MODE: str = Field(default="detach", env="AUDIT_RETENTION_MODE")
+
+    # ---------- Soft Delete Purge ----------
+    SOFT_DELETE_RETENTION_DAYS: int = Field(default=30, env="SOFT_DELETE_RETENTION_DAYS")
+    PURGE_BATCH_SIZE: int = Field(default=500, env="PURGE_BATCH_SIZE")
+    PURGE_BATCH_PAUSE_MS: int = Field(default=200, env="PURGE_BATCH_PAUSE_MS")
+    PURGE_INTERVAL_SECONDS: int = Field(default=3600, env="PURGE_INTERVAL_SECONDS")
+    IDEMPOTENCY_KEY_TTL_HOURS: int = Field(default=72, env="IDEMPOTENCY_KEY_TTL_HOURS")
+
+    # ---------- Partitioning ----------
+    PARTITION_MONTHS_AHEAD: int = Field(default=3, env="PARTITION_MONTHS_AHEAD")
+    # Production runs `python -m app.services.partition_service maintain` from cron;
+    # when enabled, one starting worker also does it (the others skip)
+    PARTITION_MAINTENANCE_ON_STARTUP: bool = Field(default=False, env="PARTITION_MAINTENANCE_ON_STARTUP")
+
+    # ---------- Request Instrumentation ----------
+    REQUEST_METRICS_ENABLED: bool = Field(default=True, env="REQUEST_METRICS_ENABLED")
+    SLOW_REQUEST_MS: int = Field(default=500, env="SLOW_REQUEST_MS")
+    # Same statement executed this many times in one request is flagged as N+1
+    N_PLUS_ONE_THRESHOLD: int = Field(default=5, env="N_PLUS_ONE_THRESHOLD")
+    # Runtime gauges (threadpool, pools, event-loop lag) refresh interval
+    METRICS_SAMPLE_INTERVAL_SECONDS: float = Field(default=1.0, env="METRICS_SAMPLE_INTERVAL_SECONDS")
 
     # ---------- Rate Limiting ----------
     RATE_LIMIT_REQUESTS: int = Field(default=100, env="RATE_LIMIT_REQUESTS")
     RATE_LIMIT_PERIOD_SECONDS: int = Field(default=60, env="RATE_LIMIT_PERIOD_SECONDS")
+    # One of: fixed_window, sliding_window, token_bucket
+    RATE_LIMIT_STRATEGY: str = Field(default="fixed_window", env="RATE_LIMIT_STRATEGY")
+    RATE_LIMIT_REDIS_TIMEOUT_MS: int = Field(default=50, env="RATE_LIMIT_REDIS_TIMEOUT_MS")
+    RATE_LIMIT_BREAKER_FAILURES: int = Field(default=5, env="RATE_LIMIT_BREAKER_FAILURES")
+    RATE_LIMIT_BREAKER_RESET_SECONDS: int = Field(default=10, env="RATE_LIMIT_BREAKER_RESET_SECONDS")
+    # Paths that are never rate limited (JSON list in the environment)
+    RATE_LIMIT_EXEMPT_PATHS: list[str] = Field(default=["/", "/metrics"], env="RATE_LIMIT_EXEMPT_PATHS")
 
     # ---------- Optional Email ----------
     EMAIL_HOST: str | None = Field(default=None, env="EMAIL_HOST")
@@ -0,0 +1,32 @@
+# app/core/money.py
+"""
+Fixed-point money. Amounts are stored as BIGINT hundredths of the currency
+unit (`amount_minor`, e.g. cents) next to an ISO 4217 `currency` code, so
+sums are exact integers. The API keeps a 2-decimal `amount`.
+"""
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Optional
+
+from sqlalchemy import Numeric, cast
+
+MINOR_PER_UNIT = 100
+_CENT = Decimal("0.01")
+
+
+def to_minor(amount) -> Optional[int]:
+    if amount is None:
+        return None
+    if not isinstance(amount, Decimal):
+        amount = Decimal(str(amount))
+    return int(amount.quantize(_CENT, rounding=ROUND_HALF_EVEN) * MINOR_PER_UNIT)
+
+
+def from_minor(minor: Optional[int]) -> Optional[Decimal]:
+    if minor is None:
+        return None
+    return (Decimal(int(minor)) / MINOR_PER_UNIT).quantize(_CENT)
+
+
+def amount_expr(minor_column):
+    """SQL expression for the decimal amount of an integer minor-unit column."""
+    return cast(cast(minor_column, Numeric(20, 2)) / MINOR_PER_UNIT, Numeric(20, 2))
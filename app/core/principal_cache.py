@@ -0,0 +1,143 @@
+# app/core/principal_cache.py
+import asyncio
+import logging
+from typing import Optional
+
+import anyio
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache_redis import cache_redis
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.ttl_cache import TTLCache
+from app.models.user import User
+from app.schemas.user import Principal
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "principal_cache_invalidations"
+
+
+class PrincipalCache:
+    """
+    Two-tier cache of authenticated principals keyed by token subject.
+    Tier 1 is a per-process LRU, tier 2 is the shared Redis instance.
+    """
+
+    def __init__(self):
+        self.local = TTLCache(
+            maxsize=settings.PRINCIPAL_CACHE_SIZE,
+            ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+        )
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _redis_key(subject: str) -> str:
+        return f"principal:{subject}"
+
+    async def get(self, subject: str) -> Optional[Principal]:
+        principal = self.local.get(subject)
+        if principal is not None:
+            self.local_hits += 1
+            return principal
+
+        # ✅ Timeout + circuit breaker: a Redis outage degrades to the DB lookup
+        redis = cache_redis.client()
+        if redis is not None:
+            try:
+                raw = await cache_redis.call(redis.get(self._redis_key(subject)))
+            except Exception as e:
+                logger.debug(f"Principal cache Redis read failed: {e!r}")
+                raw = None
+            if raw:
+                principal = Principal.model_validate_json(raw)
+                self.local.set(subject, principal)
+                self.redis_hits += 1
+                return principal
+
+        self.misses += 1
+        return None
+
+    async def set(self, subject: str, principal: Principal) -> None:
+        self.local.set(subject, principal)
+        redis = cache_redis.client()
+        if redis is not None:
+            try:
+                await cache_redis.call(redis.set(
+                    self._redis_key(subject),
+                    principal.model_dump_json(),
+                    ex=settings.PRINCIPAL_CACHE_REDIS_TTL_SECONDS,
+                ))
+            except Exception as e:
+                logger.debug(f"Principal cache Redis write failed: {e!r}")
+
+    async def invalidate(self, subject: str) -> None:
+        self.local.pop(subject)
+        # Skipped while the breaker is open: the Redis entry then expires via its TTL
+        redis = cache_redis.client()
+        if redis is not None:
+            try:
+                await cache_redis.call(redis.delete(self._redis_key(subject)))
+            except Exception as e:
+                logger.warning(f"Principal cache Redis invalidation failed: {e!r}")
+
+    def invalidate_sync(self, subject: str) -> None:
+        """
+        Invalidate from synchronous code (ORM events, threadpool handlers).
+        The local tier is dropped immediately; the Redis delete is run on
+        the event loop when one is reachable.
+        """
+        self.local.pop(subject)
+        if redis_client.client is None:
+            return
+        try:
+            # Called from a threadpool worker: block until Redis confirms
+            anyio.from_thread.run(self.invalidate, subject)
+            return
+        except RuntimeError:
+            pass
+        try:
+            asyncio.get_running_loop().create_task(self.invalidate(subject))
+        except RuntimeError:
+            # No event loop at all (CLI scripts): entries expire via TTL
+            pass
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.local_hits + self.redis_hits) / lookups if lookups else 0.0,
+            "local_size": len(self.local),
+            "local_maxsize": self.local.maxsize,
+        }
+
+
+principal_cache = PrincipalCache()
+
+
+# ✅ Invalidate on user updates / soft-deletes, once the change is committed
+@event.listens_for(User, "after_update")
+def _queue_principal_invalidation(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    pending = session.info.setdefault(PENDING_KEY, set())
+    pending.add(target.email)
+    # Also drop the old subject if the email itself changed
+    pending.update(inspect(target).attrs.email.history.deleted or ())
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_principal_invalidations(session):
+    for subject in session.info.pop(PENDING_KEY, ()):
+        principal_cache.invalidate_sync(subject)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_invalidations(session):
+    session.info.pop(PENDING_KEY, None)
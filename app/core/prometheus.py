@@ -0,0 +1,197 @@
+# app/core/prometheus.py
+"""
+Prometheus metrics for the API, exposed at GET /metrics.
+
+Multiple workers: start every worker with PROMETHEUS_MULTIPROC_DIR pointing
+at an empty, writable directory (wiped between deployments). Each process
+then writes its samples to mmap'd files and /metrics aggregates them. Under
+gunicorn, also call `mark_process_dead(worker.pid)` from the `child_exit`
+server hook.
+"""
+import asyncio
+import logging
+import os
+from typing import Optional
+
+import anyio.to_thread
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 10)
+
+# ---------- Requests ----------
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being served",
+    multiprocess_mode="livesum",
+)
+DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements executed per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+REDIS_SECONDS = Histogram(
+    "http_request_redis_seconds", "Time spent in Redis commands per request",
+    ["method", "route"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+N_PLUS_ONE = Counter(
+    "http_request_n_plus_one_total", "Requests that repeated an identical statement",
+    ["method", "route"],
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total", "Requests answered with 429",
+)
+AUDIT_EVENTS = Counter(
+    "audit_events_total", "Audit events by outcome (written, spilled, dropped)",
+    ["outcome"],
+)
+AUDIT_QUEUE_DEPTH = Gauge(
+    "audit_queue_depth", "Audit events waiting to be written", multiprocess_mode="livesum",
+)
+
+# ---------- Runtime (sampled) ----------
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds", "How late the sampler's sleep woke up",
+    multiprocess_mode="max",
+)
+THREADPOOL_BUSY = Gauge(
+    "threadpool_busy_threads", "Worker threads running sync handlers / run_in_threadpool",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_SIZE = Gauge(
+    "threadpool_max_threads", "Threadpool capacity",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_WAITING = Gauge(
+    "threadpool_waiting_tasks", "Calls queued for a free worker thread",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections in use", ["pool"], multiprocess_mode="livesum",
+)
+DB_POOL_IDLE = Gauge(
+    "db_pool_checked_in", "Idle connections held by the pool", ["pool"], multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections opened beyond pool_size", ["pool"], multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUTS = Gauge(
+    "db_pool_checkouts", "Connection checkouts since start", multiprocess_mode="livesum",
+)
+DB_POOL_TIMEOUTS = Gauge(
+    "db_pool_checkout_timeouts", "Checkouts that hit pool_timeout since start", multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Gauge(
+    "db_pool_wait_seconds", "Total time spent waiting for a connection since start", multiprocess_mode="livesum",
+)
+REDIS_POOL_IN_USE = Gauge(
+    "redis_pool_in_use", "Redis connections in use", multiprocess_mode="livesum",
+)
+REDIS_POOL_IDLE = Gauge(
+    "redis_pool_available", "Idle Redis connections", multiprocess_mode="livesum",
+)
+
+
+def render() -> bytes:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead(pid: int) -> None:
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
+
+
+class RuntimeSampler:
+    """
+    Background task that refreshes the runtime gauges every interval.
+    Sampling keeps pool/threadpool reads off the request path; the sleep
+    overshoot doubles as the event-loop lag measurement.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.set(max(0.0, loop.time() - started - self.interval))
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning(f"Runtime metrics sampling failed: {e}")
+
+    @staticmethod
+    def sample() -> None:
+        # Imported here: redis_client imports request_metrics, which
+        # imports this module.
+        from app.core.redis_client import redis_client
+        from app.db.pool_metrics import pool_stats
+        from app.services.audit_service import audit_writer
+
+        limiter = anyio.to_thread.current_default_thread_limiter().statistics()
+        THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+        THREADPOOL_SIZE.set(limiter.total_tokens)
+        THREADPOOL_WAITING.set(limiter.tasks_waiting)
+
+        snapshot = pool_stats.snapshot()
+        DB_POOL_CHECKOUTS.set(snapshot["checkouts"])
+        DB_POOL_TIMEOUTS.set(snapshot["checkout_timeouts"])
+        DB_POOL_WAIT.set(snapshot["wait_seconds_total"])
+        for name, pool in snapshot["pools"].items():
+            DB_POOL_CHECKED_OUT.labels(name).set(pool["checked_out"])
+            DB_POOL_IDLE.labels(name).set(pool["checked_in"])
+            DB_POOL_OVERFLOW.labels(name).set(pool["overflow"])
+
+        AUDIT_QUEUE_DEPTH.set(audit_writer.depth)
+
+        client = redis_client.client
+        if client is not None:
+            pool = client.connection_pool
+            REDIS_POOL_IN_USE.set(len(getattr(pool, "_in_use_connections", ())))
+            REDIS_POOL_IDLE.set(len(getattr(pool, "_available_connections", ())))
+
+
+runtime_sampler = RuntimeSampler(settings.METRICS_SAMPLE_INTERVAL_SECONDS)
@@ -0,0 +1,297 @@
+# app/core/rate_limit_backends.py
+import asyncio
+import logging
+import math
+import time
+from typing import NamedTuple
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Every script takes KEYS[1] = bucket key, ARGV[1] = limit, ARGV[2] = window (ms)
+# and returns {allowed (0/1), remaining, reset_after_ms}.
+# Time comes from the Redis server so all API workers share one clock.
+
+FIXED_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if current >= limit then
+    return {0, 0, redis.call('PTTL', KEYS[1])}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('PEXPIRE', KEYS[1], window)
+end
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl < 0 then
+    redis.call('PEXPIRE', KEYS[1], window)
+    ttl = window
+end
+return {1, limit - current, ttl}
+"""
+
+# Sliding-window counter: the previous window's count is weighted by how much
+# of it still overlaps the sliding window. State lives in one hash per key.
+SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local cur_start = now - (now % window)
+
+local h = redis.call('HMGET', KEYS[1], 'start', 'cur', 'prev')
+local start = tonumber(h[1]) or cur_start
+local cur = tonumber(h[2]) or 0
+local prev = tonumber(h[3]) or 0
+if start ~= cur_start then
+    if start == cur_start - window then prev = cur else prev = 0 end
+    cur = 0
+end
+
+local elapsed = now - cur_start
+local weighted = prev * (window - elapsed) / window + cur
+if weighted + 1 > limit then
+    local retry = window - elapsed
+    if prev > 0 and cur < limit then
+        retry = math.min(retry, math.ceil((weighted + 1 - limit) * window / prev))
+    end
+    redis.call('HSET', KEYS[1], 'start', cur_start, 'cur', cur, 'prev', prev)
+    redis.call('PEXPIRE', KEYS[1], window * 2)
+    return {0, 0, retry}
+end
+
+cur = cur + 1
+redis.call('HSET', KEYS[1], 'start', cur_start, 'cur', cur, 'prev', prev)
+redis.call('PEXPIRE', KEYS[1], window * 2)
+return {1, math.floor(limit - weighted - 1), window - elapsed}
+"""
+
+# Token bucket: capacity = limit, refilled continuously at limit / window.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local rate = capacity / window
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local h = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(h[1]) or capacity
+local ts = tonumber(h[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], window)
+return {allowed, math.floor(tokens), retry}
+"""
+
+SCRIPTS = {
+    "fixed_window": FIXED_WINDOW_LUA,
+    "sliding_window": SLIDING_WINDOW_LUA,
+    "token_bucket": TOKEN_BUCKET_LUA,
+}
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # seconds until the limit resets / a token is available
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.reset_after))
+
+
+class RedisRateLimiter:
+    """
+    Atomic limiter: one EVALSHA per request, no read-then-write race.
+    Scripts are loaded once with SCRIPT LOAD; redis-py transparently
+    reloads them if the server was flushed (NOSCRIPT).
+    """
+
+    def __init__(self, strategy: str, limit: int, window_seconds: int):
+        if strategy not in SCRIPTS:
+            raise ValueError(
+                f"Unknown RATE_LIMIT_STRATEGY '{strategy}', expected one of {sorted(SCRIPTS)}"
+            )
+        self.strategy = strategy
+        self.limit = limit
+        self.window_ms = window_seconds * 1000
+        self._script = None
+        self._client = None
+
+    def _get_script(self, redis):
+        # Re-register if the Redis client was reconnected
+        if self._script is None or self._client is not redis:
+            self._script = redis.register_script(SCRIPTS[self.strategy])
+            self._client = redis
+        return self._script
+
+    async def load(self, redis) -> None:
+        script = self._get_script(redis)
+        await redis.script_load(script.script)
+
+    async def hit(self, redis, identifier: str) -> RateLimitResult:
+        script = self._get_script(redis)
+        key = f"rate_limit:{self.strategy}:{identifier}"
+        allowed, remaining, reset_ms = await script(keys=[key], args=[self.limit, self.window_ms])
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=self.limit,
+            remaining=max(0, int(remaining)),
+            reset_after=max(0, int(reset_ms)) / 1000,
+        )
+
+
+def build_redis_limiter() -> RedisRateLimiter:
+    return RedisRateLimiter(
+        strategy=settings.RATE_LIMIT_STRATEGY,
+        limit=int(settings.RATE_LIMIT_REQUESTS),
+        window_seconds=int(settings.RATE_LIMIT_PERIOD_SECONDS),
+    )
+
+
+class LocalRateLimiter:
+    """
+    In-process fixed-window limiter used while Redis is unavailable.
+    Approximate by design: each worker process counts on its own. Every
+    update is a plain dict operation with no await in between, so it
+    needs no lock on the event loop.
+    """
+
+    def __init__(self, limit: int, window_seconds: int, max_keys: int = 100_000):
+        self.limit = limit
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._counters: dict[str, list] = {}
+
+    def hit(self, identifier: str) -> RateLimitResult:
+        now = time.monotonic()
+        window_index = int(now // self.window)
+        entry = self._counters.get(identifier)
+        if entry is None or entry[0] != window_index:
+            if len(self._counters) >= self.max_keys:
+                self._prune(window_index)
+            entry = [window_index, 0]
+            self._counters[identifier] = entry
+
+        reset_after = (window_index + 1) * self.window - now
+        if entry[1] >= self.limit:
+            return RateLimitResult(False, self.limit, 0, reset_after)
+        entry[1] += 1
+        return RateLimitResult(True, self.limit, self.limit - entry[1], reset_after)
+
+    def _prune(self, window_index: int) -> None:
+        self._counters = {
+            key: entry for key, entry in self._counters.items() if entry[0] == window_index
+        }
+        if len(self._counters) >= self.max_keys:
+            self._counters.clear()
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for `reset_timeout` seconds after
+    `failure_threshold` consecutive failures, then lets a single trial
+    call through (half-open) to decide whether to close again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            return True
+        # OPEN, or HALF_OPEN with the trial call already in flight
+        return False
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed, dependency recovered")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self, error: Exception) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit '{self.name}' opened after error: {error!r}")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_abandoned(self) -> None:
+        """The call was cancelled before finishing: no verdict on the dependency."""
+        if self.state == self.HALF_OPEN:
+            # ✅ Hand the trial to the next caller instead of staying half-open forever
+            self.state = self.OPEN
+            self.opened_at = time.monotonic() - self.reset_timeout
+
+
+class ResilientRateLimiter:
+    """
+    Backend chain: Redis while it is healthy, the local limiter otherwise.
+    Redis calls are bounded by a timeout and guarded by a circuit breaker,
+    so an outage or a slow Redis costs at most one timeout per reset period.
+    """
+
+    def __init__(self, primary: RedisRateLimiter, fallback: LocalRateLimiter,
+                 breaker: CircuitBreaker, timeout: float):
+        self.primary = primary
+        self.fallback = fallback
+        self.breaker = breaker
+        self.timeout = timeout
+        self.limit = primary.limit
+
+    async def hit(self, identifier: str) -> RateLimitResult:
+        redis = redis_client.client
+        if redis is not None and self.breaker.allow():
+            try:
+                result = await asyncio.wait_for(self.primary.hit(redis, identifier), self.timeout)
+            except Exception as e:
+                self.breaker.record_failure(e)
+            except BaseException:
+                # Cancelled (client gone, server shutting down): re-raise after releasing the trial
+                self.breaker.record_abandoned()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+        return self.fallback.hit(identifier)
+
+
+redis_rate_limiter = build_redis_limiter()
+
+rate_limiter = ResilientRateLimiter(
+    primary=redis_rate_limiter,
+    fallback=LocalRateLimiter(
+        limit=int(settings.RATE_LIMIT_REQUESTS),
+        window_seconds=int(settings.RATE_LIMIT_PERIOD_SECONDS),
+    ),
+    breaker=CircuitBreaker(
+        "redis-rate-limit",
+        failure_threshold=settings.RATE_LIMIT_BREAKER_FAILURES,
+        reset_timeout=settings.RATE_LIMIT_BREAKER_RESET_SECONDS,
+    ),
+    timeout=settings.RATE_LIMIT_REDIS_TIMEOUT_MS / 1000,
+)
@@ -1,59 +1,88 @@
 # app/core/rate_limiter.py
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from jose import jwt, JWTError
+import json
+from typing import Iterable, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
 from app.core.config import settings
-from app.core.redis_client import redis_client
+from app.core.prometheus import RATE_LIMIT_REJECTIONS
+from app.core.rate_limit_backends import RateLimitResult, rate_limiter
+from app.core.token import get_scope_claims
+
+
+class RateLimitMiddleware:
+    """
+    Plain ASGI rate limiting middleware.
+    Unlike BaseHTTPMiddleware it does not wrap the response in an extra
+    task/stream: allowed requests pass straight through (only the
+    `http.response.start` message is touched to add headers) and rejected
+    ones are answered with a 429 without ever reaching the app.
+    """
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
-        self.rate_limit = int(settings.RATE_LIMIT_REQUESTS)
+    def __init__(self, app: ASGIApp, exempt_paths: Optional[Iterable[str]] = None):
+        self.app = app
+        self.limiter = rate_limiter
+        self.rate_limit = self.limiter.limit
         self.window = int(settings.RATE_LIMIT_PERIOD_SECONDS)
+        self.exempt_paths = frozenset(
+            settings.RATE_LIMIT_EXEMPT_PATHS if exempt_paths is None else exempt_paths
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        user_identifier = self.get_user_identifier(scope)
+
+        # ✅ Redis when healthy (one atomic round trip), local limiter otherwise
+        result = await self.limiter.hit(user_identifier)
+
+        if not result.allowed:
+            RATE_LIMIT_REJECTIONS.inc()
+            await self.reject(result, send)
+            return
+
+        headers = self.limit_headers(result)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    async def reject(self, result: RateLimitResult, send: Send) -> None:
+        body = json.dumps({
+            "detail": f"Too Many Requests! Limit is {self.rate_limit} per {self.window} seconds."
+        }).encode()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        headers.extend(
+            (name.lower().encode(), value.encode())
+            for name, value in self.limit_headers(result).items()
+        )
+        await send({"type": "http.response.start", "status": 429, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def limit_headers(result: RateLimitResult) -> dict:
+        headers = {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(result.remaining),
+        }
+        if not result.allowed:
+            headers["Retry-After"] = str(result.retry_after)
+        return headers
 
-    async def dispatch(self, request: Request, call_next):
-
-        # Skip root health check
-        if request.url.path == "/":
-            return await call_next(request)
-
-        # ✅ Ensure Redis is connected
-        if not redis_client.client:
-            print("⚠ Redis not connected. Skipping rate limiting.")
-            return await call_next(request)
-
-        user_identifier = await self.get_user_identifier(request)
-        key = f"rate_limit:{user_identifier}"
-
-        redis = redis_client.client  # ✅ Short reference
-
-        # ✅ Get request count
-        current_count = await redis.get(key)
-        current_count = int(current_count) if current_count else 0
-
-        if current_count >= self.rate_limit:
-            raise HTTPException(
-                status_code=429,
-                detail=f"Too Many Requests! Limit is {self.rate_limit} per {self.window} seconds."
-            )
-
-        # ✅ Increment with proper TTL
-        async with redis.pipeline() as pipe:
-            pipe.incr(key)
-            ttl = await redis.ttl(key)
-            if current_count == 0 or ttl is None or ttl < 0:
-                pipe.expire(key, self.window)
-            await pipe.execute()
-
-        return await call_next(request)
-
-    async def get_user_identifier(self, request: Request) -> str:
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-                return payload.get("sub") or request.client.host
-            except JWTError:
-                return request.client.host
-        return request.client.host
+    @staticmethod
+    def get_user_identifier(scope: Scope) -> str:
+        # ✅ Verified once per request; get_current_user reuses these claims
+        claims = get_scope_claims(scope)
+        if claims and claims.get("sub"):
+            return claims["sub"]
+        client = scope.get("client")
+        return client[0] if client else "anonymous"
@@ -1,22 +1,45 @@
 # app/core/redis_client.py
 import logging
+import time
 from redis import asyncio as aioredis
 from app.core.config import settings
+from app.core.request_metrics import record_redis
 
 logger = logging.getLogger(__name__)
 
+class TimedRedis(aioredis.Redis):
+    """Redis client that reports every command's latency to the current request."""
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            record_redis(time.perf_counter() - start)
+
 class RedisClient:
     def __init__(self):
         self.client = None
 
-    async def connect(self):
-        self.client = await aioredis.from_url(
-            f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}",
-            encoding="utf-8",
-            decode_responses=True  # Automatically convert bytes to strings
-        )
+    async def connect(self) -> bool:
+        """
+        Create the client and check it with a PING.
+        Never raises: if Redis is down at startup the client is kept (it
+        reconnects lazily) and callers fall back until it becomes healthy.
+        """
+        try:
+            self.client = TimedRedis.from_url(
+                f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}",
+                encoding="utf-8",
+                decode_responses=True,  # Automatically convert bytes to strings
+                socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+            )
+            await self.client.ping()
+        except Exception as e:
+            logger.warning(f"⚠ Redis unavailable at startup: {e}")
+            return False
         logger.info("✅ Redis Connected Successfully")
-        print("✅ Redis Connected Successfully")
+        return True
 
     async def close(self):
         if self.client:
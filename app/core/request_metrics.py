@@ -0,0 +1,177 @@
+# app/core/request_metrics.py
+"""
+Per-request SQL and Redis accounting.
+
+SQLAlchemy cursor hooks (app.db.session) and the Redis client report into
+the RequestStats of the current request, found through a contextvar. The
+middleware turns it into a Server-Timing header, slow-request logs, N+1
+warnings and Prometheus histograms per route template (app.core.prometheus).
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.prometheus import (
+    DB_SECONDS,
+    DB_STATEMENTS,
+    IN_FLIGHT,
+    N_PLUS_ONE,
+    REDIS_SECONDS,
+    REQUEST_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    """Mutable accumulator shared by everything running for one request."""
+
+    __slots__ = ("db_time", "db_count", "redis_time", "redis_count", "statements")
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.db_count = 0
+        self.redis_time = 0.0
+        self.redis_count = 0
+        # statement text -> [executions, total seconds, slowest seconds]
+        self.statements: dict = {}
+
+    def add_statement(self, statement: str, duration: float) -> None:
+        self.db_time += duration
+        self.db_count += 1
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [1, duration, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+
+    def add_redis(self, duration: float) -> None:
+        self.redis_time += duration
+        self.redis_count += 1
+
+    def repeated(self, threshold: int):
+        return [(sql, e[0]) for sql, e in self.statements.items() if e[0] >= threshold]
+
+    def worst(self, n: int):
+        return sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:n]
+
+
+# ✅ The stats object is mutated, never re-set, so threadpool and run_sync
+# workers (which run in a copy of the context) still report into it.
+current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def record_statement(statement: str, duration: float) -> None:
+    stats = current_stats.get()
+    if stats is not None:
+        stats.add_statement(statement, duration)
+
+
+def record_redis(duration: float) -> None:
+    stats = current_stats.get()
+    if stats is not None:
+        stats.add_redis(duration)
+
+
+def _route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _short(sql: str, limit: int = 200) -> str:
+    sql = " ".join(sql.split())
+    return sql if len(sql) <= limit else sql[:limit] + "..."
+
+
+class RequestMetricsMiddleware:
+    """
+    Plain ASGI middleware: installs a RequestStats for the request, adds a
+    Server-Timing header when the response starts and records latency and
+    the totals once the response has been sent.
+    Labelled metric children are cached, so the per-request cost is a few
+    dict lookups and observe() calls.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.slow_seconds = settings.SLOW_REQUEST_MS / 1000
+        self.n_plus_one_threshold = settings.N_PLUS_ONE_THRESHOLD
+        self._children: dict = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.REQUEST_METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        status_code = [500]
+        start = time.perf_counter()
+        IN_FLIGHT.inc()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", self.server_timing(stats, start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            current_stats.reset(token)
+            self.finish(scope, stats, status_code[0], elapsed)
+
+    @staticmethod
+    def server_timing(stats: RequestStats, start: float) -> str:
+        return ", ".join((
+            f"db;dur={stats.db_time * 1000:.1f}",
+            f"db-count;desc=\"statements\";dur={stats.db_count}",
+            f"redis;dur={stats.redis_time * 1000:.1f}",
+            f"app;dur={(time.perf_counter() - start) * 1000:.1f}",
+        ))
+
+    def _metrics(self, method: str, route: str, status_code: int):
+        key = (method, route, status_code)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                REQUEST_SECONDS.labels(method, route, str(status_code)),
+                DB_SECONDS.labels(method, route),
+                DB_STATEMENTS.labels(method, route),
+                REDIS_SECONDS.labels(method, route),
+            )
+        return children
+
+    def finish(self, scope: Scope, stats: RequestStats, status_code: int, elapsed: float) -> None:
+        method, route = scope["method"], _route_template(scope)
+        latency, db_seconds, db_statements, redis_seconds = self._metrics(method, route, status_code)
+        latency.observe(elapsed)
+        db_seconds.observe(stats.db_time)
+        db_statements.observe(stats.db_count)
+        redis_seconds.observe(stats.redis_time)
+
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        if repeated:
+            N_PLUS_ONE.labels(method, route).inc()
+            for sql, count in repeated:
+                logger.warning(f"Possible N+1 on {method} {route}: {count}x {_short(sql)}")
+
+        if elapsed >= self.slow_seconds:
+            worst = "; ".join(
+                f"{e[0]}x {e[1] * 1000:.1f}ms {_short(sql, 120)}" for sql, e in stats.worst(3)
+            )
+            logger.warning(
+                f"Slow request {method} {route}: {elapsed * 1000:.0f}ms total, "
+                f"db {stats.db_time * 1000:.0f}ms in {stats.db_count} statements, "
+                f"redis {stats.redis_time * 1000:.0f}ms in {stats.redis_count} commands. "
+                f"Worst: {worst or 'none'}"
+            )
@@ -0,0 +1,171 @@
+# app/core/response_cache.py
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.cache_redis import cache_redis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Redis-backed cache for per-user read endpoints.
+
+    Keys embed a per-user generation counter; any write for that user
+    bumps the counter (one INCR), so stale entries are simply never
+    looked up again and expire on their own - no key scans.
+    Every cached response carries an ETag, so clients revalidating with
+    If-None-Match get a bodiless 304.
+    If a bump fails, the user is marked dirty in this worker and bypasses
+    the cache until a later bump succeeds or the old entries have expired.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.errors = 0
+        self._adapters = {}
+        self._dirty: dict[int, float] = {}  # user_id -> monotonic time its stale entries are gone
+
+    @staticmethod
+    def _generation_key(user_id: int) -> str:
+        return f"respcache:gen:{user_id}"
+
+    @staticmethod
+    def _entry_key(user_id: int, generation: str, namespace: str, params: dict) -> str:
+        normalized = json.dumps(
+            {k: v for k, v in sorted(params.items()) if v is not None},
+            separators=(",", ":"),
+            default=str,
+        )
+        digest = hashlib.sha1(normalized.encode()).hexdigest()
+        return f"respcache:{user_id}:{generation}:{namespace}:{digest}"
+
+    def _adapter(self, model) -> TypeAdapter:
+        adapter = self._adapters.get(model)
+        if adapter is None:
+            adapter = self._adapters[model] = TypeAdapter(model)
+        return adapter
+
+    @staticmethod
+    def _response(request: Request, body: str, etag: str, cache_status: str) -> Response:
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "X-Cache": cache_status}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def _is_dirty(self, user_id: int) -> bool:
+        expires = self._dirty.get(user_id)
+        if expires is not None and time.monotonic() >= expires:
+            del self._dirty[user_id]
+            return False
+        return expires is not None
+
+    async def _bump_generation(self, redis, user_id: int) -> bool:
+        """INCR the user's generation; on failure mark the user dirty. Returns True once bumped."""
+        if redis is not None:
+            try:
+                await cache_redis.call(redis.incr(self._generation_key(user_id)))
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Response cache invalidation failed for user {user_id}: {e}")
+            else:
+                self._dirty.pop(user_id, None)
+                return True
+        # ✅ Every entry written before now is gone after one TTL, even if no bump ever succeeds
+        now = time.monotonic()
+        self._dirty = {uid: t for uid, t in self._dirty.items() if t > now}
+        self._dirty[user_id] = now + settings.RESPONSE_CACHE_TTL_SECONDS
+        return False
+
+    async def invalidate_user(self, user_id: int) -> None:
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return
+        await self._bump_generation(cache_redis.client(), user_id)
+
+    async def cached(
+        self,
+        request: Request,
+        user_id: int,
+        namespace: str,
+        params: dict,
+        response_model: Any,
+        producer: Callable[[], Awaitable[Any]],
+    ) -> Response:
+        """
+        Serve `namespace` + `params` for this user from cache, or run
+        `producer`, serialize the result with `response_model` and store it.
+        """
+        # ✅ Timeout + circuit breaker: while Redis is down the cache is bypassed
+        redis = cache_redis.client() if settings.RESPONSE_CACHE_ENABLED else None
+        # ✅ A missed invalidation must not serve stale entries: retry the bump first
+        if redis is not None and self._is_dirty(user_id):
+            if not await self._bump_generation(redis, user_id):
+                redis = None
+        key: Optional[str] = None
+        if redis is not None:
+            async def lookup():
+                generation = await redis.get(self._generation_key(user_id)) or "0"
+                entry_key = self._entry_key(user_id, generation, namespace, params)
+                return entry_key, await redis.get(entry_key)
+
+            try:
+                key, entry = await cache_redis.call(lookup())
+            except Exception as e:
+                self.errors += 1
+                logger.debug(f"Response cache read failed: {e!r}")
+                key, entry = None, None
+            if entry:
+                self.hits += 1
+                etag, _, body = entry.partition("\n")
+                response = self._response(request, body, etag, "HIT")
+                if response.status_code == 304:
+                    self.not_modified += 1
+                return response
+            self.misses += 1
+
+        adapter = self._adapter(response_model)
+        # ✅ Validate first: producers return ORM objects and raw dicts, and the
+        # body must match what response_model would have produced uncached
+        data = adapter.validate_python(await producer(), from_attributes=True)
+        body = adapter.dump_json(data).decode()
+        etag = f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+
+        redis = cache_redis.client() if key is not None else None
+        if redis is not None:
+            try:
+                await cache_redis.call(
+                    redis.set(key, f"{etag}\n{body}", ex=settings.RESPONSE_CACHE_TTL_SECONDS)
+                )
+            except Exception as e:
+                self.errors += 1
+                logger.debug(f"Response cache write failed: {e!r}")
+
+        response = self._response(request, body, etag, "MISS" if key else "BYPASS")
+        if response.status_code == 304:
+            self.not_modified += 1
+        return response
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.RESPONSE_CACHE_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "dirty_users": len(self._dirty),
+            "redis_breaker": cache_redis.breaker.state,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache()
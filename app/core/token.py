@@ -1,20 +1,82 @@
+# app/core/token.py
+import time
 from datetime import datetime, timedelta
+from typing import Optional, Union
+
 from jose import jwt, JWTError
+from starlette.requests import Request
+from starlette.types import Scope
+
 from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+
+# ✅ Recently verified tokens -> claims, kept until the token expires
+_verified_tokens = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+_UNSET = object()
+
+
+def create_access_token(subject: Union[str, int], expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Generate a JWT access token.
+    `subject` is usually the user ID or username.
+    """
+    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    payload = {
+        "sub": str(subject),
+        "exp": expire
+    }
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
 
-def create_access_token(data: dict, expires_delta: timedelta | None = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
-
-def decode_token(token: str):
+def decode_token(token: str) -> Optional[dict]:
+    """
+    Decode and validate a JWT token.
+    Returns payload if valid, None if expired/invalid.
+    A token that verified once is served from memory until its `exp`.
+    """
+    claims = _verified_tokens.get(token)
+    if claims is not None:
+        return claims
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
         return None
+
+    exp = claims.get("exp")
+    remaining = exp - time.time() if exp is not None else None
+    if remaining is None or remaining > 0:
+        _verified_tokens.set(token, claims, ttl=remaining)
+    return claims
+
+
+def get_bearer_token(scope: Scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token
+            return None
+    return None
+
+
+def get_scope_claims(scope: Scope) -> Optional[dict]:
+    """
+    Verify the request's bearer token at most once per request.
+    The result (claims or None) is stored on `request.state.token_claims`
+    so middleware and dependencies share it.
+    """
+    state = scope.setdefault("state", {})
+    claims = state.get("token_claims", _UNSET)
+    if claims is _UNSET:
+        token = get_bearer_token(scope)
+        claims = decode_token(token) if token else None
+        state["token_claims"] = claims
+    return claims
+
+
+def get_request_claims(request: Request) -> Optional[dict]:
+    return get_scope_claims(request.scope)
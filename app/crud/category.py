@@ -1,4 +1,7 @@
+from typing import Optional
 from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.category import Category
 
 def create_category(db: Session, name: str, user_id: int):
@@ -17,5 +20,32 @@ def get_category(db: Session, category_id: int):
 def get_category_by_name(db: Session, name: str):
     return db.query(Category).filter(Category.name == name).first()
 
-def list_categories(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Category).offset(skip).limit(limit).all()
+def list_categories(db: Session, user_id: int, skip: int = 0, limit: int = 100):
+    return (
+        db.query(Category)
+        .filter(Category.user_id == user_id)
+        .order_by(Category.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+def list_categories_page(db: Session, user_id: int, limit: int = 100, cursor: Optional[str] = None):
+    """
+    Keyset page of one user's categories ordered by id: cost is
+    independent of how deep the page is. Returns (categories, next_cursor).
+    """
+    query = db.query(Category).filter(Category.user_id == user_id)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, 1)
+        try:
+            last_id = int(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor."
+            )
+        query = query.filter(Category.id > last_id)
+    rows = query.order_by(Category.id).limit(limit + 1).all()
+    next_cursor = encode_cursor([rows[limit - 1].id]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
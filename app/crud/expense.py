@@ -1,36 +1,101 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Date, cast, func, insert, literal, select, tuple_, update
 from fastapi import HTTPException, status
+from app.core.money import from_minor, to_minor
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.expense import Expense
 from app.models.category import Category
+from app.models.expense_rollup import ExpenseRollup
+from app.services import rollup_service
+
+
+# ✅ Columns returned by single-statement writes: the expense plus its category
+expenses_table = Expense.__table__
+
+
+def _with_category(dml_cte):
+    """
+    Wrap an INSERT/UPDATE ... RETURNING cte in a SELECT that joins the
+    category, so a write and the data for its response are one statement.
+    """
+    return (
+        select(
+            *(dml_cte.c[c.name] for c in expenses_table.c),
+            Category.name.label("category_name"),
+            Category.user_id.label("category_user_id"),
+        )
+        .select_from(dml_cte)
+        .outerjoin(Category, Category.id == dml_cte.c.category_id)
+    )
+
+
+def to_columns(expense_data: dict) -> dict:
+    """API fields -> expense columns: the decimal `amount` becomes `amount_minor`."""
+    data = dict(expense_data)
+    if "amount" in data:
+        data["amount_minor"] = to_minor(data.pop("amount"))
+    return data
+
+
+def _expense_result(row) -> dict:
+    data = {c.name: getattr(row, c.name) for c in expenses_table.c}
+    data["amount"] = from_minor(row.amount_minor)
+    data["category"] = None if row.category_id is None else {
+        "id": row.category_id, "name": row.category_name, "user_id": row.category_user_id,
+    }
+    return data
+
+
+def _category_owned(db: Session, category_id, user_id: int) -> bool:
+    return db.execute(
+        select(Category.id).where(Category.id == category_id, Category.user_id == user_id)
+    ).first() is not None
 
 
 # ✅ Create Expense (User-specific, validates category ownership)
 def create_expense(db: Session, expense_data: dict, user_id: int):
     """
-    Creates an expense for the logged-in user and validates category ownership.
+    Creates an expense for the logged-in user in one statement:
+    INSERT ... SELECT FROM categories WHERE owned ... RETURNING, so an
+    unowned category simply inserts nothing.
     """
-    category = db.query(Category).filter(
-        Category.id == expense_data.get("category_id"),
-        Category.user_id == user_id
-    ).first()
-
-    if not category:
+    expense_data = to_columns(expense_data)
+    fields = {k: v for k, v in expense_data.items() if k != "category_id"}
+    owned = (
+        select(
+            *(literal(v, expenses_table.c[k].type).label(k) for k, v in fields.items()),
+            Category.id.label("category_id"),
+            literal(user_id).label("user_id"),
+        )
+        .where(
+            Category.id == expense_data.get("category_id"),
+            Category.user_id == user_id,
+            ~Category.is_deleted,  # Core INSERT: the global soft-delete filter doesn't apply
+        )
+    )
+    inserted = (
+        insert(expenses_table)
+        .from_select([*fields, "category_id", "user_id"], owned)
+        .returning(*expenses_table.c)
+        .cte("inserted")
+    )
+    row = db.execute(_with_category(inserted)).first()
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Category does not exist or does not belong to the user."
         )
 
-    expense = Expense(**expense_data, user_id=user_id)
-    db.add(expense)
+    rollup_service.apply_change(db, None, rollup_service.entry_for(row))
     db.commit()
-    db.refresh(expense)
-    return expense
+    return _expense_result(row)
 
 
 # ✅ Get Expense by ID (User-restricted)
 def get_expense(db: Session, expense_id: int, user_id: int):
-    expense = db.query(Expense).filter(
+    expense = db.query(Expense).options(joinedload(Expense.category)).filter(
         Expense.id == expense_id,
         Expense.user_id == user_id
     ).first()
@@ -42,6 +107,28 @@ def get_expense(db: Session, expense_id: int, user_id: int):
     return expense
 
 
+# ✅ Shared filters for list/page/export queries
+def expense_filters(user_id: int, category_id=None, start_date=None, end_date=None):
+    # Explicit NOT is_deleted: export runs these on a bare connection,
+    # outside the ORM session's global filter
+    clauses = [Expense.user_id == user_id, ~Expense.is_deleted]
+    if category_id:
+        clauses.append(Expense.category_id == category_id)
+    if start_date:
+        clauses.append(Expense.date >= start_date)
+    if end_date:
+        clauses.append(Expense.date <= end_date)
+    return clauses
+
+
+def _filtered_expenses(db: Session, user_id: int, category_id=None, start_date=None, end_date=None):
+    return (
+        db.query(Expense)
+        .options(joinedload(Expense.category))  # ✅ no N+1 when serializing categories
+        .filter(*expense_filters(user_id, category_id, start_date, end_date))
+    )
+
+
 # ✅ List Expenses (Supports filters: category/date range)
 def list_expenses(
     db: Session,
@@ -52,70 +139,170 @@ def list_expenses(
     start_date=None,
     end_date=None
 ):
-    query = db.query(Expense).filter(Expense.user_id == user_id)
+    query = _filtered_expenses(db, user_id, category_id, start_date, end_date)
+    return query.order_by(Expense.date.desc(), Expense.id.desc()).offset(skip).limit(limit).all()
 
-    if category_id:
-        query = query.filter(Expense.category_id == category_id)
-    if start_date:
-        query = query.filter(Expense.date >= start_date)
-    if end_date:
-        query = query.filter(Expense.date <= end_date)
 
-    return query.order_by(Expense.date.desc()).offset(skip).limit(limit).all()
+# ✅ Keyset page of expenses, newest first, keyed on (date, id)
+def list_expenses_page(
+    db: Session,
+    user_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    category_id: int = None,
+    start_date=None,
+    end_date=None
+):
+    """
+    Cursor-based alternative to list_expenses: instead of scanning and
+    discarding `skip` rows, each page seeks straight past the last
+    (date, id) seen. Returns (expenses, next_cursor).
+    """
+    query = _filtered_expenses(db, user_id, category_id, start_date, end_date)
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, 2)
+        try:
+            last_key = (date.fromisoformat(last_date), int(last_id))
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor."
+            )
+        query = query.filter(
+            tuple_(Expense.date, Expense.id) < tuple_(*last_key),
+            Expense.date <= last_key[0],  # ✅ lets the planner prune newer partitions
+        )
+
+    rows = query.order_by(Expense.date.desc(), Expense.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last.date.isoformat(), last.id])
+    return rows[:limit], next_cursor
 
 
 # ✅ Update Expense (User-restricted)
 def update_expense(db: Session, expense_id: int, expense_data: dict, user_id: int):
-    expense = db.query(Expense).filter(
-        Expense.id == expense_id,
-        Expense.user_id == user_id
+    """
+    One UPDATE ... FROM (locked old row) ... RETURNING: ownership of the
+    expense (and of a new category) is part of the WHERE clause, and the
+    old values needed for the rollup delta come back with the new row.
+    """
+    old = (
+        select(
+            expenses_table.c.id, expenses_table.c.category_id, expenses_table.c.date,
+            expenses_table.c.currency, expenses_table.c.amount_minor,
+        )
+        .where(
+            expenses_table.c.id == expense_id,
+            expenses_table.c.user_id == user_id,
+            ~expenses_table.c.is_deleted,
+        )
+        .with_for_update()  # ✅ row lock keeps the rollup delta consistent
+        .cte("old")
+    )
+    values = {k: v for k, v in to_columns(expense_data).items() if k in expenses_table.c}
+    stmt = update(expenses_table).where(expenses_table.c.id == old.c.id)
+    new_category_id = values.get("category_id")
+    if new_category_id is not None:
+        stmt = stmt.where(
+            select(Category.id)
+            .where(Category.id == new_category_id, Category.user_id == user_id, ~Category.is_deleted)
+            .exists()
+        )
+    if not values:
+        values = {"id": expenses_table.c.id}  # ✅ no-op update still locks and returns the row
+    updated = (
+        stmt.values(values)
+        .returning(
+            *expenses_table.c,
+            old.c.category_id.label("old_category_id"),
+            old.c.date.label("old_date"),
+            old.c.currency.label("old_currency"),
+            old.c.amount_minor.label("old_amount_minor"),
+        )
+        .cte("updated")
+    )
+    row = db.execute(
+        _with_category(updated).add_columns(
+            updated.c.old_category_id, updated.c.old_date,
+            updated.c.old_currency, updated.c.old_amount_minor,
+        )
     ).first()
 
-    if not expense:
+    if row is None:
+        # Error path only: tell a foreign category apart from a missing expense
+        if new_category_id is not None and not _category_owned(db, new_category_id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Category does not exist or does not belong to the user."
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Expense not found or does not belong to this user."
         )
 
-    for key, value in expense_data.items():
-        if hasattr(expense, key):
-            setattr(expense, key, value)
-
+    # ✅ Handles moves between categories and months as remove + add
+    rollup_service.apply_change(
+        db,
+        rollup_service.RollupEntry(
+            user_id, row.old_category_id, row.old_date, row.old_currency, row.old_amount_minor
+        ),
+        rollup_service.entry_for(row),
+    )
     db.commit()
-    db.refresh(expense)
-    return expense
+    return _expense_result(row)
 
 
-# ✅ Delete Expense (Soft delete support ready)
+# ✅ Delete Expense (soft delete; purge_service removes the row after the retention period)
 def delete_expense(db: Session, expense_id: int, user_id: int):
-    expense = db.query(Expense).filter(
-        Expense.id == expense_id,
-        Expense.user_id == user_id
+    row = db.execute(
+        update(expenses_table)
+        .where(
+            expenses_table.c.id == expense_id,
+            expenses_table.c.user_id == user_id,
+            ~expenses_table.c.is_deleted,
+        )
+        .values(is_deleted=True, deleted_at=func.now())
+        .returning(expenses_table.c.user_id, expenses_table.c.category_id,
+                   expenses_table.c.date, expenses_table.c.currency, expenses_table.c.amount_minor)
     ).first()
 
-    if not expense:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Expense not found or already deleted."
         )
 
-    db.delete(expense)
+    # ✅ Deleted rows no longer count towards the rollups
+    rollup_service.apply_change(db, rollup_service.entry_for(row), None)
     db.commit()
     return {"message": "Expense deleted successfully."}
 
 
+def month_range(year: int, month: int):
+    """
+    Half-open [start, end) date range covering one calendar month.
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
 # ✅ Monthly Summary (User-specific by month/year)
 def monthly_summary(db: Session, month: int, year: int, user_id: int):
     """
-    Returns total spending per category for the given month and year.
+    Returns total spending per category and currency for the given month
+    and year. Served from expense_rollups: O(categories), whatever the
+    expense count.
     """
+    start, _ = month_range(year, month)
     summary = (
-        db.query(Category.name, func.sum(Expense.amount).label("total_spent"))
-        .join(Expense, Expense.category_id == Category.id)
-        .filter(Expense.user_id == user_id)
-        .filter(func.extract('month', Expense.date) == month)
-        .filter(func.extract('year', Expense.date) == year)
-        .group_by(Category.name)
+        db.query(Category.name, ExpenseRollup.currency, ExpenseRollup.total_minor)
+        .join(ExpenseRollup, ExpenseRollup.category_id == Category.id)
+        .filter(ExpenseRollup.user_id == user_id)
+        .filter(ExpenseRollup.period_month == start)
+        .order_by(Category.name, ExpenseRollup.currency)
         .all()
     )
 
@@ -125,4 +312,108 @@ def monthly_summary(db: Session, month: int, year: int, user_id: int):
             detail="No expenses found for this period."
         )
 
-    return [{"category": name, "total_spent": total} for name, total in summary]
+    return [
+        {"category": name, "currency": currency, "total_minor": total}
+        for name, currency, total in summary
+    ]
+
+
+SUMMARY_PERIODS = ("day", "week", "month", "year")
+
+
+# ✅ Period Summary (per category, bucketed by day/week/month/year)
+def period_summary(
+    db: Session,
+    user_id: int,
+    period: str,
+    start_date: date,
+    end_date: date,
+    category_id: int = None
+):
+    """
+    Totals per (period, category, currency) for the inclusive date span, in
+    one query. Currencies are never mixed in a total.
+    Weeks start on Monday (ISO). Buckets without expenses are omitted.
+    """
+    if period not in SUMMARY_PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"period must be one of {', '.join(SUMMARY_PERIODS)}."
+        )
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be before start_date."
+        )
+
+    if period in ("month", "year") and _covers_whole_months(start_date, end_date):
+        return _period_summary_from_rollups(db, user_id, period, start_date, end_date, category_id)
+
+    bucket = cast(func.date_trunc(period, Expense.date), Date).label("period_start")
+    query = (
+        db.query(
+            bucket,
+            Category.id,
+            Category.name,
+            Expense.currency,
+            func.sum(Expense.amount_minor).label("total_minor"),
+            func.count(Expense.id).label("count"),
+        )
+        .join(Category, Expense.category_id == Category.id)
+        .filter(Expense.user_id == user_id)
+        .filter(Expense.date >= start_date, Expense.date < end_date + timedelta(days=1))
+    )
+    if category_id:
+        query = query.filter(Expense.category_id == category_id)
+
+    rows = (
+        query.group_by(bucket, Category.id, Category.name, Expense.currency)
+        .order_by(bucket, Category.name, Expense.currency)
+        .all()
+    )
+    return _summary_rows(rows)
+
+
+def _summary_rows(rows):
+    return [
+        {
+            "period_start": period_start,
+            "category_id": cat_id,
+            "category": name,
+            "currency": currency,
+            "total_amount": from_minor(total),
+            "count": count,
+        }
+        for period_start, cat_id, name, currency, total, count in rows
+    ]
+
+
+def _covers_whole_months(start_date: date, end_date: date) -> bool:
+    return start_date.day == 1 and (end_date + timedelta(days=1)).day == 1
+
+
+def _period_summary_from_rollups(db: Session, user_id: int, period: str, start_date: date,
+                                 end_date: date, category_id: int = None):
+    bucket = cast(func.date_trunc(period, ExpenseRollup.period_month), Date).label("period_start")
+    query = (
+        db.query(
+            bucket,
+            Category.id,
+            Category.name,
+            ExpenseRollup.currency,
+            func.sum(ExpenseRollup.total_minor).label("total_minor"),
+            func.sum(ExpenseRollup.expense_count).label("count"),
+        )
+        .join(Category, ExpenseRollup.category_id == Category.id)
+        .filter(ExpenseRollup.user_id == user_id)
+        .filter(ExpenseRollup.period_month >= start_date, ExpenseRollup.period_month <= end_date)
+    )
+    if category_id:
+        query = query.filter(ExpenseRollup.category_id == category_id)
+
+    rows = (
+        query.group_by(bucket, Category.id, Category.name, ExpenseRollup.currency)
+        .order_by(bucket, Category.name, ExpenseRollup.currency)
+        .all()
+    )
+    return _summary_rows(rows)
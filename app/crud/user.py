@@ -1,6 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only, raiseload
 from app.models.user import User
-from app.utils import get_password_hash, verify_password
+from app.utils import verify_password
 
 def get_user_by_email(db: Session, email: str):
     """
@@ -8,17 +8,41 @@ def get_user_by_email(db: Session, email: str):
     """
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, email: str, password: str, full_name: str):
+def get_principal_by_email(db: Session, email: str):
     """
-    Create a new user and hash the password.
+    Fetch only the identity columns needed to authenticate a request.
+    Relationships are set to raise so the principal can never trigger
+    a lazy load of categories/expenses behind the caller's back.
+    """
+    return (
+        db.query(User)
+        .options(
+            load_only(User.id, User.email, User.full_name, User.is_deleted),
+            raiseload("*"),
+        )
+        .filter(User.email == email, User.is_deleted.is_(False))
+        .first()
+    )
+
+def create_user(db: Session, email: str, hashed_password: str, full_name: str):
+    """
+    Create a new user. The password is hashed by the caller, outside
+    the database session (bcrypt is far too slow to run on the event loop).
     """
-    hashed_password = get_password_hash(password)
     db_user = User(email=email, hashed_password=hashed_password, full_name=full_name)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
     return db_user
 
+def update_password_hash(db: Session, user: User, hashed_password: str):
+    """
+    Replace a user's stored hash (e.g. after a work-factor upgrade).
+    """
+    user.hashed_password = hashed_password
+    db.commit()
+    return user
+
 def authenticate_user(db: Session, email: str, password: str):
     """
     Check if user exists and verify password.
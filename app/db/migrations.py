@@ -0,0 +1,18 @@
+# app/db/migrations.py
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def upgrade_to_head() -> None:
+    """
+    Apply all pending alembic migrations (same as `alembic upgrade head`).
+    """
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    # Keep the application's logging configuration untouched
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
@@ -1,13 +1,86 @@
-from sqlalchemy import create_engine
+import time
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.request_metrics import record_statement
+from app.db.pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    pool_stats,
+)
+
+# ✅ Pool sizing comes from Settings so it can be tuned per deployment
+# (remember it is per worker process: total = workers * (size + overflow)).
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_use_lifo=settings.DB_POOL_USE_LIFO,
+)
+
+# ✅ Per-request SQL timing (see app.core.request_metrics)
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_statement(statement, time.perf_counter() - conn.info["query_start"].pop())
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(sync_engine) -> None:
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
 
 # ✅ PostgreSQL Engine (no need for sqlite check)
+# The sync engine always exists: it backs the sync request path and is
+# used by migrations and maintenance scripts in either mode.
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,  # Ensures the connection is valid
-    pool_size=10,        # Connection pool size for performance
-    max_overflow=20      # Extra connections allowed beyond pool_size
+    poolclass=InstrumentedQueuePool,
+    **POOL_OPTIONS
 )
+pool_stats.register("sync", engine.pool)
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# ✅ Registers the global `NOT is_deleted` filter on every ORM session
+from app.db import soft_delete  # noqa: E402,F401
+
+# ✅ Optional asyncpg engine (DB_ASYNC=true): requests never touch the threadpool
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        **POOL_OPTIONS
+    )
+    pool_stats.register("async", async_engine.pool)
+    instrument_engine(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """
+    Run a sync crud function against either kind of session.
+    AsyncSession: executed via run_sync, so all I/O is awaited on asyncpg.
+    Session: executed in the threadpool, as sync FastAPI handlers were.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -0,0 +1,34 @@
+# app/db/soft_delete.py
+"""
+Global soft-delete filter.
+
+Every ORM SELECT (including lazy and eager relationship loads) gets
+`NOT <table>.is_deleted` for each SoftDeleteMixin model it touches. The
+predicate is written exactly like the partial indexes' WHERE clause so the
+planner can use them. Opt out per statement or session with
+`.execution_options(include_deleted=True)`.
+
+Core statements built on `Model.__table__` bypass the ORM and must filter
+`is_deleted` themselves.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+
+from app.models.mixins import SoftDeleteMixin
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_soft_deleted(execute_state: ORMExecuteState) -> None:
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                SoftDeleteMixin,
+                lambda cls: ~cls.is_deleted,
+                include_aliases=True,
+            )
+        )
@@ -1,41 +1,79 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from jose import JWTError
-from app.db.session import SessionLocal
-from app.crud.user import get_user_by_email  # ✅ FIXED IMPORT
-from app.utils import decode_token
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.crud.user import get_principal_by_email
+from app.core.principal_cache import principal_cache
+from app.schemas.user import Principal
+from app.core.token import get_request_claims
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-def get_db():
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# ✅ Routes depend on get_db and run crud through app.db.session.run_db,
+# so the same handlers serve both engines.
+get_db = get_async_db if settings.DB_ASYNC else get_sync_db
+
+def _load_principal_sync(email: str):
+    db = SessionLocal()
     try:
-        payload = decode_token(token)
-        # ✅ Now we use email instead of username
-        email: str = payload.get("sub")  
-        if email is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication token",
-            )
-    except JWTError:
+        user = get_principal_by_email(db, email=email)
+        return Principal.model_validate(user) if user else None
+    finally:
+        db.close()
+
+async def _load_principal(email: str):
+    if not settings.DB_ASYNC:
+        return await run_in_threadpool(_load_principal_sync, email)
+    async with AsyncSessionLocal() as db:
+        user = await db.run_sync(get_principal_by_email, email)
+        return Principal.model_validate(user) if user else None
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> Principal:
+    # ✅ Claims were verified once for this request (possibly by middleware)
+    payload = get_request_claims(request)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate token",
         )
+    # ✅ Now we use email instead of username
+    email: str = payload.get("sub")
+    if email is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication token",
+        )
 
-    # ✅ Use correct function
-    user = get_user_by_email(db, email=email)
+    # ✅ Cached principal first; the database is only hit on a miss
+    user = await principal_cache.get(email)
+    if user is None:
+        user = await _load_principal(email)
+        if user:
+            await principal_cache.set(email, user)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
     return user
+
+# ✅ Admin-only endpoints: the principal's email must be listed in ADMIN_EMAILS
+async def get_admin_user(user: Principal = Depends(get_current_user)) -> Principal:
+    if user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return user
@@ -1,33 +1,68 @@
 # app/main.py
 
+import asyncio
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.core.redis_client import redis_client
 from app.core.rate_limiter import RateLimitMiddleware
-from app.db.base import Base
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.core.rate_limit_backends import redis_rate_limiter
+from app.core.password_hasher import password_hasher
+from app.core.prometheus import runtime_sampler
+from app.db.migrations import upgrade_to_head
+from app.services.audit_service import audit_writer
+from app.services.fx_service import load_file as load_fx_rates
+from app.services.partition_service import maintain_partitions
+from app.services.purge_service import purge_loop
 from app.db.session import engine
-from app.routes import auth, categories, expenses
+from app.routes import auth, categories, expenses, fx, metrics
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🔌 Initializing Redis...")
-    await redis_client.connect()
-
-    if redis_client.client:
-        print("✅ Redis connected, rate limiting is enabled!")
+    if await redis_client.connect():
+        # ✅ SCRIPT LOAD once; every request then costs a single EVALSHA
+        await redis_rate_limiter.load(redis_client.client)
+        print(f"✅ Redis connected, rate limiting is enabled ({settings.RATE_LIMIT_STRATEGY})!")
     else:
-        print("⚠ Redis NOT connected. Rate Limiting will be disabled.")
+        print("⚠ Redis NOT connected. Falling back to in-process rate limiting.")
 
     if settings.DEBUG:
-        print("🛠 Creating database tables (development only)...")
-        Base.metadata.create_all(bind=engine)
+        # Production deployments run `alembic upgrade head` before starting workers
+        print("🛠 Applying database migrations (development only)...")
+        await run_in_threadpool(upgrade_to_head)
+
+    if settings.PARTITION_MAINTENANCE_ON_STARTUP:
+        try:
+            # ✅ One worker does it: the others find the advisory lock taken and skip
+            created = await run_in_threadpool(maintain_partitions, engine, wait=False)
+            print(f"🗂 Partition maintenance: {len(created)} partition(s) created")
+        except Exception as e:
+            print(f"⚠ Partition maintenance failed: {e}")
+
+    if settings.FX_RATES_FILE:
+        try:
+            loaded = await run_in_threadpool(load_fx_rates, engine, settings.FX_RATES_FILE)
+            print(f"💱 Loaded {loaded} FX rate(s) from {settings.FX_RATES_FILE}")
+        except Exception as e:
+            print(f"⚠ FX rate load failed: {e}")
 
+    await audit_writer.start()
+    runtime_sampler.start()
+    purge_task = asyncio.create_task(purge_loop(engine))
     print("✅ Startup complete!")
     yield  # <-- this is important, control passes to FastAPI here
 
+    purge_task.cancel()
+    await runtime_sampler.stop()
+    print("📝 Draining audit log...")
+    await audit_writer.stop()
+
     print("❌ Closing Redis...")
     await redis_client.close()
+    password_hasher.shutdown()
 
 # ✅ Create FastAPI app with lifespan
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
@@ -35,10 +70,15 @@ app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 # ✅ Add rate limiting middleware
 app.add_middleware(RateLimitMiddleware)
 
+# ✅ Outermost: SQL/Redis accounting covers the rate limiter as well
+app.add_middleware(RequestMetricsMiddleware)
+
 # ✅ Include all routers
 app.include_router(auth.router)
 app.include_router(categories.router)
 app.include_router(expenses.router)
+app.include_router(fx.router)
+app.include_router(metrics.router)
 
 @app.get("/", summary="Health Check")
 async def root():
@@ -1,14 +1,17 @@
 from sqlalchemy import Column, Integer, String, DateTime, JSON
 from sqlalchemy.sql import func
-from app.models.base import Base  # ✅ Use correct Base import from models
+from app.db.base import Base  # ✅ Same Base (and metadata) as the other models
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    # ✅ Monthly RANGE partitions (UTC); old months are detached/dropped by
+    # app.services.partition_service instead of DELETEd
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, nullable=True)            # Who performed the action
     action = Column(String(200), nullable=False)        # e.g. "expense.create"
     target_type = Column(String(100), nullable=False)   # e.g. "expense", "category"
     target_id = Column(Integer, nullable=True)          # ID of the entity affected
     data = Column(JSON, nullable=True)                  # Extra metadata (old/new values)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
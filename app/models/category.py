@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from app.models.mixins import TimestampMixin, SoftDeleteMixin
@@ -7,7 +7,7 @@ class Category(Base, TimestampMixin, SoftDeleteMixin):
     __tablename__ = "categories"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(150), unique=True, nullable=False)
+    name = Column(String(150), nullable=False)  # unique among live rows, see below
 
     # ✅ If you want categories to be user-specific (recommended for real apps):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -20,3 +20,10 @@ class Category(Base, TimestampMixin, SoftDeleteMixin):
 
     def __repr__(self):
         return f"<Category id={self.id} name={self.name}>"
+
+
+# ✅ Live categories per user (alembic revision 0006)
+Index("ix_categories_user_id_live", Category.user_id, postgresql_where=~Category.is_deleted)
+
+# ✅ A soft-deleted name can be reused (alembic revision 0009)
+Index("uq_categories_name_live", Category.name, unique=True, postgresql_where=~Category.is_deleted)
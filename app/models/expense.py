@@ -1,15 +1,21 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Text
+from sqlalchemy import BigInteger, Column, Integer, String, Date, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
+from app.core.money import from_minor
 from app.db.base import Base
 from app.models.mixins import TimestampMixin, SoftDeleteMixin
 
 class Expense(Base, TimestampMixin, SoftDeleteMixin):
     __tablename__ = "expenses"
+    # ✅ Monthly RANGE partitions (alembic 0005, app/services/partition_service.py);
+    # the partition key has to be part of the primary key.
+    __table_args__ = {"postgresql_partition_by": "RANGE (date)"}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     title = Column(String(255), nullable=False)
-    amount = Column(Float, nullable=False)
-    date = Column(Date, nullable=False)
+    # ✅ Integer hundredths of `currency` (alembic 0007): exact sums, no float drift
+    amount_minor = Column(BigInteger, nullable=False)
+    currency = Column(String(3), nullable=False, default="USD", server_default="USD")
+    date = Column(Date, primary_key=True, nullable=False)
     description = Column(Text, nullable=True)
 
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
@@ -19,5 +25,30 @@ class Expense(Base, TimestampMixin, SoftDeleteMixin):
     category = relationship("Category", back_populates="expenses")
     user = relationship("User", back_populates="expenses")
 
+    @property
+    def amount(self):
+        """Decimal amount for the API (ExpenseRead)."""
+        return from_minor(self.amount_minor)
+
     def __repr__(self):
-        return f"<Expense id={self.id} title={self.title} amount={self.amount}>"
+        return f"<Expense id={self.id} title={self.title} amount={self.amount} {self.currency}>"
+
+
+# ✅ Indexes matching the real query shapes (see app/crud/expense.py).
+# Live-row indexes are partial (WHERE NOT is_deleted, the predicate the
+# global soft-delete filter adds); created by alembic revisions 0002/0006.
+Index(
+    "ix_expenses_user_id_date_live",
+    Expense.user_id,
+    Expense.date.desc(),
+    postgresql_where=~Expense.is_deleted,
+)
+Index(
+    "ix_expenses_user_id_category_id_date_live",
+    Expense.user_id,
+    Expense.category_id,
+    Expense.date,
+    postgresql_where=~Expense.is_deleted,
+)
+# Purge job: only deleted rows, by deletion time
+Index("ix_expenses_deleted_at", Expense.deleted_at, postgresql_where=Expense.is_deleted)
@@ -0,0 +1,28 @@
+from sqlalchemy import BigInteger, Column, Integer, Date, ForeignKey, String
+from app.db.base import Base
+
+
+class ExpenseRollup(Base):
+    """
+    Per user / category / month / currency aggregate of live expenses, in
+    integer minor units (app/core/money.py), maintained in the same
+    transaction as every expense write (app/services/rollup_service.py).
+    Expenses without a category are not rolled up (summaries join categories).
+    """
+    __tablename__ = "expense_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    period_month = Column(Date, primary_key=True)  # first day of the month
+    currency = Column(String(3), primary_key=True)
+
+    total_minor = Column(BigInteger, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+    min_minor = Column(BigInteger, nullable=True)
+    max_minor = Column(BigInteger, nullable=True)
+
+    def __repr__(self):
+        return (
+            f"<ExpenseRollup user={self.user_id} category={self.category_id} "
+            f"month={self.period_month} total={self.total_minor} {self.currency}>"
+        )
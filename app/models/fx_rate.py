@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Date, Numeric, String
+from app.db.base import Base
+
+
+class FxRate(Base):
+    """
+    Daily exchange rate: 1 unit of `base` = `rate` units of `quote`.
+    Served to requests from the in-memory index in app/services/fx_service.py.
+    """
+    __tablename__ = "fx_rates"
+
+    base = Column(String(3), primary_key=True)
+    quote = Column(String(3), primary_key=True)
+    date = Column(Date, primary_key=True)
+    rate = Column(Numeric(20, 10), nullable=False)
+
+    def __repr__(self):
+        return f"<FxRate {self.base}/{self.quote} {self.date} {self.rate}>"
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Stored outcome of a client-keyed operation (see POST /expenses/batch).
+    Replaying the same (user_id, key) returns `result` without re-executing.
+    """
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    result = Column(JSON, nullable=True)  # NULL while the owning transaction is in flight
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
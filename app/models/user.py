@@ -15,11 +15,14 @@ class User(Base, TimestampMixin, SoftDeleteMixin):
     categories = relationship("Category", back_populates="user", cascade="all, delete")
 
     # ✅ Relationships
+    # Loaded lazily: callers that need a user's expenses query them directly
+    # (or opt in per query with selectinload), so authenticating a request
+    # never hydrates the user's whole expense history.
     expenses = relationship(
         "Expense",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="joined"
+        lazy="select"
     )
 
     def __repr__(self):
@@ -4,39 +4,43 @@ from sqlalchemy.orm import Session
 from datetime import timedelta
 
 from app.deps import get_db
-from app.crud.user import create_user, authenticate_user, get_user_by_email
+from app.db.session import run_db
+from app.crud.user import create_user, get_user_by_email, update_password_hash
+from app.core.password_hasher import password_hasher
 from app.schemas.user import UserCreate, UserRead
 from app.schemas.token import Token
-from app.utils import create_access_token
+from app.core.token import create_access_token
 from app.core.config import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
+async def register(user_in: UserCreate, db: Session = Depends(get_db)):
     """
     Register a new user with email, password, and full name.
     """
-    existing_user = get_user_by_email(db, user_in.email)
+    existing_user = await run_db(db, get_user_by_email, user_in.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email is already registered"
         )
 
-    # Create new user
-    new_user = create_user(
-        db=db,
+    # Create new user (bcrypt runs on the dedicated hashing pool)
+    hashed_password = await password_hasher.hash(user_in.password)
+    new_user = await run_db(
+        db,
+        create_user,
         email=user_in.email,
-        password=user_in.password,
+        hashed_password=hashed_password,
         full_name=user_in.full_name
     )
     return new_user
 
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -44,18 +48,29 @@ def login_for_access_token(
     Login using email and password to get access token.
     Note: OAuth2PasswordRequestForm uses 'username' field for email.
     """
-    user = authenticate_user(db, email=form_data.username, password=form_data.password)
-    if not user:
+    user = await run_db(db, get_user_by_email, form_data.username)
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(
+            form_data.password, user.hashed_password
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    email = user.email  # read before a commit expires the instance
+
+    # ✅ Transparently upgrade hashes made with an older work factor
+    if new_hash:
+        await run_db(db, update_password_hash, user, new_hash)
+
     # Generate access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        subject=user.email,
+        subject=email,
         expires_delta=access_token_expires
     )
 
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.deps import get_db, get_current_user
-from app.crud.category import create_category, get_category_by_name, list_categories
-from app.schemas.category import CategoryCreate, CategoryRead
-from app.models.user import User  # ✅ Import to type-hint current_user
+from app.db.session import run_db
+from app.core.response_cache import response_cache
+from app.crud.category import create_category, get_category_by_name, list_categories, list_categories_page
+from app.schemas.category import CategoryCreate, CategoryPage, CategoryRead
+from app.schemas.user import Principal  # ✅ Type-hint for the authenticated principal
 
 router = APIRouter(
     prefix="/categories",
@@ -13,19 +16,32 @@ router = APIRouter(
 
 # ✅ Create Category
 @router.post("/", response_model=CategoryRead, status_code=status.HTTP_201_CREATED)
-def create(cat_in: CategoryCreate, 
-           db: Session = Depends(get_db), 
-           current_user: User = Depends(get_current_user)):  # ✅ Get logged-in user
-    existing = get_category_by_name(db, cat_in.name)
+async def create(cat_in: CategoryCreate, 
+                 db: Session = Depends(get_db), 
+                 current_user: Principal = Depends(get_current_user)):  # ✅ Get logged-in user
+    existing = await run_db(db, get_category_by_name, cat_in.name)
     if existing:
         raise HTTPException(status_code=400, detail="Category already exists")
     
     # ✅ Must pass user_id
-    return create_category(db, name=cat_in.name, user_id=current_user.id)
+    category = await run_db(db, create_category, name=cat_in.name, user_id=current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+    return category
 
 # ✅ List Categories
 @router.get("/", response_model=list[CategoryRead])
-def read_all(skip: int = 0, limit: int = 100, 
-             db: Session = Depends(get_db),
-             current_user: User = Depends(get_current_user)):  # optional, but consistent
-    return list_categories(db, skip=skip, limit=limit)
+async def read_all(skip: int = 0, limit: int = 100, 
+                   db: Session = Depends(get_db),
+                   current_user: Principal = Depends(get_current_user)):
+    return await run_db(db, list_categories, user_id=current_user.id, skip=skip, limit=limit)
+
+# ✅ Keyset page of categories (ordered by id)
+@router.get("/page", response_model=CategoryPage)
+async def read_page(limit: int = Query(100, ge=1, le=1000),
+                    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+                    db: Session = Depends(get_db),
+                    current_user: Principal = Depends(get_current_user)):
+    items, next_cursor = await run_db(
+        db, list_categories_page, user_id=current_user.id, limit=limit, cursor=cursor
+    )
+    return {"items": items, "next_cursor": next_cursor}
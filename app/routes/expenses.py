@@ -1,19 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from tempfile import SpooledTemporaryFile
 from datetime import date
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from app.deps import get_db, get_current_user
-from app.schemas.expense import ExpenseCreate, ExpenseRead, ExpenseUpdate
+from app.db.session import run_db
+from app.core.response_cache import response_cache
+from app.core.config import settings
+from app.core.money import from_minor
+from app.services.import_service import import_expenses
+from app.services import analytics_service, export_service
+from app.services.fx_service import MissingRateError
+from app.services.batch_service import apply_batch
+from app.services.audit_service import audit_writer
+from app.schemas.expense import (
+    BatchItemResult,
+    BatchRequest,
+    ExpenseAnalytics,
+    ExpenseCreate,
+    ExpensePage,
+    ExpenseRead,
+    ExpenseSummaryBucket,
+    ExpenseUpdate,
+    MonthlySummaryItem,
+)
 from app.crud.expense import (
     create_expense,
     get_expense,
     update_expense,
     delete_expense,
     list_expenses,
+    list_expenses_page,
     monthly_summary,
+    period_summary,
 )
-from app.crud.category import get_category
 
 router = APIRouter(
     prefix="/expenses",
@@ -22,31 +45,264 @@ router = APIRouter(
 
 # ✅ CREATE EXPENSE
 @router.post("/", response_model=ExpenseRead, status_code=status.HTTP_201_CREATED)
-def create_expense_route(
+async def create_expense_route(
     exp_in: ExpenseCreate,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Create a new expense for the logged-in user."""
-    category = get_category(db, exp_in.category_id)
-    if not category or category.user_id != current_user.id:
+    """Create a new expense for the logged-in user (ownership is checked in the INSERT)."""
+    expense = await run_db(db, create_expense, exp_in.dict(), current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+    await audit_writer.emit(
+        user_id=current_user.id, action="expense.create", target_type="expense",
+        target_id=expense["id"], data=exp_in.dict(),
+    )
+    return expense
+
+
+# ✅ BATCH CREATE / UPDATE / DELETE (idempotent, one transaction)
+@router.post("/batch", response_model=List[BatchItemResult])
+async def batch_expenses_route(
+    batch: BatchRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Apply many expense writes in one round trip. Each operation carries an
+    idempotency_key; retrying a key returns the stored result (replayed=true)
+    instead of applying it twice. Per-item failures are reported per item.
+    """
+    if len(batch.operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BATCH_MAX_OPERATIONS} operations per batch."
+        )
+    results = await run_db(db, apply_batch, current_user.id, batch.operations)
+    applied = [
+        (op, r) for op, r in zip(batch.operations, results)
+        if not r["replayed"] and r["status"] < 300
+    ]
+    if applied:
+        await response_cache.invalidate_user(current_user.id)
+    for op, r in applied:
+        await audit_writer.emit(
+            user_id=current_user.id, action=f"expense.{op.op}", target_type="expense",
+            target_id=r["id"],
+            data={"batch": True, "idempotency_key": op.idempotency_key,
+                  **({"changes": op.data.model_dump(exclude_unset=True)} if op.op != "delete" else {})},
+        )
+    return results
+
+
+# ✅ BULK IMPORT (streamed CSV / NDJSON upload)
+@router.post("/import", summary="Bulk import expenses from CSV or NDJSON")
+async def import_expenses_route(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(
+        None, description="Defaults from Content-Type (text/csv or application/x-ndjson)"
+    ),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream the request body (CSV with a header row, or one JSON object per
+    line) and import every valid row in one transaction via COPY.
+    Returns counts plus a per-row error report for rejected rows.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            format = "csv"
+        elif "ndjson" in content_type or "jsonlines" in content_type:
+            format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or pass ?format=."
+            )
+
+    # Spool the upload (memory first, disk beyond the limit) while it streams in
+    upload = SpooledTemporaryFile(max_size=settings.IMPORT_SPOOL_MAX_BYTES)
+    try:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        report = await run_in_threadpool(import_expenses, upload, format, current_user.id)
+    except UnicodeDecodeError:
+        # Raised mid-stream by the text decoder; the import was rolled back
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Category does not exist or does not belong to you"
+            detail="Upload is not valid UTF-8: nothing was imported."
+        )
+    finally:
+        upload.close()
+
+    if report["inserted"]:
+        await response_cache.invalidate_user(current_user.id)
+        await audit_writer.emit(
+            user_id=current_user.id, action="expense.import", target_type="expense",
+            data={"format": format, "inserted": report["inserted"]},
+        )
+    return report
+
+
+# ✅ STREAMING EXPORT (CSV / NDJSON / Parquet)
+@router.get("/export", summary="Stream all matching expenses as CSV, NDJSON or Parquet")
+async def export_expenses_route(
+    format: Literal["csv", "ndjson", "parquet"] = Query("csv"),
+    category_id: Optional[int] = Query(None, description="Filter by category ID"),
+    start_date: Optional[date] = Query(None, description="Start date filter"),
+    end_date: Optional[date] = Query(None, description="End date filter"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Export the logged-in user's expenses with the same filters as the list endpoint."""
+    if format == "parquet" and not export_service.parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires pyarrow to be installed."
         )
+    stmt = export_service.export_statement(
+        current_user.id, category_id=category_id, start_date=start_date, end_date=end_date
+    )
+    return StreamingResponse(
+        export_service.stream_export(format, stmt),
+        media_type=export_service.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="expenses.{format}"'},
+    )
 
-    return create_expense(db, exp_in.dict(), current_user.id)
+
+# ✅ KEYSET PAGE (declared before /{expense_id} so "page" is not parsed as an id)
+@router.get("/page", response_model=ExpensePage)
+async def list_expenses_page_route(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    category_id: Optional[int] = Query(None, description="Filter by category ID"),
+    start_date: Optional[date] = Query(None, description="Start date filter"),
+    end_date: Optional[date] = Query(None, description="End date filter"),
+):
+    """
+    Page through the logged-in user's expenses, newest first.
+    Latency stays flat however deep the page (unlike skip/limit).
+    """
+    params = dict(limit=limit, cursor=cursor, category_id=category_id,
+                  start_date=start_date, end_date=end_date)
+
+    async def produce():
+        items, next_cursor = await run_db(db, list_expenses_page, user_id=current_user.id, **params)
+        return {"items": items, "next_cursor": next_cursor}
+
+    return await response_cache.cached(
+        request, current_user.id, "expenses.page", params, ExpensePage, produce
+    )
+
+
+# ✅ PERIOD SUMMARY (declared before /{expense_id})
+@router.get(
+    "/summary",
+    response_model=List[ExpenseSummaryBucket],
+    summary="Expense totals by category, bucketed by day/week/month/year",
+)
+async def period_summary_route(
+    request: Request,
+    start_date: date = Query(..., description="First day of the span (inclusive)"),
+    end_date: date = Query(..., description="Last day of the span (inclusive)"),
+    period: Literal["day", "week", "month", "year"] = Query("month"),
+    category_id: Optional[int] = Query(None, description="Filter by category ID"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    One round trip for a whole dashboard: e.g. period=month over a year
+    returns every (month, category) total instead of 12 monthly calls.
+    """
+    params = dict(period=period, start_date=start_date, end_date=end_date, category_id=category_id)
+
+    async def produce():
+        return await run_db(db, period_summary, user_id=current_user.id, **params)
+
+    return await response_cache.cached(
+        request, current_user.id, "expenses.summary", params, List[ExpenseSummaryBucket], produce
+    )
+
+
+# ✅ CONVERTED PERIOD SUMMARY (declared before /{expense_id})
+@router.get(
+    "/summary/converted",
+    response_model=List[ExpenseSummaryBucket],
+    summary="Expense totals by category, converted to one currency at each expense's date",
+)
+async def converted_summary_route(
+    start_date: date = Query(..., description="First day of the span (inclusive)"),
+    end_date: date = Query(..., description="Last day of the span (inclusive)"),
+    period: Literal["day", "week", "month", "year"] = Query("month"),
+    currency: str = Query(
+        settings.FX_HOME_CURRENCY, pattern="^[A-Z]{3}$", description="Reporting currency (ISO 4217)"
+    ),
+    category_id: Optional[int] = Query(None, description="Filter by category ID"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Same buckets as /expenses/summary, with every expense converted at the
+    FX rate in effect on its date, in bulk (one vectorized pass per source
+    currency). Not response-cached: rate loads change the result without
+    any write by the user.
+    """
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be before start_date."
+        )
+    try:
+        return await run_in_threadpool(
+            analytics_service.converted_summary, current_user.id, currency, period,
+            start_date, end_date, category_id,
+        )
+    except MissingRateError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
+# ✅ ANALYTICS (declared before /{expense_id})
+@router.get("/analytics", response_model=ExpenseAnalytics, summary="Totals, percentiles and running balance")
+async def expense_analytics_route(
+    request: Request,
+    currency: str = Query("USD", pattern="^[A-Z]{3}$", description="ISO 4217 code"),
+    start_date: Optional[date] = Query(None, description="Start date filter"),
+    end_date: Optional[date] = Query(None, description="End date filter"),
+    category_id: Optional[int] = Query(None, description="Filter by category ID"),
+    q: List[float] = Query([50, 90, 99], description="Percentiles of the expense amount (0-100)"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Per-category totals, amount percentiles and a daily running balance for
+    one currency, computed over int64 arrays (app/services/analytics_service.py).
+    """
+    if any(not 0 <= p <= 100 for p in q):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Percentiles must be between 0 and 100."
+        )
+    params = dict(currency=currency, start_date=start_date, end_date=end_date,
+                  category_id=category_id, qs=q)
+
+    async def produce():
+        return await run_in_threadpool(analytics_service.analyze, current_user.id, **params)
+
+    return await response_cache.cached(
+        request, current_user.id, "expenses.analytics", params, ExpenseAnalytics, produce
+    )
 
 
 # ✅ GET SINGLE EXPENSE
 @router.get("/{expense_id}", response_model=ExpenseRead)
-def get_expense_route(
+async def get_expense_route(
     expense_id: int,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Fetch a single expense for the logged-in user."""
-    expense = get_expense(db, expense_id, current_user.id)
+    expense = await run_db(db, get_expense, expense_id, current_user.id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     return expense
@@ -54,7 +310,8 @@ def get_expense_route(
 
 # ✅ LIST EXPENSES (Filter by date/category)
 @router.get("/", response_model=List[ExpenseRead])
-def list_expenses_route(
+async def list_expenses_route(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
     skip: int = 0,
@@ -64,57 +321,75 @@ def list_expenses_route(
     end_date: Optional[date] = Query(None, description="End date filter"),
 ):
     """List all expenses of the logged-in user with optional filters."""
-    return list_expenses(
-        db,
-        user_id=current_user.id,
-        skip=skip,
-        limit=limit,
-        category_id=category_id,
-        start_date=start_date,
-        end_date=end_date
+    params = dict(skip=skip, limit=limit, category_id=category_id,
+                  start_date=start_date, end_date=end_date)
+
+    async def produce():
+        return await run_db(db, list_expenses, user_id=current_user.id, **params)
+
+    return await response_cache.cached(
+        request, current_user.id, "expenses.list", params, List[ExpenseRead], produce
     )
 
 
 # ✅ UPDATE EXPENSE
 @router.put("/{expense_id}", response_model=ExpenseRead)
-def update_expense_route(
+async def update_expense_route(
     expense_id: int,
     exp_in: ExpenseUpdate,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Update an expense owned by the logged-in user."""
-    expense = update_expense(db, expense_id, exp_in.dict(exclude_unset=True), current_user.id)
+    changes = exp_in.dict(exclude_unset=True)
+    expense = await run_db(db, update_expense, expense_id, changes, current_user.id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found or not owned by user")
+    await response_cache.invalidate_user(current_user.id)
+    await audit_writer.emit(
+        user_id=current_user.id, action="expense.update", target_type="expense",
+        target_id=expense_id, data={"changes": changes},
+    )
     return expense
 
 
 # ✅ DELETE EXPENSE
 @router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_expense_route(
+async def delete_expense_route(
     expense_id: int,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Delete an expense owned by the logged-in user."""
-    success = delete_expense(db, expense_id, current_user.id)
+    success = await run_db(db, delete_expense, expense_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Expense not found or not owned by user")
+    await response_cache.invalidate_user(current_user.id)
+    await audit_writer.emit(
+        user_id=current_user.id, action="expense.delete", target_type="expense", target_id=expense_id,
+    )
     return {"message": "Expense deleted successfully"}
 
 
 # ✅ MONTHLY SUMMARY
-@router.get("/summary/", summary="Monthly expense summary by category")
-def monthly_summary_route(
+@router.get("/summary/", response_model=List[MonthlySummaryItem], summary="Monthly expense summary by category")
+async def monthly_summary_route(
+    request: Request,
     month: int = Query(..., ge=1, le=12, description="Month number (1–12)"),
     year: int = Query(..., description="Year (e.g., 2025)"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Summarize expenses by category for a given month and year."""
-    summary = monthly_summary(db, month, year, current_user.id)
-    return [
-        {"category": category_name, "total_amount": total}
-        for category_name, total in summary
-    ]
+    async def produce():
+        summary = await run_db(db, monthly_summary, month, year, current_user.id)
+        return [
+            {"category": row["category"], "currency": row["currency"],
+             "total_amount": from_minor(row["total_minor"])}
+            for row in summary
+        ]
+
+    return await response_cache.cached(
+        request, current_user.id, "expenses.monthly_summary",
+        dict(month=month, year=year), List[MonthlySummaryItem], produce
+    )
@@ -0,0 +1,57 @@
+import io
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.deps import get_admin_user, get_current_user
+from app.db.session import engine
+from app.services import fx_service
+from app.services.audit_service import audit_writer
+
+router = APIRouter(prefix="/fx", tags=["FX Rates"])
+
+CURRENCY_PATTERN = "^[A-Z]{3}$"
+
+
+def _load_upload(body: bytes) -> int:
+    rows = fx_service.parse_rates(io.StringIO(body.decode("utf-8-sig")))
+    return fx_service.store_rates(engine, rows)
+
+
+# ✅ LOAD RATES (admin): CSV body with date,base,quote,rate
+@router.post("/rates", summary="Upsert FX rates from a CSV body (admin)")
+async def load_rates_route(request: Request, admin: dict = Depends(get_admin_user)):
+    """
+    Upsert every row of the uploaded CSV. This worker's rate index reloads
+    on its next use; other workers pick the rates up within FX_INDEX_TTL_SECONDS.
+    """
+    body = await request.body()
+    try:
+        loaded = await run_in_threadpool(_load_upload, body)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    await audit_writer.emit(
+        user_id=admin.id, action="fx.load", target_type="fx_rate", data={"loaded": loaded},
+    )
+    return {"loaded": loaded}
+
+
+# ✅ RATE LOOKUP: rate in effect on a date (latest on or before it)
+@router.get("/rates/{base}/{quote}", summary="Exchange rate in effect on a date")
+async def get_rate_route(
+    base: str = Path(..., pattern=CURRENCY_PATTERN),
+    quote: str = Path(..., pattern=CURRENCY_PATTERN),
+    on: Optional[date] = Query(None, description="Date (defaults to today)"),
+    current_user: dict = Depends(get_current_user)
+):
+    on = on or date.today()
+    await run_in_threadpool(fx_service.fx_index.ensure_loaded, engine)
+    rate = fx_service.fx_index.rate_on(base, quote, on)
+    if rate is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No {base}->{quote} exchange rate on or before {on.isoformat()}.",
+        )
+    return {"base": base, "quote": quote, "date": on, "rate": rate}
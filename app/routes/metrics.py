@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, Response
+from fastapi.concurrency import run_in_threadpool
+
+from app.core import prometheus
+from app.core.principal_cache import principal_cache
+from app.core.response_cache import response_cache
+from app.db.pool_metrics import pool_stats
+from app.deps import get_admin_user
+from app.schemas.user import Principal
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+# ✅ Prometheus scrape target (aggregated across workers in multiprocess mode)
+@router.get("", summary="Prometheus metrics", include_in_schema=False)
+async def prometheus_metrics():
+    if prometheus.MULTIPROCESS:
+        # Reads every worker's mmap files: keep that off the event loop
+        body = await run_in_threadpool(prometheus.render)
+    else:
+        body = prometheus.render()
+    return Response(body, media_type=prometheus.CONTENT_TYPE_LATEST)
+
+
+# ✅ Connection pool state: is the app queueing on the pool or on Postgres? (admin only)
+@router.get("/db-pool", summary="Database connection pool statistics")
+async def db_pool_metrics(admin: Principal = Depends(get_admin_user)):
+    return pool_stats.snapshot()
+
+
+# ✅ Cache hit ratios, for sizing TTLs and capacity (admin only)
+@router.get("/caches", summary="Principal and response cache statistics")
+async def cache_metrics(admin: Principal = Depends(get_admin_user)):
+    return {
+        "principal_cache": principal_cache.stats(),
+        "response_cache": response_cache.stats(),
+    }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 # ✅ Schema used for creating a category
 class CategoryCreate(BaseModel):
@@ -13,3 +13,8 @@ class CategoryRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+# ✅ Keyset page of categories
+class CategoryPage(BaseModel):
+    items: List[CategoryRead]
+    next_cursor: Optional[str] = None
@@ -1,12 +1,23 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, PlainSerializer
 from datetime import date, datetime
-from typing import Optional
+from decimal import Decimal
+from typing import Any, List, Literal, Optional, Union
+from typing_extensions import Annotated
 from .category import CategoryRead
 
+# ✅ Exact on input (at most 2 decimal places), still a JSON number on output
+Money = Annotated[
+    Decimal,
+    Field(max_digits=17, decimal_places=2),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
+Currency = Annotated[str, Field(min_length=3, max_length=3, pattern="^[A-Z]{3}$")]
+
 # ---------- Base Schema ----------
 class ExpenseBase(BaseModel):
     title: str
-    amount: float
+    amount: Money
+    currency: Currency = "USD"  # ISO 4217
     date: date
     description: Optional[str] = None
     category_id: Optional[int] = None
@@ -18,7 +29,8 @@ class ExpenseCreate(ExpenseBase):
 # ---------- Update ----------
 class ExpenseUpdate(BaseModel):
     title: Optional[str] = None
-    amount: Optional[float] = None
+    amount: Optional[Money] = None
+    currency: Optional[Currency] = None
     date: Optional[date] = None  # type: ignore
     description: Optional[str] = None
     category_id: Optional[int] = None
@@ -26,6 +38,7 @@ class ExpenseUpdate(BaseModel):
 # ---------- Read ----------
 class ExpenseRead(ExpenseBase):
     id: int
+    amount_minor: int  # ✅ Stored value: integer hundredths of `currency`
     user_id: int  # ✅ Very important for multi-user applications
     category: Optional[CategoryRead] = None  # ✅ Eager relationship
     is_deleted: bool  # ✅ Soft delete visibility
@@ -34,3 +47,77 @@ class ExpenseRead(ExpenseBase):
 
     class Config:
         from_attributes = True  # ✅ Required in Pydantic v2
+
+# ---------- Keyset page ----------
+class ExpensePage(BaseModel):
+    items: List[ExpenseRead]
+    next_cursor: Optional[str] = None  # ✅ Pass back as ?cursor= for the next page
+
+# ---------- Period summary ----------
+class ExpenseSummaryBucket(BaseModel):
+    period_start: date
+    category_id: int
+    category: str
+    currency: str
+    total_amount: Money
+    count: int
+
+# ---------- Monthly summary ----------
+class MonthlySummaryItem(BaseModel):
+    category: str
+    currency: str
+    total_amount: Money
+
+# ---------- Analytics ----------
+class CategoryTotal(BaseModel):
+    category_id: Optional[int] = None
+    total_amount: Money
+    count: int
+
+class AmountPercentile(BaseModel):
+    q: float
+    amount: Optional[Money] = None
+
+class BalancePoint(BaseModel):
+    date: date
+    total_amount: Money
+    balance: Money  # ✅ Cumulative spending up to and including `date`
+
+class ExpenseAnalytics(BaseModel):
+    currency: str
+    count: int
+    total_amount: Money
+    categories: List[CategoryTotal]
+    percentiles: List[AmountPercentile]
+    running_balance: List[BalancePoint]
+
+# ---------- Batch operations ----------
+class BatchCreate(BaseModel):
+    op: Literal["create"]
+    idempotency_key: str = Field(..., min_length=1, max_length=255)
+    data: ExpenseCreate
+
+class BatchUpdate(BaseModel):
+    op: Literal["update"]
+    idempotency_key: str = Field(..., min_length=1, max_length=255)
+    id: int
+    data: ExpenseUpdate
+
+class BatchDelete(BaseModel):
+    op: Literal["delete"]
+    idempotency_key: str = Field(..., min_length=1, max_length=255)
+    id: int
+
+BatchOperation = Annotated[Union[BatchCreate, BatchUpdate, BatchDelete], Field(discriminator="op")]
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1)
+
+class BatchItemResult(BaseModel):
+    idempotency_key: str
+    op: str
+    status: int  # HTTP-style status of this item
+    id: Optional[int] = None
+    data: Optional[Any] = None  # ExpenseRead for create/update
+    detail: Optional[str] = None
+    replayed: bool = False  # ✅ True when served from a previous request
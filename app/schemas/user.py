@@ -15,3 +15,12 @@ class UserRead(BaseModel):
 
     class Config:
         orm_mode = True  # ✅ Allows returning ORM models directly
+
+# ✅ Authenticated principal (cached between requests, no password hash)
+class Principal(BaseModel):
+    id: int
+    email: str
+    full_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
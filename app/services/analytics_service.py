@@ -0,0 +1,190 @@
+# app/services/analytics_service.py
+"""
+Server-side expense analytics on NumPy arrays.
+
+Columns are streamed from a server-side cursor straight into int64 arrays
+(category id, day number, amount in minor units) - no ORM objects, no
+per-row Python dicts - and every aggregate is a vectorized pass over them.
+Amounts are integers, so totals and running balances are exact.
+Converted summaries load each currency separately and convert it with
+one vectorized pass through the FX rate index (app/services/fx_service.py).
+Runs on the sync engine in a worker thread.
+"""
+from datetime import date, timedelta
+from typing import Iterable, List, NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy import func, literal, select
+
+from app.core.config import settings
+from app.core.money import from_minor
+from app.crud.expense import expense_filters
+from app.db.session import engine
+from app.models.category import Category
+from app.models.expense import Expense
+from app.services.fx_service import fx_index
+
+_EPOCH = date(1970, 1, 1)
+NO_CATEGORY = -1
+
+
+class ExpenseColumns(NamedTuple):
+    category_id: np.ndarray  # int64, NO_CATEGORY for uncategorized
+    day: np.ndarray  # int64 days since 1970-01-01
+    amount_minor: np.ndarray  # int64
+
+
+def load_columns(user_id: int, currency: str, start_date=None, end_date=None,
+                 category_id=None) -> ExpenseColumns:
+    """Live expenses of one user in one currency, as three int64 columns."""
+    stmt = (
+        select(
+            func.coalesce(Expense.category_id, NO_CATEGORY),
+            Expense.date - literal(_EPOCH),  # date - date is an integer day count
+            Expense.amount_minor,
+        )
+        .where(*expense_filters(user_id, category_id, start_date, end_date))
+        .where(Expense.currency == currency)
+    )
+    chunks = []
+    with engine.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=settings.ANALYTICS_CHUNK_ROWS
+        ).execute(stmt)
+        for partition in result.partitions():
+            chunks.append(np.array(partition, dtype=np.int64).reshape(-1, 3))
+    data = np.concatenate(chunks) if chunks else np.empty((0, 3), dtype=np.int64)
+    return ExpenseColumns(data[:, 0].copy(), data[:, 1].copy(), data[:, 2].copy())
+
+
+def expense_currencies(user_id: int, start_date=None, end_date=None, category_id=None) -> List[str]:
+    stmt = (
+        select(Expense.currency)
+        .where(*expense_filters(user_id, category_id, start_date, end_date))
+        .distinct()
+    )
+    with engine.connect() as conn:
+        return list(conn.execute(stmt).scalars())
+
+
+def _group_sums(keys: np.ndarray, amounts: np.ndarray):
+    """(unique keys, sum per key, count per key) via one sort + reduceat."""
+    if not len(keys):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    order = np.argsort(keys, kind="stable")
+    keys, amounts = keys[order], amounts[order]
+    unique, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+    return unique, np.add.reduceat(amounts, starts), counts
+
+
+def category_totals(columns: ExpenseColumns) -> List[dict]:
+    categories, totals, counts = _group_sums(columns.category_id, columns.amount_minor)
+    return [
+        {
+            "category_id": None if cat == NO_CATEGORY else int(cat),
+            "total_minor": int(total),
+            "count": int(count),
+        }
+        for cat, total, count in zip(categories, totals, counts)
+    ]
+
+
+def percentiles(columns: ExpenseColumns, qs: Iterable[float]) -> List[dict]:
+    """Amount percentiles, rounded to the nearest minor unit."""
+    qs = list(qs)
+    if not len(columns.amount_minor):
+        return [{"q": q, "amount_minor": None} for q in qs]
+    values = np.rint(np.percentile(columns.amount_minor, qs)).astype(np.int64)
+    return [{"q": q, "amount_minor": int(v)} for q, v in zip(qs, values)]
+
+
+def running_balance(columns: ExpenseColumns) -> List[dict]:
+    """Spending per day with days in order, plus the cumulative total."""
+    days, totals, _ = _group_sums(columns.day, columns.amount_minor)
+    balances = np.cumsum(totals)
+    return [
+        {"date": _EPOCH + timedelta(days=int(d)), "total_minor": int(t), "balance_minor": int(b)}
+        for d, t, b in zip(days, totals, balances)
+    ]
+
+
+def analyze(user_id: int, currency: str, start_date=None, end_date=None,
+            category_id: Optional[int] = None, qs: Iterable[float] = (50, 90, 99)) -> dict:
+    """Everything the analytics endpoint returns, from a single column load."""
+    columns = load_columns(user_id, currency, start_date, end_date, category_id)
+    total = int(columns.amount_minor.sum())
+    return {
+        "currency": currency,
+        "count": len(columns.amount_minor),
+        "total_amount": from_minor(total),
+        "categories": [
+            {"category_id": row["category_id"], "total_amount": from_minor(row["total_minor"]),
+             "count": row["count"]}
+            for row in category_totals(columns)
+        ],
+        "percentiles": [
+            {"q": row["q"], "amount": from_minor(row["amount_minor"])}
+            for row in percentiles(columns, qs)
+        ],
+        "running_balance": [
+            {"date": row["date"], "total_amount": from_minor(row["total_minor"]),
+             "balance": from_minor(row["balance_minor"])}
+            for row in running_balance(columns)
+        ],
+    }
+
+
+def period_starts(days: np.ndarray, period: str) -> np.ndarray:
+    """Day number of the day/week (ISO, Monday)/month/year containing each day."""
+    if period == "day":
+        return days
+    if period == "week":
+        return days - (days + 3) % 7  # 1970-01-01 was a Thursday
+    unit = "datetime64[M]" if period == "month" else "datetime64[Y]"
+    return days.astype("datetime64[D]").astype(unit).astype("datetime64[D]").astype(np.int64)
+
+
+def converted_summary(user_id: int, target: str, period: str, start_date: date, end_date: date,
+                      category_id: Optional[int] = None) -> List[dict]:
+    """
+    Like crud.expense.period_summary, but every expense is converted to
+    `target` at the rate of its own date before summing. Raises
+    fx_service.MissingRateError when a rate is unavailable.
+    """
+    fx_index.ensure_loaded(engine)
+    periods, categories, amounts = [], [], []
+    for currency in expense_currencies(user_id, start_date, end_date, category_id):
+        columns = load_columns(user_id, currency, start_date, end_date, category_id)
+        periods.append(period_starts(columns.day, period))
+        categories.append(columns.category_id)
+        amounts.append(fx_index.convert(columns.amount_minor, columns.day, currency, target))
+    if not amounts:
+        return []
+    periods, categories, amounts = map(np.concatenate, (periods, categories, amounts))
+
+    # Group on (period, category): lexsort, then one reduceat over the run starts
+    order = np.lexsort((categories, periods))
+    periods, categories, amounts = periods[order], categories[order], amounts[order]
+    starts = np.flatnonzero(np.r_[True, (np.diff(periods) != 0) | (np.diff(categories) != 0)])
+    totals = np.add.reduceat(amounts, starts)
+    counts = np.diff(np.r_[starts, len(amounts)])
+
+    with engine.connect() as conn:
+        names = dict(conn.execute(
+            select(Category.id, Category.name).where(Category.user_id == user_id, ~Category.is_deleted)
+        ).all())
+    rows = [
+        {
+            "period_start": _EPOCH + timedelta(days=int(periods[i])),
+            "category_id": int(categories[i]),
+            "category": names[int(categories[i])],
+            "currency": target,
+            "total_amount": from_minor(int(total)),
+            "count": int(count),
+        }
+        for i, total, count in zip(starts, totals, counts)
+        if int(categories[i]) in names  # same as period_summary: categorized, live categories only
+    ]
+    rows.sort(key=lambda r: (r["period_start"], r["category"]))
+    return rows
@@ -1,7 +1,32 @@
 # app/services/audit_service.py
+import asyncio
+import contextlib
+import json
+import logging
+import os
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: replay without the cross-process lock
+    fcntl = None
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.prometheus import AUDIT_EVENTS
+from ..db.session import async_engine, engine
 from ..models.audit_log import AuditLog
-from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_MODES = ("block", "drop_oldest", "spill")
+
 
 def create_audit_log(db: Session, *, user_id: Optional[int], action: str, target_type: str, target_id: Optional[int]=None, data: Optional[Dict[str, Any]]=None):
     log = AuditLog(user_id=user_id, action=action, target_type=target_type, target_id=target_id, data=data or {})
@@ -9,3 +34,212 @@ def create_audit_log(db: Session, *, user_id: Optional[int], action: str, target
     db.commit()
     db.refresh(log)
     return log
+
+
+class AuditWriter:
+    """
+    Buffered audit pipeline: handlers enqueue events (no DB work on the
+    request path) and one background worker writes them with a multi-row
+    INSERT, once `batch_size` events are waiting or `flush_interval` has
+    passed. When the queue is full:
+      block       - the handler waits for room
+      drop_oldest - the oldest queued event is discarded
+      spill       - the event is appended to `spill_path` (NDJSON) and
+                    written to the database at the next start
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float,
+                 overflow: str, spill_path: str, drain_timeout: float):
+        if overflow not in OVERFLOW_MODES:
+            raise ValueError(f"Unknown AUDIT_OVERFLOW '{overflow}', expected one of {OVERFLOW_MODES}")
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.drain_timeout = drain_timeout
+        self._queue: deque = deque()
+        self._not_empty: Optional[asyncio.Event] = None
+        self._not_full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    # ---------- Request side ----------
+
+    async def emit(self, *, user_id: Optional[int], action: str, target_type: str,
+                   target_id: Optional[int] = None, data: Optional[Dict[str, Any]] = None) -> None:
+        event = {
+            "user_id": user_id,
+            "action": action,
+            "target_type": target_type,
+            "target_id": target_id,
+            "data": jsonable_encoder(data or {}),
+            "created_at": datetime.now(timezone.utc),
+        }
+        if self._task is None:
+            # Not started (scripts, tests): write through
+            await self._write([event])
+            return
+
+        while len(self._queue) >= self.max_size:
+            if self.overflow == "drop_oldest":
+                self._queue.popleft()
+                AUDIT_EVENTS.labels("dropped").inc()
+            elif self.overflow == "spill":
+                self._spill([event])
+                return
+            else:
+                self._not_full.clear()
+                await self._not_full.wait()
+
+        self._queue.append(event)
+        if len(self._queue) >= self.batch_size:
+            self._not_empty.set()
+
+    # ---------- Worker ----------
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._stopping = False
+        await self._replay_spill()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything still queued, bounded by `drain_timeout`."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._not_empty.set()
+        try:
+            await asyncio.wait_for(self._task, self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Audit drain timed out, spilling {len(self._queue)} events")
+            self._spill(list(self._queue))
+            self._queue.clear()
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._not_empty.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._not_empty.clear()
+
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._not_full.set()
+                await self._write(batch)
+            if self._stopping:
+                return
+
+    async def _write(self, events: List[dict]) -> None:
+        try:
+            if async_engine is not None:
+                async with async_engine.begin() as conn:
+                    await conn.execute(insert(AuditLog.__table__), events)
+            else:
+                await run_in_threadpool(_insert_sync, events)
+        except asyncio.CancelledError:
+            self._spill(events)  # drain timed out mid-write: keep the batch
+            raise
+        except Exception as e:
+            logger.error(f"Audit flush of {len(events)} events failed: {e}")
+            self._spill(events)
+        else:
+            AUDIT_EVENTS.labels("written").inc(len(events))
+
+    # ---------- Spill file ----------
+
+    def _spill(self, events: List[dict]) -> None:
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for event in events:
+                    f.write(json.dumps(jsonable_encoder(event)) + "\n")
+        except OSError as e:
+            logger.error(f"Audit spill to {self.spill_path} failed, {len(events)} events lost: {e}")
+            AUDIT_EVENTS.labels("dropped").inc(len(events))
+        else:
+            AUDIT_EVENTS.labels("spilled").inc(len(events))
+
+    @contextlib.contextmanager
+    def _replay_lock(self):
+        """
+        Exclusive, non-blocking lock shared by every worker using this
+        spill path. Yields False when another process holds it (and is
+        replaying). The OS releases it if its holder crashes.
+        """
+        if fcntl is None:
+            yield True
+            return
+        with open(f"{self.spill_path}.lock", "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+            except BlockingIOError:
+                acquired = False
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    async def _replay_spill(self) -> None:
+        replay_path = f"{self.spill_path}.replay"
+        with self._replay_lock() as acquired:
+            if not acquired:
+                logger.info("Spilled audit events are being replayed by another process")
+                return
+            # ✅ A leftover .replay file means the last replay never finished: redo it first
+            if os.path.exists(replay_path):
+                await self._replay_file(replay_path)
+            try:
+                os.replace(self.spill_path, replay_path)
+            except FileNotFoundError:
+                return
+            await self._replay_file(replay_path)
+
+    async def _replay_file(self, replay_path: str) -> None:
+        """Write every event in `replay_path` (at least once), then delete the file."""
+        events = []
+        try:
+            f = open(replay_path, encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    # Only a line torn by a crash mid-spill can be malformed
+                    logger.warning(f"Skipping unreadable spilled audit event: {line[:200]!r}")
+        for event in events:
+            event["created_at"] = datetime.fromisoformat(event["created_at"])
+        for start in range(0, len(events), self.batch_size):
+            await self._write(events[start:start + self.batch_size])  # failures re-spill
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(replay_path)
+        logger.info(f"Replayed {len(events)} spilled audit events")
+
+def _insert_sync(events: List[dict]) -> None:
+    with engine.begin() as conn:
+        conn.execute(insert(AuditLog.__table__), events)  # ✅ one multi-row INSERT
+
+
+audit_writer = AuditWriter(
+    max_size=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+    overflow=settings.AUDIT_OVERFLOW,
+    spill_path=settings.AUDIT_SPILL_PATH,
+    drain_timeout=settings.AUDIT_DRAIN_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,227 @@
+# app/services/batch_service.py
+"""
+Batched expense writes in a single transaction.
+
+Statement budget for a batch, regardless of its size:
+reserve idempotency keys, load replays, load the user's categories,
+lock targeted rows, one multi-row INSERT ... RETURNING, one
+UPDATE ... FROM (VALUES ...) RETURNING per distinct set of updated
+fields, one soft-deleting UPDATE, a rollup refresh, and storing results.
+"""
+from collections import defaultdict
+from typing import List
+
+from sqlalchemy import Integer, bindparam, cast, column, func, insert, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.money import from_minor
+from app.crud.expense import to_columns
+from app.models.category import Category
+from app.models.expense import Expense
+from app.models.idempotency_key import IdempotencyKey
+from app.schemas.expense import BatchCreate, BatchDelete, ExpenseRead
+from app.services import rollup_service
+
+expenses_table = Expense.__table__
+idempotency_table = IdempotencyKey.__table__
+
+
+def _result(op, status: int, id=None, data=None, detail=None) -> dict:
+    return {
+        "idempotency_key": op.idempotency_key,
+        "op": op.op,
+        "status": status,
+        "id": id,
+        "data": data,
+        "detail": detail,
+        "replayed": False,
+    }
+
+
+def _expense_payload(row, categories: dict) -> dict:
+    mapping = dict(row._mapping)
+    mapping["amount"] = from_minor(mapping["amount_minor"])
+    category = categories.get(mapping["category_id"])
+    mapping["category"] = (
+        {"id": category.id, "name": category.name, "user_id": category.user_id} if category else None
+    )
+    return ExpenseRead.model_validate(mapping).model_dump(mode="json")
+
+
+def _bucket(user_id: int, row):
+    return (user_id, row.category_id, rollup_service.month_start(row.date), row.currency)
+
+
+def apply_batch(db: Session, user_id: int, operations: List) -> List[dict]:
+    """
+    Execute a list of BatchCreate/BatchUpdate/BatchDelete for `user_id`.
+    Returns one result per operation, in request order. Failed items
+    (404/400/409) are reported per item and do not abort the batch.
+    """
+    results = [None] * len(operations)
+
+    # ---------- 1. Idempotency: de-duplicate, reserve, replay ----------
+    first_index = {}
+    for i, op in enumerate(operations):
+        if op.idempotency_key in first_index:
+            results[i] = _result(op, 409, detail="Duplicate idempotency_key in this batch.")
+        else:
+            first_index[op.idempotency_key] = i
+
+    keys = list(first_index)
+    # A concurrent batch holding the same key makes this INSERT wait for
+    # it to finish; its key then conflicts and its stored result is replayed.
+    reserved = set(db.execute(
+        pg_insert(idempotency_table)
+        .values([{"user_id": user_id, "key": k} for k in keys])
+        .on_conflict_do_nothing()
+        .returning(idempotency_table.c.key)
+    ).scalars())
+
+    replay_keys = [k for k in keys if k not in reserved]
+    if replay_keys:
+        stored = dict(db.execute(
+            select(idempotency_table.c.key, idempotency_table.c.result)
+            .where(idempotency_table.c.user_id == user_id, idempotency_table.c.key.in_(replay_keys))
+        ).all())
+        for key in replay_keys:
+            i = first_index[key]
+            if stored.get(key) is None:
+                results[i] = _result(operations[i], 409, detail="Operation with this key is still in progress.")
+            else:
+                results[i] = {**stored[key], "replayed": True}
+
+    to_run = [first_index[k] for k in keys if k in reserved]
+
+    # ---------- 2. Ownership: categories and targeted rows ----------
+    categories = {
+        c.id: c for c in db.execute(
+            select(Category.id, Category.name, Category.user_id).where(Category.user_id == user_id)
+        ).all()
+    }
+    target_ids = {operations[i].id for i in to_run if not isinstance(operations[i], BatchCreate)}
+    old_rows = {}
+    if target_ids:
+        old_rows = {
+            r.id: r for r in db.execute(
+                select(
+                    expenses_table.c.id, expenses_table.c.category_id,
+                    expenses_table.c.date, expenses_table.c.currency,
+                )
+                .where(
+                    expenses_table.c.id.in_(target_ids),
+                    expenses_table.c.user_id == user_id,
+                    ~expenses_table.c.is_deleted,  # Core statement: filter soft-deleted rows explicitly
+                )
+                .with_for_update()
+            ).all()
+        }
+
+    creates, updates, deletes = [], defaultdict(list), []
+    update_columns = {}
+    targeted = set()
+    for i in to_run:
+        op = operations[i]
+        if isinstance(op, BatchCreate):
+            if op.data.category_id not in categories:
+                results[i] = _result(op, 400, detail="Category does not exist or does not belong to the user.")
+            else:
+                creates.append(i)
+            continue
+
+        if op.id not in old_rows:
+            results[i] = _result(op, 404, id=op.id, detail="Expense not found or does not belong to this user.")
+        elif op.id in targeted:
+            results[i] = _result(op, 409, id=op.id, detail="Expense targeted more than once in this batch.")
+        elif isinstance(op, BatchDelete):
+            targeted.add(op.id)
+            deletes.append(i)
+        else:
+            fields = to_columns(op.data.model_dump(exclude_unset=True))
+            category_id = fields.get("category_id")
+            if category_id is not None and category_id not in categories:
+                results[i] = _result(op, 400, id=op.id, detail="Category does not exist or does not belong to the user.")
+                continue
+            targeted.add(op.id)
+            update_columns[i] = fields
+            updates[tuple(sorted(fields))].append(i)
+
+    touched_buckets = set()
+
+    # ---------- 3. Creates: one multi-row INSERT ... RETURNING ----------
+    if creates:
+        rows = db.execute(
+            insert(expenses_table).returning(*expenses_table.c, sort_by_parameter_order=True),
+            [{**to_columns(operations[i].data.model_dump()), "user_id": user_id} for i in creates],
+        ).all()
+        for i, row in zip(creates, rows):
+            results[i] = _result(operations[i], 201, id=row.id, data=_expense_payload(row, categories))
+            touched_buckets.add(_bucket(user_id, row))
+
+    # ---------- 4. Updates: UPDATE ... FROM (VALUES ...) per field set ----------
+    for fields, indexes in updates.items():
+        if not fields:
+            rows = db.execute(
+                select(*expenses_table.c).where(
+                    expenses_table.c.id.in_([operations[i].id for i in indexes])
+                )
+            ).all()
+        else:
+            v = values(
+                column("id", Integer),
+                *(column(f, expenses_table.c[f].type) for f in fields),
+                name="v",
+            ).data([
+                (operations[i].id, *(update_columns[i][f] for f in fields))
+                for i in indexes
+            ])
+            rows = db.execute(
+                update(expenses_table)
+                .where(expenses_table.c.id == v.c.id, expenses_table.c.user_id == user_id)
+                .values({f: cast(v.c[f], expenses_table.c[f].type) for f in fields})
+                .returning(*expenses_table.c)
+            ).all()
+        by_id = {row.id: row for row in rows}
+        for i in indexes:
+            op = operations[i]
+            row = by_id[op.id]
+            old = old_rows[op.id]
+            results[i] = _result(op, 200, id=row.id, data=_expense_payload(row, categories))
+            touched_buckets.add(_bucket(user_id, old))
+            touched_buckets.add(_bucket(user_id, row))
+
+    # ---------- 5. Deletes: one soft-deleting UPDATE ----------
+    if deletes:
+        db.execute(
+            update(expenses_table)
+            .where(
+                expenses_table.c.id.in_([operations[i].id for i in deletes]),
+                expenses_table.c.user_id == user_id,
+            )
+            .values(is_deleted=True, deleted_at=func.now())
+        )
+        for i in deletes:
+            op = operations[i]
+            old = old_rows[op.id]
+            results[i] = _result(op, 204, id=op.id)
+            touched_buckets.add(_bucket(user_id, old))
+
+    # ---------- 6. Rollups (set-based) and stored results ----------
+    rollup_service.refresh_buckets(db, touched_buckets)
+
+    if to_run:
+        db.execute(
+            update(idempotency_table)
+            .where(
+                idempotency_table.c.user_id == bindparam("b_user_id"),
+                idempotency_table.c.key == bindparam("b_key"),
+            )
+            .values(result=bindparam("b_result")),
+            [
+                {"b_user_id": user_id, "b_key": operations[i].idempotency_key, "b_result": results[i]}
+                for i in to_run
+            ],
+        )
+    db.commit()
+    return results
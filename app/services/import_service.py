@@ -0,0 +1,182 @@
+# app/services/import_service.py
+"""
+Bulk expense import: validate uploaded rows in batches, COPY them into a
+staging table and merge into `expenses` (and `expense_rollups`) with two
+set-based statements.
+Runs on the sync (psycopg2) engine in a worker thread in both DB modes,
+since COPY FROM STDIN is a psycopg2 feature.
+"""
+import csv
+import io
+import json
+from typing import IO, Iterator, Tuple
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.money import to_minor
+from app.db.session import engine
+from app.schemas.expense import ExpenseCreate
+
+FORMATS = ("csv", "ndjson")
+CSV_FIELDS = ("title", "amount", "currency", "date", "description", "category_id")
+
+STAGING_DDL = """
+CREATE TEMP TABLE expense_import_staging (
+    row_no integer NOT NULL,
+    title varchar(255) NOT NULL,
+    amount_minor bigint NOT NULL,
+    currency varchar(3) NOT NULL,
+    date date NOT NULL,
+    description text,
+    category_id integer NOT NULL
+) ON COMMIT DROP
+"""
+
+MERGE_EXPENSES_SQL = """
+INSERT INTO expenses
+    (title, amount_minor, currency, date, description, category_id, user_id, is_deleted, created_at, updated_at)
+SELECT title, amount_minor, currency, date, description, category_id, %(user_id)s, false, now(), now()
+FROM expense_import_staging
+ORDER BY row_no
+"""
+
+MERGE_ROLLUPS_SQL = """
+INSERT INTO expense_rollups
+    (user_id, category_id, period_month, currency, total_minor, expense_count, min_minor, max_minor)
+SELECT %(user_id)s, category_id, date_trunc('month', date)::date, currency,
+       sum(amount_minor), count(*), min(amount_minor), max(amount_minor)
+FROM expense_import_staging
+GROUP BY category_id, date_trunc('month', date)::date, currency
+ON CONFLICT (user_id, category_id, period_month, currency) DO UPDATE SET
+    total_minor = expense_rollups.total_minor + excluded.total_minor,
+    expense_count = expense_rollups.expense_count + excluded.expense_count,
+    min_minor = least(expense_rollups.min_minor, excluded.min_minor),
+    max_minor = greatest(expense_rollups.max_minor, excluded.max_minor)
+"""
+
+
+def _iter_csv(text: IO[str]) -> Iterator[Tuple[int, object]]:
+    reader = csv.DictReader(text)
+    for row_no, row in enumerate(reader, start=1):
+        # Empty cells mean "not provided" for the optional fields
+        yield row_no, {k: v for k, v in row.items() if k in CSV_FIELDS and v != ""}
+
+
+def _iter_ndjson(text: IO[str]) -> Iterator[Tuple[int, object]]:
+    for row_no, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield row_no, json.loads(line)
+        except ValueError as e:
+            yield row_no, e
+
+
+class ImportReport:
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_no: int, errors) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row_no, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _copy_batch(cursor, batch) -> None:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row_no, exp in batch:
+        writer.writerow((row_no, exp.title, to_minor(exp.amount), exp.currency, exp.date.isoformat(),
+                         exp.description if exp.description is not None else r"\N",
+                         exp.category_id))
+    buf.seek(0)
+    cursor.copy_expert(
+        "COPY expense_import_staging (row_no, title, amount_minor, currency, date, description, category_id) "
+        "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        buf,
+    )
+
+
+def import_expenses(upload: IO[bytes], fmt: str, user_id: int) -> dict:
+    """
+    Import every valid row of `upload` for `user_id` in one transaction.
+    Invalid rows are skipped and reported; they never abort the import.
+    """
+    batch_size = settings.IMPORT_BATCH_SIZE
+    report = ImportReport(max_errors=settings.IMPORT_MAX_ERRORS)
+    text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    records = _iter_csv(text) if fmt == "csv" else _iter_ndjson(text)
+
+    owned_categories, foreign_categories = set(), set()
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(STAGING_DDL)
+
+        def flush(pending):
+            # ✅ One ownership query per batch, only for categories not seen yet
+            unknown = {exp.category_id for _, exp in pending} - owned_categories - foreign_categories
+            if unknown:
+                cursor.execute(
+                    "SELECT id FROM categories WHERE user_id = %s AND id = ANY(%s) AND NOT is_deleted",
+                    (user_id, list(unknown)),
+                )
+                owned = {r[0] for r in cursor.fetchall()}
+                owned_categories.update(owned)
+                foreign_categories.update(unknown - owned)
+
+            valid = []
+            for row_no, exp in pending:
+                if exp.category_id in owned_categories:
+                    valid.append((row_no, exp))
+                else:
+                    report.add_error(row_no, ["Category does not exist or does not belong to the user."])
+            if valid:
+                _copy_batch(cursor, valid)
+                report.inserted += len(valid)
+
+        pending = []
+        for row_no, record in records:
+            if isinstance(record, Exception):
+                report.add_error(row_no, [f"Invalid JSON: {record}"])
+                continue
+            try:
+                exp = ExpenseCreate.model_validate(record)
+            except ValidationError as e:
+                report.add_error(row_no, [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()])
+                continue
+            if exp.category_id is None:
+                report.add_error(row_no, ["category_id: Field required"])
+                continue
+            pending.append((row_no, exp))
+            if len(pending) >= batch_size:
+                flush(pending)
+                pending = []
+        if pending:
+            flush(pending)
+
+        if report.inserted:
+            cursor.execute(MERGE_EXPENSES_SQL, {"user_id": user_id})
+            cursor.execute(MERGE_ROLLUPS_SQL, {"user_id": user_id})
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+        text.detach()
+
+    return report.as_dict()
@@ -0,0 +1,171 @@
+# app/services/partition_service.py
+"""
+Monthly range partitions for `expenses` (by date) and `audit_logs`
+(by created_at, UTC month boundaries).
+
+Every partitioned table also has a DEFAULT partition, so a row for a month
+without its own partition is never rejected; creating that month's
+partition later moves such rows out of the default partition.
+
+Usage as a maintenance command (e.g. daily from cron):
+    python -m app.services.partition_service maintain [--months-ahead N]
+    python -m app.services.partition_service retention [--months N] [--mode detach|drop]
+"""
+import argparse
+import logging
+import re
+from datetime import date
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# table -> partition key column
+PARTITIONED_TABLES = {"expenses": "date", "audit_logs": "created_at"}
+
+# Serializes DDL between workers starting at the same time and cron runs
+_LOCK_KEY = 0x70617274  # "part"
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(month: date, n: int) -> date:
+    years, index = divmod(month.month - 1 + n, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def _bound(table: str, month: date) -> str:
+    # audit_logs is timestamptz: pin boundaries to UTC, not the session time zone
+    return f"{month.isoformat()} 00:00:00+00" if table == "audit_logs" else month.isoformat()
+
+
+def list_partitions(conn: Connection, table: str) -> Dict[date, str]:
+    """Monthly partitions currently attached to `table`, by month."""
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table"
+    ), {"table": table}).scalars()
+    pattern = re.compile(rf"^{re.escape(table)}_p(\d{{4}})_(\d{{2}})$")
+    partitions = {}
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def create_partition(conn: Connection, table: str, month: date) -> str:
+    """
+    Create and attach the partition for `month`. The table is built
+    detached, filled with any of its rows sitting in the DEFAULT partition,
+    then attached (ATTACH would fail while the default still held them).
+    """
+    column = PARTITIONED_TABLES[table]
+    name = partition_name(table, month)
+    lower, upper = _bound(table, month), _bound(table, add_months(month, 1))
+    conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    conn.execute(text(
+        f'WITH moved AS (DELETE FROM "{table}_default" '
+        f'WHERE "{column}" >= :lower AND "{column}" < :upper RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved'
+    ), {"lower": lower, "upper": upper})
+    conn.execute(text(
+        f"ALTER TABLE \"{table}\" ATTACH PARTITION \"{name}\" FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+    return name
+
+
+def ensure_partitions(conn: Connection, table: str, first: date, last: date) -> List[str]:
+    """Create every missing monthly partition from `first` through `last`."""
+    existing = list_partitions(conn, table)
+    created = []
+    month = month_start(first)
+    while month <= last:
+        if month not in existing:
+            created.append(create_partition(conn, table, month))
+        month = add_months(month, 1)
+    return created
+
+
+def maintain_partitions(engine, months_ahead: int = None, today: date = None, wait: bool = True) -> List[str]:
+    """
+    Make sure this month and the next `months_ahead` have partitions.
+    With wait=False, return without doing anything if another process
+    (a worker starting alongside, or the cron job) holds the lock.
+    """
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(today or date.today())
+    created = []
+    with engine.begin() as conn:
+        if wait:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+        elif not conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _LOCK_KEY}).scalar():
+            logger.info("Partition maintenance already running elsewhere, skipped")
+            return created
+        for table in PARTITIONED_TABLES:
+            created.extend(ensure_partitions(conn, table, current, add_months(current, months_ahead)))
+    for name in created:
+        logger.info(f"Created partition {name}")
+    return created
+
+
+def apply_audit_retention(engine, months: int = None, mode: str = None, today: date = None) -> List[str]:
+    """
+    Remove audit_logs partitions whose whole month is older than `months`
+    months. `detach` keeps the table around (for archiving) outside the
+    partitioned table; `drop` deletes it. Either is a catalog operation,
+    not a row-by-row DELETE.
+    """
+    months = settings.AUDIT_RETENTION_MONTHS if months is None else months
+    mode = mode or settings.AUDIT_RETENTION_MODE
+    if mode not in ("detach", "drop"):
+        raise ValueError(f"Unknown retention mode '{mode}', expected detach or drop")
+    cutoff = add_months(month_start(today or date.today()), -months)
+    removed = []
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+        for month, name in sorted(list_partitions(conn, "audit_logs").items()):
+            if month >= cutoff:
+                break
+            conn.execute(text(f'ALTER TABLE "audit_logs" DETACH PARTITION "{name}"'))
+            if mode == "drop":
+                conn.execute(text(f'DROP TABLE "{name}"'))
+            removed.append(name)
+    for name in removed:
+        logger.info(f"Audit retention: {'dropped' if mode == 'drop' else 'detached'} partition {name}")
+    return removed
+
+
+def main(argv=None) -> int:
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser(description="Maintain monthly table partitions.")
+    parser.add_argument("action", choices=["maintain", "retention"])
+    parser.add_argument("--months-ahead", type=int, default=None)
+    parser.add_argument("--months", type=int, default=None, help="Audit retention in months")
+    parser.add_argument("--mode", choices=["detach", "drop"], default=None)
+    args = parser.parse_args(argv)
+
+    if args.action == "maintain":
+        created = maintain_partitions(engine, months_ahead=args.months_ahead)
+        print(f"✅ {len(created)} partition(s) created: {', '.join(created) or '-'}")
+    else:
+        removed = apply_audit_retention(engine, months=args.months, mode=args.mode)
+        print(f"✅ {len(removed)} audit partition(s) removed: {', '.join(removed) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+# app/services/purge_service.py
+"""
+Permanent removal of soft-deleted expenses (and expired idempotency keys).
+
+Rows go in small batches, one short transaction each, with a pause in
+between, so the purge never holds long locks or floods WAL/replication.
+Runs periodically inside the app (see `purge_loop`) and as a command:
+    python -m app.services.purge_service [--days N]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Only one worker process purges at a time
+_LOCK_KEY = 0x70757267  # "purg"
+
+# The partial index ix_expenses_deleted_at (WHERE is_deleted) serves the
+# inner SELECT; SKIP LOCKED keeps the purge out of the way of live writes.
+PURGE_EXPENSES_SQL = text("""
+WITH doomed AS (
+    SELECT id, date FROM expenses
+    WHERE is_deleted AND deleted_at < :cutoff
+    ORDER BY deleted_at
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+)
+DELETE FROM expenses e USING doomed d
+WHERE e.id = d.id AND e.date = d.date
+""")
+
+PURGE_IDEMPOTENCY_SQL = text("""
+DELETE FROM idempotency_keys
+WHERE ctid = ANY(ARRAY(
+    SELECT ctid FROM idempotency_keys WHERE created_at < :cutoff LIMIT :batch_size
+))
+""")
+
+
+def purge_batch(engine, statement, cutoff: datetime, batch_size: int) -> int:
+    """Delete one batch; returns rows deleted, or -1 if another process holds the lock."""
+    with engine.begin() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _LOCK_KEY}).scalar():
+            return -1
+        return conn.execute(statement, {"cutoff": cutoff, "batch_size": batch_size}).rowcount
+
+
+def _jobs(now: datetime, retention_days: int):
+    return (
+        ("expenses", PURGE_EXPENSES_SQL, now - timedelta(days=retention_days)),
+        ("idempotency_keys", PURGE_IDEMPOTENCY_SQL, now - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)),
+    )
+
+
+def purge(engine, retention_days: int = None, batch_size: int = None, pause: float = None) -> dict:
+    """Blocking purge run, for the CLI."""
+    retention_days = settings.SOFT_DELETE_RETENTION_DAYS if retention_days is None else retention_days
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    pause = settings.PURGE_BATCH_PAUSE_MS / 1000 if pause is None else pause
+    totals = {}
+    for name, statement, cutoff in _jobs(datetime.now(timezone.utc), retention_days):
+        totals[name] = 0
+        while True:
+            deleted = purge_batch(engine, statement, cutoff, batch_size)
+            if deleted <= 0:
+                break
+            totals[name] += deleted
+            time.sleep(pause)
+    return totals
+
+
+async def purge_loop(engine) -> None:
+    """
+    Background task started in the lifespan: one purge pass every
+    PURGE_INTERVAL_SECONDS. Each batch runs in the threadpool; the pause
+    between batches is an asyncio sleep, so no thread is held idle.
+    """
+    pause = settings.PURGE_BATCH_PAUSE_MS / 1000
+    while True:
+        await asyncio.sleep(settings.PURGE_INTERVAL_SECONDS)
+        try:
+            for name, statement, cutoff in _jobs(datetime.now(timezone.utc), settings.SOFT_DELETE_RETENTION_DAYS):
+                total = 0
+                while True:
+                    deleted = await run_in_threadpool(
+                        purge_batch, engine, statement, cutoff, settings.PURGE_BATCH_SIZE
+                    )
+                    if deleted <= 0:
+                        break
+                    total += deleted
+                    await asyncio.sleep(pause)
+                if total:
+                    logger.info(f"Purged {total} rows from {name}")
+        except Exception as e:
+            logger.warning(f"Purge pass failed: {e}")
+
+
+def main(argv=None) -> int:
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser(description="Permanently delete soft-deleted rows past retention.")
+    parser.add_argument("--days", type=int, default=None, help="Retention in days")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    totals = purge(engine, retention_days=args.days, batch_size=args.batch_size)
+    for name, total in totals.items():
+        print(f"✅ {name}: {total} row(s) purged")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
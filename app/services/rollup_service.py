@@ -0,0 +1,236 @@
+# app/services/rollup_service.py
+"""
+Incremental maintenance of the expense_rollups table.
+
+Usage as a maintenance command:
+    python -m app.services.rollup_service verify [--user-id N]
+    python -m app.services.rollup_service rebuild [--user-id N]
+"""
+import argparse
+from datetime import date
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import and_, delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.expense import Expense
+from app.models.expense_rollup import ExpenseRollup
+
+
+class RollupEntry(NamedTuple):
+    user_id: int
+    category_id: Optional[int]
+    date: date
+    currency: str
+    amount_minor: int
+
+    @property
+    def bucket(self):
+        return (self.user_id, self.category_id, month_start(self.date), self.currency)
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def entry_for(expense) -> RollupEntry:
+    # Accepts an Expense or any row with the same attribute names
+    return RollupEntry(
+        expense.user_id, expense.category_id, expense.date, expense.currency, expense.amount_minor
+    )
+
+
+def _add(db: Session, entry: RollupEntry) -> None:
+    stmt = insert(ExpenseRollup).values(
+        user_id=entry.user_id,
+        category_id=entry.category_id,
+        period_month=month_start(entry.date),
+        currency=entry.currency,
+        total_minor=entry.amount_minor,
+        expense_count=1,
+        min_minor=entry.amount_minor,
+        max_minor=entry.amount_minor,
+    )
+    excluded = stmt.excluded
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[
+            ExpenseRollup.user_id, ExpenseRollup.category_id,
+            ExpenseRollup.period_month, ExpenseRollup.currency,
+        ],
+        set_={
+            "total_minor": ExpenseRollup.total_minor + excluded.total_minor,
+            "expense_count": ExpenseRollup.expense_count + 1,
+            "min_minor": func.least(ExpenseRollup.min_minor, excluded.min_minor),
+            "max_minor": func.greatest(ExpenseRollup.max_minor, excluded.max_minor),
+        },
+    ))
+
+
+def _remove(db: Session, entry: RollupEntry) -> None:
+    user_id, category_id, period_month, currency = entry.bucket
+    in_bucket = and_(
+        ExpenseRollup.user_id == user_id,
+        ExpenseRollup.category_id == category_id,
+        ExpenseRollup.period_month == period_month,
+        ExpenseRollup.currency == currency,
+    )
+    row = db.execute(
+        update(ExpenseRollup)
+        .where(in_bucket)
+        .values(
+            total_minor=ExpenseRollup.total_minor - entry.amount_minor,
+            expense_count=ExpenseRollup.expense_count - 1,
+        )
+        .returning(ExpenseRollup.expense_count, ExpenseRollup.min_minor, ExpenseRollup.max_minor)
+    ).first()
+    if row is None:
+        # Bucket missing (rollups out of sync): recompute it from raw rows
+        refresh_buckets(db, [entry.bucket])
+        return
+
+    count, min_minor, max_minor = row
+    if count <= 0:
+        db.execute(delete(ExpenseRollup).where(in_bucket))
+    elif entry.amount_minor <= min_minor or entry.amount_minor >= max_minor:
+        # Min/max can't be decremented: re-derive them for this one bucket
+        refresh_buckets(db, [entry.bucket])
+
+
+def apply_change(db: Session, old: Optional[RollupEntry], new: Optional[RollupEntry]) -> None:
+    """
+    Move an expense's contribution from `old` to `new` (either may be None
+    for create/delete). Must run inside the caller's transaction, after
+    the expense row change has been flushed.
+    """
+    if old == new:
+        return
+    if old is not None and old.category_id is not None:
+        _remove(db, old)
+    if new is not None and new.category_id is not None:
+        _add(db, new)
+
+
+def _aggregate_query(buckets=None, user_id: Optional[int] = None):
+    period_month = func.date_trunc("month", Expense.date).cast(ExpenseRollup.period_month.type)
+    query = (
+        select(
+            Expense.user_id,
+            Expense.category_id,
+            period_month.label("period_month"),
+            Expense.currency,
+            func.sum(Expense.amount_minor).label("total_minor"),
+            func.count().label("expense_count"),
+            func.min(Expense.amount_minor).label("min_minor"),
+            func.max(Expense.amount_minor).label("max_minor"),
+        )
+        .where(Expense.category_id.is_not(None), Expense.is_deleted.is_(False))
+        .group_by(Expense.user_id, Expense.category_id, period_month, Expense.currency)
+    )
+    if user_id is not None:
+        query = query.where(Expense.user_id == user_id)
+    if buckets is not None:
+        months = [b[2] for b in buckets]
+        last = max(months)
+        query = query.where(
+            tuple_(Expense.user_id, Expense.category_id, period_month, Expense.currency).in_(buckets),
+            # ✅ Plain bounds on the partition key so only the touched months are scanned
+            Expense.date >= min(months),
+            Expense.date < date(last.year + last.month // 12, last.month % 12 + 1, 1),
+        )
+    return query
+
+
+def refresh_buckets(db: Session, buckets: Iterable[tuple]) -> None:
+    """
+    Recompute the given (user_id, category_id, period_month, currency) buckets from
+    raw expense rows. Used for min/max repair and set-based writes.
+    """
+    buckets = sorted({b for b in buckets if b[1] is not None})
+    if not buckets:
+        return
+    db.execute(
+        delete(ExpenseRollup).where(
+            tuple_(
+                ExpenseRollup.user_id, ExpenseRollup.category_id,
+                ExpenseRollup.period_month, ExpenseRollup.currency,
+            ).in_(buckets)
+        )
+    )
+    aggregate = _aggregate_query(buckets=buckets)
+    db.execute(insert(ExpenseRollup).from_select(
+        [c.name for c in aggregate.selected_columns], aggregate
+    ))
+
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> None:
+    """
+    Throw away and recompute rollups (for one user or everyone).
+    """
+    stmt = delete(ExpenseRollup)
+    if user_id is not None:
+        stmt = stmt.where(ExpenseRollup.user_id == user_id)
+    db.execute(stmt)
+    aggregate = _aggregate_query(user_id=user_id)
+    db.execute(insert(ExpenseRollup).from_select(
+        [c.name for c in aggregate.selected_columns], aggregate
+    ))
+    db.commit()
+
+
+def verify_rollups(db: Session, user_id: Optional[int] = None):
+    """
+    Compare rollups against raw data (exactly: amounts are integers).
+    Returns a list of mismatching buckets.
+    """
+    actual = _aggregate_query(user_id=user_id).subquery()
+    stored_query = select(ExpenseRollup)
+    if user_id is not None:
+        stored_query = stored_query.where(ExpenseRollup.user_id == user_id)
+    stored = {
+        (r.user_id, r.category_id, r.period_month, r.currency): r
+        for r in db.execute(stored_query).scalars()
+    }
+
+    mismatches = []
+    for row in db.execute(select(actual)).mappings():
+        key = (row["user_id"], row["category_id"], row["period_month"], row["currency"])
+        rollup = stored.pop(key, None)
+        if (
+            rollup is None
+            or rollup.expense_count != row["expense_count"]
+            or rollup.total_minor != row["total_minor"]
+            or rollup.min_minor != row["min_minor"]
+            or rollup.max_minor != row["max_minor"]
+        ):
+            mismatches.append({"bucket": key, "expected": dict(row), "stored": rollup})
+    # Rollups with no raw rows left behind them
+    mismatches.extend({"bucket": key, "expected": None, "stored": r} for key, r in stored.items())
+    return mismatches
+
+
+def main(argv=None) -> int:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Verify or rebuild expense rollups.")
+    parser.add_argument("action", choices=["verify", "rebuild"])
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.action == "rebuild":
+            rebuild_rollups(db, user_id=args.user_id)
+            print("✅ Rollups rebuilt")
+            return 0
+        mismatches = verify_rollups(db, user_id=args.user_id)
+        for m in mismatches:
+            print(f"❌ {m['bucket']}: expected={m['expected']} stored={m['stored']}")
+        print(f"{'✅' if not mismatches else '⚠'} {len(mismatches)} mismatching bucket(s)")
+        return 1 if mismatches else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
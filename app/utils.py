@@ -1,11 +1,14 @@
 from passlib.context import CryptContext
-from datetime import datetime, timedelta
-from jose import jwt, JWTError
-from typing import Optional, Union
 from app.core.config import settings
+from app.core.token import create_access_token, decode_token  # noqa: F401 (re-exported)
 
-# ✅ Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# ✅ Password hashing context (request handlers use app.core.password_hasher)
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def get_password_hash(password: str) -> str:
     """
@@ -20,26 +23,3 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     plain_password = plain_password[:72]  # ensure compatibility
     return pwd_context.verify(plain_password, hashed_password)
-
-def create_access_token(subject: Union[str, int], expires_delta: Optional[timedelta] = None) -> str:
-    """
-    Generate a JWT access token.
-    `subject` is usually the user ID or username.
-    """
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    payload = {
-        "sub": str(subject),
-        "exp": expire
-    }
-    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-
-def decode_token(token: str) -> Optional[dict]:
-    """
-    Decode and validate a JWT token.
-    Returns payload if valid, None if expired/invalid.
-    """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
-    except JWTError:
-        return None
@@ -0,0 +1,164 @@
+"""
+DB_ASYNC=true switches the request path to the asyncpg engine: get_db
+yields AsyncSessions and run_db executes the sync crud functions through
+run_sync. The Postgres tests need TEST_DATABASE_URL.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("asyncpg")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.crud.expense import get_expense  # noqa: E402
+from app.db.session import POOL_OPTIONS, run_db  # noqa: E402
+from app.models import user  # noqa: E402,F401  (registers the "User" relationship target)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+WIRING = """
+import json
+from app import deps
+from app.db import session
+from app.db.pool_metrics import pool_stats
+print(json.dumps({
+    "get_db": deps.get_db.__name__,
+    "async_driver": session.async_engine.dialect.driver if session.async_engine else None,
+    "async_sessions": session.AsyncSessionLocal is not None,
+    "pools": sorted(pool_stats.pools),
+}))
+"""
+
+
+def _wiring(db_async: str) -> dict:
+    """Import the app in a fresh interpreter: the engine choice is made at import time."""
+    env = {**os.environ, "DB_ASYNC": db_async}
+    out = subprocess.run([sys.executable, "-c", WIRING], env=env, cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_db_async_wires_the_asyncpg_engine():
+    assert _wiring("true") == {
+        "get_db": "get_async_db", "async_driver": "asyncpg", "async_sessions": True,
+        "pools": ["async", "sync"],
+    }
+
+
+def test_default_is_the_sync_engine():
+    assert _wiring("false") == {
+        "get_db": "get_sync_db", "async_driver": None, "async_sessions": False, "pools": ["sync"],
+    }
+
+
+def _async_url(url: str) -> str:
+    return url.replace("+psycopg2", "+asyncpg", 1)
+
+
+@pytest.fixture
+def async_session_factory(pg_engine):
+    engine = create_async_engine(_async_url(pg_engine.url.render_as_string(hide_password=False)))
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def committed_expense(pg_engine):
+    """One user/category/expense committed so separate connections can see it; removed afterwards."""
+    with pg_engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, email, hashed_password, is_deleted, created_at, updated_at) "
+            "VALUES (900001, 'async@example.com', 'x', false, now(), now())"
+        ))
+        conn.execute(text(
+            "INSERT INTO categories (id, name, user_id, is_deleted, created_at, updated_at) "
+            "VALUES (900001, 'async-test', 900001, false, now(), now())"
+        ))
+        expense_id = conn.execute(text(
+            "INSERT INTO expenses (title, amount_minor, currency, date, category_id, user_id, "
+            "                      is_deleted, created_at, updated_at) "
+            "VALUES ('Lunch', 1230, 'USD', '2026-10-05', 900001, 900001, false, now(), now()) RETURNING id"
+        )).scalar_one()
+    yield expense_id
+    with pg_engine.begin() as conn:
+        conn.execute(text("DELETE FROM expenses WHERE user_id = 900001"))
+        conn.execute(text("DELETE FROM categories WHERE user_id = 900001"))
+        conn.execute(text("DELETE FROM users WHERE id = 900001"))
+
+
+def test_run_db_runs_crud_on_an_async_session(async_session_factory, committed_expense):
+    async def load():
+        async with async_session_factory() as db:
+            assert isinstance(db, AsyncSession)
+            expense = await run_db(db, get_expense, committed_expense, 900001)
+            return expense.title, expense.category.name  # category eager-loaded inside run_sync
+
+    assert asyncio.run(load()) == ("Lunch", "async-test")
+
+
+async def _load_test(app, path: str, clients: int, requests_per_client: int) -> float:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def run_client():
+            for _ in range(requests_per_client):
+                response = await client.get(path)
+                assert response.status_code == 200, response.text
+
+        await run_client()  # warm up
+        started = time.perf_counter()
+        await asyncio.gather(*(run_client() for _ in range(clients)))
+        return clients * requests_per_client / (time.perf_counter() - started)
+
+
+@pytest.mark.bench
+def test_bench_sync_vs_async_engine_under_500_clients(pg_engine, committed_expense):
+    pytest.importorskip("httpx")
+    from fastapi import FastAPI
+
+    from app.deps import get_current_user, get_db
+    from app.routes import expenses as expense_routes
+    from app.schemas.user import Principal
+
+    url = pg_engine.url.render_as_string(hide_password=False)
+    sync_engine = create_engine(url, **POOL_OPTIONS)
+    async_engine = create_async_engine(_async_url(url), **POOL_OPTIONS)
+    sync_sessions = sessionmaker(bind=sync_engine, autoflush=False)
+    async_sessions = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    def sync_db():
+        db = sync_sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def async_db():
+        async with async_sessions() as db:
+            yield db
+
+    results = {}
+    for name, dependency in (("sync (psycopg2 + threadpool)", sync_db), ("async (asyncpg)", async_db)):
+        app = FastAPI()
+        app.include_router(expense_routes.router)
+        app.dependency_overrides[get_db] = dependency
+        app.dependency_overrides[get_current_user] = lambda: Principal(id=900001, email="async@example.com")
+        results[name] = asyncio.run(_load_test(app, f"/expenses/{committed_expense}", clients=500,
+                                               requests_per_client=10))
+        print(f"\n{name:>28}: {results[name]:,.0f} req/s at 500 concurrent clients")
+
+    sync_engine.dispose()
+    asyncio.run(async_engine.dispose())
+    assert all(rps > 0 for rps in results.values())
@@ -0,0 +1,85 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("prometheus_client")
+pytest.importorskip("psycopg2")
+
+from app.services.audit_service import AuditWriter  # noqa: E402
+
+
+def _event(n: int) -> dict:
+    return {
+        "user_id": 1, "action": f"test.{n}", "target_type": "expense", "target_id": n,
+        "data": {}, "created_at": datetime(2026, 10, 1, tzinfo=timezone.utc),
+    }
+
+
+def _writer(spill_path, written: list, delay: float = 0.0) -> AuditWriter:
+    writer = AuditWriter(max_size=10, batch_size=2, flush_interval=1, overflow="spill",
+                         spill_path=str(spill_path), drain_timeout=1)
+
+    async def record(events):
+        await asyncio.sleep(delay)
+        written.extend(e["target_id"] for e in events)
+
+    writer._write = record
+    return writer
+
+
+def test_replay_writes_spilled_events_and_removes_the_files(tmp_path):
+    written = []
+    writer = _writer(tmp_path / "spill.ndjson", written)
+    writer._spill([_event(n) for n in range(5)])
+
+    asyncio.run(writer._replay_spill())
+
+    assert written == [0, 1, 2, 3, 4]
+    assert not os.path.exists(writer.spill_path)
+    assert not os.path.exists(f"{writer.spill_path}.replay")
+
+
+def test_leftover_replay_file_is_replayed_before_the_spill_file(tmp_path):
+    written = []
+    writer = _writer(tmp_path / "spill.ndjson", written)
+    writer._spill([_event(1)])
+    os.replace(writer.spill_path, f"{writer.spill_path}.replay")  # crash mid-replay
+    writer._spill([_event(2)])
+
+    asyncio.run(writer._replay_spill())
+
+    assert written == [1, 2]
+    assert not os.path.exists(f"{writer.spill_path}.replay")
+
+
+def test_concurrent_replays_write_each_event_once(tmp_path):
+    written = []
+    spill_path = tmp_path / "spill.ndjson"
+    first, second = _writer(spill_path, written, delay=0.05), _writer(spill_path, written, delay=0.05)
+    first._spill([_event(n) for n in range(4)])
+
+    async def both():
+        await asyncio.gather(first._replay_spill(), second._replay_spill())
+
+    asyncio.run(both())
+
+    assert sorted(written) == [0, 1, 2, 3]
+
+
+def test_replay_tolerates_the_replay_file_vanishing(tmp_path):
+    written = []
+    writer = _writer(tmp_path / "spill.ndjson", written)
+    writer._spill([_event(1)])
+
+    async def remove_then_record(events):
+        os.remove(f"{writer.spill_path}.replay")
+        written.extend(e["target_id"] for e in events)
+
+    writer._write = remove_then_record
+    asyncio.run(writer._replay_spill())  # must not raise FileNotFoundError
+
+    assert written == [1]
+    asyncio.run(writer._replay_spill())  # nothing left: a no-op
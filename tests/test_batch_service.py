@@ -0,0 +1,123 @@
+"""
+apply_batch against Postgres (needs TEST_DATABASE_URL): idempotent
+replays, per-item rejections and all-or-nothing failure.
+"""
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import text  # noqa: E402
+
+from app.models import user  # noqa: E402,F401  (registers the "User" relationship target)
+from app.schemas.expense import BatchRequest  # noqa: E402
+from app.services import rollup_service  # noqa: E402
+from app.services.batch_service import apply_batch  # noqa: E402
+
+USER, OTHER_USER, CATEGORY, OTHER_CATEGORY = 1, 2, 10, 20
+
+
+@pytest.fixture
+def db(pg_session):
+    for user_id, category_id in ((USER, CATEGORY), (OTHER_USER, OTHER_CATEGORY)):
+        pg_session.execute(text(
+            "INSERT INTO users (id, email, hashed_password, is_deleted, created_at, updated_at) "
+            "VALUES (:id, 'user' || :id || '@example.com', 'x', false, now(), now())"
+        ), {"id": user_id})
+        pg_session.execute(text(
+            "INSERT INTO categories (id, name, user_id, is_deleted, created_at, updated_at) "
+            "VALUES (:cid, 'cat-' || :cid, :id, false, now(), now())"
+        ), {"id": user_id, "cid": category_id})
+    pg_session.commit()
+    return pg_session
+
+
+def _ops(*operations) -> list:
+    return BatchRequest.model_validate({"operations": list(operations)}).operations
+
+
+def _create(key: str, title: str = "Lunch", category_id: int = CATEGORY) -> dict:
+    return {"op": "create", "idempotency_key": key,
+            "data": {"title": title, "amount": "12.30", "date": "2026-10-05", "category_id": category_id}}
+
+
+def _live_titles(db, user_id: int = USER) -> list:
+    return sorted(db.execute(text(
+        "SELECT title FROM expenses WHERE user_id = :id AND NOT is_deleted"
+    ), {"id": user_id}).scalars())
+
+
+def _rollup_total(db) -> int:
+    return db.execute(text(
+        "SELECT coalesce(sum(total_minor), 0) FROM expense_rollups WHERE user_id = :id"
+    ), {"id": USER}).scalar_one()
+
+
+def test_replayed_batch_returns_stored_results_without_writing_again(db):
+    operations = _ops(_create("a", "Lunch"), _create("b", "Taxi"))
+
+    first = apply_batch(db, USER, operations)
+    second = apply_batch(db, USER, operations)
+
+    assert [r["status"] for r in first] == [201, 201]
+    assert [r["replayed"] for r in second] == [True, True]
+    assert [r["id"] for r in second] == [r["id"] for r in first]
+    assert [r["data"] for r in second] == [r["data"] for r in first]
+    assert _live_titles(db) == ["Lunch", "Taxi"]
+    assert _rollup_total(db) == 2 * 1230
+
+
+def test_keys_are_scoped_per_user(db):
+    apply_batch(db, USER, _ops(_create("a")))
+
+    other = apply_batch(db, OTHER_USER, _ops(_create("a", "Dinner", OTHER_CATEGORY)))
+
+    assert (other[0]["status"], other[0]["replayed"]) == (201, False)
+    assert _live_titles(db, OTHER_USER) == ["Dinner"]
+
+
+def test_duplicate_keys_and_targets_are_rejected_per_item(db):
+    (created,) = apply_batch(db, USER, _ops(_create("seed")))
+    expense_id = created["id"]
+
+    results = apply_batch(db, USER, _ops(
+        _create("dup", "First"),
+        _create("dup", "Second"),
+        {"op": "update", "idempotency_key": "u1", "id": expense_id, "data": {"title": "Renamed"}},
+        {"op": "delete", "idempotency_key": "d1", "id": expense_id},
+        {"op": "delete", "idempotency_key": "d2", "id": 999_999},
+        _create("foreign", category_id=OTHER_CATEGORY),
+    ))
+
+    assert [r["status"] for r in results] == [201, 409, 200, 409, 404, 400]
+    assert results[1]["detail"] == "Duplicate idempotency_key in this batch."
+    assert results[3]["detail"] == "Expense targeted more than once in this batch."
+    assert _live_titles(db) == ["First", "Renamed"]
+
+
+def test_failure_mid_batch_rolls_everything_back(db, monkeypatch):
+    (created,) = apply_batch(db, USER, _ops(_create("seed", "Seed")))
+
+    def fail(db, buckets):
+        raise RuntimeError("rollup refresh failed")
+
+    monkeypatch.setattr(rollup_service, "refresh_buckets", fail)
+    operations = _ops(
+        _create("a", "Lunch"),
+        {"op": "update", "idempotency_key": "u1", "id": created["id"], "data": {"title": "Renamed"}},
+    )
+    with pytest.raises(RuntimeError):
+        apply_batch(db, USER, operations)
+    db.rollback()  # what closing the request's session does
+
+    assert _live_titles(db) == ["Seed"]
+    assert _rollup_total(db) == 1230
+    assert db.execute(text(
+        "SELECT key FROM idempotency_keys WHERE user_id = :id ORDER BY key"
+    ), {"id": USER}).scalars().all() == ["seed"]
+
+    # The keys were released with the transaction, so a retry runs for real
+    monkeypatch.undo()
+    retry = apply_batch(db, USER, operations)
+    assert [(r["status"], r["replayed"]) for r in retry] == [(201, False), (200, False)]
+    assert _live_titles(db) == ["Lunch", "Renamed"]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("redis")
+
+from app.core import cache_redis as cache_redis_module  # noqa: E402
+from app.core.cache_redis import CacheRedis  # noqa: E402
+from app.core.rate_limit_backends import CircuitBreaker  # noqa: E402
+
+
+@pytest.fixture
+def cache(monkeypatch) -> CacheRedis:
+    monkeypatch.setattr(cache_redis_module.redis_client, "client", object())
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    return CacheRedis(breaker, timeout=5)
+
+
+async def _ok():
+    return "value"
+
+
+async def _fail():
+    raise ConnectionError("down")
+
+
+def test_failure_opens_and_success_closes_the_breaker(cache):
+    with pytest.raises(ConnectionError):
+        asyncio.run(cache.call(_fail()))
+    assert cache.breaker.state == CircuitBreaker.OPEN
+
+    assert cache.client() is not None  # reset_timeout=0: half-open trial
+    assert asyncio.run(cache.call(_ok())) == "value"
+    assert cache.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_half_open_trial_releases_the_breaker(cache):
+    with pytest.raises(ConnectionError):
+        asyncio.run(cache.call(_fail()))
+
+    async def cancel_trial():
+        assert cache.client() is not None
+        assert cache.breaker.state == CircuitBreaker.HALF_OPEN
+        task = asyncio.create_task(cache.call(asyncio.Event().wait()))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+
+    # The next caller gets the trial instead of the cache being bypassed forever
+    assert cache.client() is not None
+    assert asyncio.run(cache.call(_ok())) == "value"
+    assert cache.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_timeout_counts_as_a_failure(cache):
+    cache.timeout = 0.01
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(cache.call(asyncio.sleep(1)))
+
+    assert cache.breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,90 @@
+"""
+Category listings are scoped to the caller, and the keyset pager costs the
+same at any depth. Needs Postgres: set TEST_DATABASE_URL.
+"""
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import text  # noqa: E402
+
+from app.core.pagination import encode_cursor  # noqa: E402
+from app.crud.category import list_categories, list_categories_page  # noqa: E402
+from app.models import expense, user  # noqa: E402,F401  (relationship targets)
+
+
+def _add_user(session, user_id: int, categories: int) -> None:
+    session.execute(text(
+        "INSERT INTO users (id, email, hashed_password, is_deleted, created_at, updated_at) "
+        "VALUES (:id, 'user' || :id || '@example.com', 'x', false, now(), now())"
+    ), {"id": user_id})
+    session.execute(text(
+        "INSERT INTO categories (name, user_id, is_deleted, created_at, updated_at) "
+        "SELECT 'cat-' || :id || '-' || c, :id, false, now(), now() FROM generate_series(1, :n) c"
+    ), {"id": user_id, "n": categories})
+
+
+def _walk(session, user_id: int, limit: int) -> list:
+    names, cursor = [], None
+    while True:
+        page, cursor = list_categories_page(session, user_id=user_id, limit=limit, cursor=cursor)
+        names += [c.name for c in page]
+        if cursor is None:
+            return names
+
+
+def test_pages_only_return_the_callers_categories(pg_session):
+    _add_user(pg_session, 1, categories=7)
+    _add_user(pg_session, 2, categories=5)
+
+    mine = _walk(pg_session, user_id=1, limit=3)
+
+    assert mine == [f"cat-1-{c}" for c in range(1, 8)]
+    assert _walk(pg_session, user_id=2, limit=3) == [f"cat-2-{c}" for c in range(1, 6)]
+    assert [c.name for c in list_categories(pg_session, user_id=2)] == [f"cat-2-{c}" for c in range(1, 6)]
+
+
+def test_another_users_cursor_does_not_leak_rows(pg_session):
+    _add_user(pg_session, 1, categories=4)
+    _add_user(pg_session, 2, categories=4)
+    _, cursor = list_categories_page(pg_session, user_id=1, limit=2)
+
+    page, next_cursor = list_categories_page(pg_session, user_id=2, limit=10, cursor=cursor)
+
+    assert {c.user_id for c in page} == {2}
+    assert next_cursor is None
+
+
+def _per_call_ms(session, fn, rounds: int = 50) -> float:
+    fn()  # warm up
+    started = time.perf_counter()
+    for _ in range(rounds):
+        session.expunge_all()
+        fn()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+@pytest.mark.bench
+def test_bench_keyset_page_cost_is_flat_in_depth(pg_session):
+    limit, total = 100, 50_000
+    _add_user(pg_session, 1, categories=total)
+    _add_user(pg_session, 2, categories=total)
+    pg_session.execute(text("ANALYZE categories"))
+    ids = [row.id for row in pg_session.execute(text(
+        "SELECT id FROM categories WHERE user_id = 1 ORDER BY id"
+    ))]
+
+    keyset, offset = {}, {}
+    for depth in (0, 100, 490):
+        cursor = encode_cursor([ids[depth * limit - 1]]) if depth else None
+        keyset[depth] = _per_call_ms(pg_session, lambda: list_categories_page(
+            pg_session, user_id=1, limit=limit, cursor=cursor))
+        offset[depth] = _per_call_ms(pg_session, lambda: list_categories(
+            pg_session, user_id=1, skip=depth * limit, limit=limit))
+        print(f"\npage {depth:>3}: keyset {keyset[depth]:.2f} ms, offset {offset[depth]:.2f} ms")
+
+    assert keyset[490] < 1.5 * keyset[0] + 0.5
+    assert offset[490] > 2 * keyset[490]
@@ -0,0 +1,142 @@
+"""
+Statement counts of the expense write endpoints, measured with the
+per-request counters of app.core.request_metrics (the same numbers as the
+Server-Timing db-count). Each write is a single INSERT/UPDATE ...
+RETURNING against expenses with ownership checked in SQL; the rest are
+expense_rollups maintenance. Needs Postgres: set TEST_DATABASE_URL.
+"""
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("sqlalchemy")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+
+from app.core.request_metrics import RequestMetricsMiddleware  # noqa: E402
+from app.db import session as db_session  # noqa: E402
+from app.deps import get_current_user, get_db  # noqa: E402
+from app.models import user  # noqa: E402,F401  (registers the "User" relationship target)
+from app.routes import expenses as expense_routes  # noqa: E402
+from app.schemas.user import Principal  # noqa: E402
+from app.services.audit_service import audit_writer  # noqa: E402
+
+# The test session's commits are savepoints; production transactions emit no statements
+TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryCounter:
+    """Keeps the RequestStats of every request RequestMetricsMiddleware finishes."""
+
+    def __init__(self, monkeypatch):
+        self.requests = []
+        finish = RequestMetricsMiddleware.finish
+
+        def record(middleware, scope, stats, status_code, elapsed):
+            self.requests.append(stats)
+            finish(middleware, scope, stats, status_code, elapsed)
+
+        monkeypatch.setattr(RequestMetricsMiddleware, "finish", record)
+
+    def last(self) -> list:
+        """Statements of the last request, one entry per execution."""
+        return [
+            sql
+            for sql, (executions, _, _) in self.requests[-1].statements.items()
+            if not sql.startswith(TRANSACTION_CONTROL)
+            for _ in range(executions)
+        ]
+
+
+def _split(statements):
+    rollups = [s for s in statements if "expense_rollups" in s]
+    return [s for s in statements if s not in rollups], rollups
+
+
+@pytest.fixture
+def api(pg_engine, pg_session, monkeypatch):
+    if not event.contains(pg_engine, "after_cursor_execute", db_session._after_cursor_execute):
+        db_session.instrument_engine(pg_engine)
+    pg_session.execute(text(
+        "INSERT INTO users (id, email, hashed_password, is_deleted, created_at, updated_at) VALUES "
+        "(1, 'a@example.com', 'x', false, now(), now()), (2, 'b@example.com', 'x', false, now(), now())"
+    ))
+    pg_session.execute(text(
+        "INSERT INTO categories (id, name, user_id, is_deleted, created_at, updated_at) VALUES "
+        "(1, 'Food', 1, false, now(), now()), (2, 'Theirs', 2, false, now(), now())"
+    ))
+
+    async def discard(events):  # a started writer queues events instead of writing per request
+        pass
+
+    monkeypatch.setattr(audit_writer, "_write", discard)
+    counter = QueryCounter(monkeypatch)
+
+    app = FastAPI()
+    app.include_router(expense_routes.router)
+    app.add_middleware(RequestMetricsMiddleware)
+    app.dependency_overrides[get_db] = lambda: pg_session
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=1, email="a@example.com")
+    return TestClient(app), counter
+
+
+EXPENSE = {"title": "Lunch", "amount": "12.30", "date": "2026-10-05", "category_id": 1}
+
+
+def test_create_is_one_insert_plus_the_rollup_upsert(api):
+    client, counter = api
+
+    response = client.post("/expenses/", json=EXPENSE)
+
+    assert response.status_code == 201, response.text
+    expense, rollups = _split(counter.last())
+    assert len(expense) == 1 and "INSERT INTO expenses" in expense[0]
+    assert len(rollups) == 1
+    assert f'db-count;desc="statements";dur={counter.requests[-1].db_count}' in response.headers["Server-Timing"]
+
+
+def test_create_with_a_foreign_category_is_one_statement(api):
+    client, counter = api
+
+    response = client.post("/expenses/", json={**EXPENSE, "category_id": 2})
+
+    assert response.status_code == 400
+    assert len(counter.last()) == 1
+
+
+def test_update_is_one_update_plus_rollup_maintenance(api):
+    client, counter = api
+    expense_id = client.post("/expenses/", json=EXPENSE).json()["id"]
+
+    response = client.put(f"/expenses/{expense_id}", json={"amount": "15.00"})
+
+    assert response.status_code == 200, response.text
+    expense, rollups = _split(counter.last())
+    assert len(expense) == 1 and "UPDATE expenses" in expense[0]
+    # Only expense in its bucket: decrement, drop the emptied bucket, upsert the new amount
+    assert len(rollups) == 3
+
+
+def test_update_of_someone_elses_expense_is_one_statement(api):
+    client, counter = api
+    expense_id = client.post("/expenses/", json=EXPENSE).json()["id"]
+    client.app.dependency_overrides[get_current_user] = lambda: Principal(id=2, email="b@example.com")
+
+    response = client.put(f"/expenses/{expense_id}", json={"amount": "15.00"})
+
+    assert response.status_code == 404
+    assert len(counter.last()) == 1
+
+
+def test_delete_is_one_update_plus_rollup_maintenance(api):
+    client, counter = api
+    expense_id = client.post("/expenses/", json=EXPENSE).json()["id"]
+
+    response = client.delete(f"/expenses/{expense_id}")
+
+    assert response.status_code == 204
+    expense, rollups = _split(counter.last())
+    assert len(expense) == 1 and "UPDATE expenses" in expense[0]
+    assert len(rollups) == 2
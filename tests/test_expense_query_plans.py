@@ -0,0 +1,108 @@
+"""
+The hot expense queries must be answered from the composite partial
+indexes (alembic revisions 0002/0006), never by scanning a partition.
+
+The tables are seeded with 50 users x 400 expenses and analyzed, so the
+planner decides on realistic statistics. Needs Postgres: set
+TEST_DATABASE_URL.
+"""
+from datetime import date
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import event, text  # noqa: E402
+
+from app.core.pagination import encode_cursor  # noqa: E402
+from app.crud import expense as crud_expense  # noqa: E402
+from app.models import user  # noqa: E402,F401  (registers the "User" relationship target)
+
+USER_DATE = "ix_expenses_user_id_date_live"
+USER_CATEGORY_DATE = "ix_expenses_user_id_category_id_date_live"
+USERS, EXPENSES_PER_USER, CATEGORIES_PER_USER = 50, 400, 8
+
+
+@pytest.fixture
+def seeded(pg_session):
+    pg_session.execute(text(
+        "INSERT INTO users (id, email, hashed_password, is_deleted, created_at, updated_at) "
+        "SELECT u, 'user' || u || '@example.com', 'x', false, now(), now() "
+        "FROM generate_series(1, :users) u"
+    ), {"users": USERS})
+    pg_session.execute(text(
+        "INSERT INTO categories (id, name, user_id, is_deleted, created_at, updated_at) "
+        "SELECT (u - 1) * :per_user + c, 'cat-' || u || '-' || c, u, false, now(), now() "
+        "FROM generate_series(1, :users) u, generate_series(1, :per_user) c"
+    ), {"users": USERS, "per_user": CATEGORIES_PER_USER})
+    pg_session.execute(text(
+        "INSERT INTO expenses (title, amount_minor, currency, date, category_id, user_id, "
+        "                      is_deleted, created_at, updated_at) "
+        "SELECT 'e', 100 + n, 'USD', date '2026-09-01' + (n % 150), "
+        "       (u - 1) * :per_user + 1 + n % :per_user, u, n % 20 = 0, now(), now() "
+        "FROM generate_series(1, :users) u, generate_series(1, :rows) n"
+    ), {"users": USERS, "rows": EXPENSES_PER_USER, "per_user": CATEGORIES_PER_USER})
+    pg_session.execute(text("ANALYZE users, categories, expenses"))
+    return pg_session
+
+
+def _plans(session, fn, *args, **kwargs) -> list:
+    """Run a crud function, then EXPLAIN every statement it sent, with the same parameters."""
+    conn = session.connection()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", record)
+    try:
+        fn(session, *args, **kwargs)
+    finally:
+        event.remove(conn, "before_cursor_execute", record)
+
+    cursor = conn.connection.dbapi_connection.cursor()
+    plans = []
+    for statement, parameters in statements:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plans.append(cursor.fetchone()[0][0]["Plan"])
+    return plans
+
+
+def _nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child)
+
+
+def _with_partitions(session, index_names) -> set:
+    """The partitioned indexes plus the per-partition indexes attached to them."""
+    children = session.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = ANY(:names)"
+    ), {"names": list(index_names)}).scalars()
+    return {*index_names, *children}
+
+
+# Both composites lead with user_id, so either serves a per-user query;
+# a category filter must use the one that includes category_id.
+@pytest.mark.parametrize("fn, kwargs, indexes", [
+    (crud_expense.list_expenses, {}, {USER_DATE, USER_CATEGORY_DATE}),
+    (crud_expense.list_expenses, {"start_date": date(2026, 10, 1), "end_date": date(2026, 10, 31)},
+     {USER_DATE, USER_CATEGORY_DATE}),
+    (crud_expense.list_expenses_page, {"cursor": encode_cursor(["2026-10-15", 42])},
+     {USER_DATE, USER_CATEGORY_DATE}),
+    (crud_expense.list_expenses, {"category_id": 50, "start_date": date(2026, 10, 1)},
+     {USER_CATEGORY_DATE}),
+])
+def test_hot_expense_queries_use_the_composite_indexes(seeded, fn, kwargs, indexes):
+    plans = _plans(seeded, fn, user_id=7, **kwargs)
+
+    assert plans
+    nodes = [node for plan in plans for node in _nodes(plan)]
+    scanned = [n for n in nodes if n.get("Relation Name", "").startswith("expenses")]
+    assert scanned
+    assert not [n for n in scanned if n["Node Type"] == "Seq Scan"], scanned
+    used = {n["Index Name"] for n in nodes if n.get("Index Name", "").startswith(("expenses", "ix_expenses"))}
+    assert used and used <= _with_partitions(seeded, indexes), used
@@ -0,0 +1,77 @@
+import io
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sqlalchemy")
+
+from app.services import fx_service  # noqa: E402
+
+DUPLICATED_CSV = """date,base,quote,rate
+2026-10-01,USD,EUR,0.90
+2026-10-02,USD,EUR,0.91
+2026-10-01,usd,eur,0.92
+"""
+
+
+class RecordingEngine:
+    def __init__(self):
+        self.batches = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement, rows):
+        self.batches.append(list(rows))
+
+
+def test_parse_rates_keeps_last_rate_of_duplicated_day():
+    rows = fx_service.parse_rates(io.StringIO(DUPLICATED_CSV))
+
+    assert len(rows) == 2
+    by_day = {r["date"]: r["rate"] for r in rows}
+    assert by_day == {date(2026, 10, 1): Decimal("0.92"), date(2026, 10, 2): Decimal("0.91")}
+
+
+def test_store_rates_never_upserts_the_same_key_twice_in_one_statement():
+    engine = RecordingEngine()
+
+    loaded = fx_service.store_rates(engine, fx_service.parse_rates(io.StringIO(DUPLICATED_CSV)))
+
+    assert loaded == 2
+    for batch in engine.batches:
+        keys = [(r["base"], r["quote"], r["date"]) for r in batch]
+        assert len(keys) == len(set(keys))
+
+
+@pytest.mark.parametrize("row", ["2026-10-02,USD,EUR", "2026-10-02,USD,EUR,", "2026-10-02,USD"])
+def test_parse_rates_rejects_rows_with_missing_fields(row):
+    text = "date,base,quote,rate\n2026-10-01,USD,EUR,0.90\n" + row + "\n"
+
+    with pytest.raises(ValueError, match="row 2"):
+        fx_service.parse_rates(io.StringIO(text))
+
+
+def test_convert_matches_per_row_lookup():
+    index = fx_service.FxRateIndex(ttl=float("inf"))
+    index.build([("USD", "EUR", 10, 0.90), ("USD", "EUR", 20, 0.80), ("USD", "GBP", 5, 0.75)])
+    days = np.array([10, 12, 19, 20, 25], dtype=np.int64)
+    amounts = np.array([100, 250, 999, 1, 12345], dtype=np.int64)
+
+    # EUR -> GBP has no quote of its own: inverse of USD->EUR, then USD->GBP
+    converted = index.convert(amounts, days, "EUR", "GBP")
+
+    expected = [round(a / (0.90 if d < 20 else 0.80) * 0.75) for a, d in zip(amounts, days)]
+    assert converted.tolist() == expected
+
+
+def test_convert_raises_for_dates_before_the_first_rate():
+    index = fx_service.FxRateIndex(ttl=float("inf"))
+    index.build([("USD", "EUR", 10, 0.90)])
+
+    with pytest.raises(fx_service.MissingRateError):
+        index.convert(np.array([100]), np.array([9]), "USD", "EUR")
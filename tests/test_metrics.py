@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("prometheus_client")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.request_metrics import RequestMetricsMiddleware  # noqa: E402
+from app.deps import get_current_user  # noqa: E402
+from app.routes import metrics  # noqa: E402
+from app.schemas.user import Principal  # noqa: E402
+
+ADMIN = Principal(id=1, email="admin@example.com")
+USER = Principal(id=2, email="user@example.com")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [ADMIN.email])
+    app = FastAPI()
+    app.include_router(metrics.router)
+    return app, TestClient(app)
+
+
+@pytest.mark.parametrize("path", ["/metrics/db-pool", "/metrics/caches"])
+def test_anonymous_callers_are_rejected(client, path):
+    _, http = client
+
+    assert http.get(path).status_code == 401
+
+
+@pytest.mark.parametrize("path", ["/metrics/db-pool", "/metrics/caches"])
+def test_non_admins_are_forbidden(client, path):
+    app, http = client
+    app.dependency_overrides[get_current_user] = lambda: USER
+
+    response = http.get(path)
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Admin privileges required"}
+
+
+def test_admins_get_the_snapshots(client):
+    app, http = client
+    app.dependency_overrides[get_current_user] = lambda: ADMIN
+
+    pools, caches = http.get("/metrics/db-pool"), http.get("/metrics/caches")
+
+    assert pools.status_code == 200
+    assert caches.status_code == 200
+    assert set(caches.json()) == {"principal_cache", "response_cache"}
+
+
+def test_prometheus_scrape_stays_open(client):
+    _, http = client
+
+    response = http.get("/metrics")
+
+    assert response.status_code == 200
+    assert "http_requests_in_flight" in response.text
+
+
+async def _asgi_calls_per_request_us(app, scope: dict, calls: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(1_000):  # warm up
+        await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(calls):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+@pytest.mark.bench
+def test_bench_request_metrics_overhead_per_request():
+    """RequestMetricsMiddleware around a bare ASGI endpoint, against the endpoint alone."""
+    class Route:
+        path = "/items/{item_id}"
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    scope = {"type": "http", "method": "GET", "path": "/items/1", "headers": [], "route": Route()}
+    calls = 50_000
+
+    async def measure():
+        bare = min([await _asgi_calls_per_request_us(endpoint, scope, calls) for _ in range(3)])
+        wrapped = min([
+            await _asgi_calls_per_request_us(RequestMetricsMiddleware(endpoint), scope, calls)
+            for _ in range(3)
+        ])
+        return bare, wrapped
+
+    bare, wrapped = asyncio.run(measure())
+    print(f"\nbare endpoint {bare:.2f} us, with RequestMetricsMiddleware {wrapped:.2f} us: "
+          f"{wrapped - bare:.2f} us per request")
+
+    assert wrapped - bare < 20
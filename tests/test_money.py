@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from app.core.money import amount_expr, from_minor, to_minor  # noqa: E402
+
+LARGEST = Decimal("999999999999999.99")  # Money: max_digits=17, decimal_places=2
+
+
+@pytest.mark.parametrize("amount, minor", [
+    (Decimal("12.30"), 1230),
+    ("0.01", 1),
+    (0, 0),
+    (19.99, 1999),  # floats go through str(), not their binary value
+    (0.1 + 0.2, 30),
+    (Decimal("-12.30"), -1230),
+    (-0.01, -1),
+    (LARGEST, 99999999999999999),
+    (-LARGEST, -99999999999999999),
+    (10 ** 15, 10 ** 17),
+])
+def test_to_minor(amount, minor):
+    assert to_minor(amount) == minor
+    assert isinstance(to_minor(amount), int)
+
+
+@pytest.mark.parametrize("amount, minor", [
+    ("0.125", 12),  # ties go to the even cent
+    ("0.135", 14),
+    ("2.675", 268),
+    ("1.005", 100),
+    ("-0.125", -12),
+    ("-0.135", -14),
+    ("-1.005", -100),
+    ("0.1251", 13),  # not a tie
+    ("-0.1249", -12),
+])
+def test_to_minor_rounds_half_to_even(amount, minor):
+    assert to_minor(Decimal(amount)) == minor
+
+
+@pytest.mark.parametrize("minor, amount", [
+    (1230, Decimal("12.30")),
+    (1, Decimal("0.01")),
+    (0, Decimal("0.00")),
+    (-1, Decimal("-0.01")),
+    (-1230, Decimal("-12.30")),
+    (99999999999999999, LARGEST),
+])
+def test_from_minor(minor, amount):
+    result = from_minor(minor)
+    assert result == amount
+    assert result.as_tuple().exponent == -2  # always two places, "12.30" not "12.3"
+
+
+def test_none_passes_through():
+    assert to_minor(None) is None
+    assert from_minor(None) is None
+
+
+@pytest.mark.parametrize("minor", [0, 1, -1, 5, -5, 1999, -1999, 10 ** 12 + 7, 99999999999999999, -99999999999999999])
+def test_minor_round_trip_is_exact(minor):
+    assert to_minor(from_minor(minor)) == minor
+
+
+def test_decimal_round_trip_is_exact():
+    for cents in range(-10_000, 10_001, 37):
+        amount = Decimal(cents).scaleb(-2)
+        assert from_minor(to_minor(amount)) == amount
+
+
+def test_schema_accepts_two_places_and_serializes_a_number():
+    pytest.importorskip("pydantic")
+    from pydantic import TypeAdapter, ValidationError
+
+    from app.schemas.expense import Money
+
+    money = TypeAdapter(Money)
+    assert money.validate_python("12.30") == Decimal("12.30")
+    assert money.dump_json(from_minor(1230)) == b"12.3"
+    with pytest.raises(ValidationError):
+        money.validate_python("12.345")
+    with pytest.raises(ValidationError):
+        money.validate_python(LARGEST * 10)
+
+
+def test_amount_expr_matches_from_minor(pg_engine):
+    from sqlalchemy import BigInteger, literal, select
+
+    minors = [0, 1, -1, 1230, -1230, 99999999999999999, -99999999999999999]
+    with pg_engine.connect() as conn:
+        amounts = [conn.execute(select(amount_expr(literal(m, BigInteger)))).scalar_one() for m in minors]
+
+    assert amounts == [from_minor(m) for m in minors]
@@ -0,0 +1,80 @@
+"""
+Monthly partition maintenance against Postgres (needs TEST_DATABASE_URL).
+"""
+from datetime import date
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import text  # noqa: E402
+
+from app.services.partition_service import (  # noqa: E402
+    _LOCK_KEY,
+    create_partition,
+    ensure_partitions,
+    list_partitions,
+    maintain_partitions,
+)
+
+MONTH = date(2031, 3, 1)  # far enough ahead that no migration or cron run created it
+
+
+def _expense(conn, day: date) -> int:
+    return conn.execute(text(
+        "INSERT INTO expenses (title, amount_minor, currency, date, user_id, is_deleted, created_at, updated_at) "
+        "VALUES ('e', 100, 'USD', :day, 1, false, now(), now()) RETURNING id"
+    ), {"day": day}).scalar_one()
+
+
+def _home(conn, expense_id: int) -> str:
+    return conn.execute(text(
+        "SELECT tableoid::regclass::text FROM expenses WHERE id = :id"
+    ), {"id": expense_id}).scalar_one()
+
+
+@pytest.fixture
+def conn(pg_session):
+    conn = pg_session.connection()
+    conn.execute(text(
+        "INSERT INTO users (id, email, hashed_password, is_deleted, created_at, updated_at) "
+        "VALUES (1, 'user1@example.com', 'x', false, now(), now())"
+    ))
+    return conn
+
+
+def test_create_partition_moves_rows_out_of_the_default(conn):
+    inside = [_expense(conn, date(2031, 3, 1)), _expense(conn, date(2031, 3, 31))]
+    outside = _expense(conn, date(2031, 4, 1))
+    assert {_home(conn, i) for i in inside + [outside]} == {"expenses_default"}
+
+    name = create_partition(conn, "expenses", MONTH)
+
+    assert name == "expenses_p2031_03"
+    assert list_partitions(conn, "expenses")[MONTH] == name
+    assert [_home(conn, i) for i in inside] == [name, name]
+    assert _home(conn, outside) == "expenses_default"
+    # New rows for the month are routed to the attached partition
+    assert _home(conn, _expense(conn, date(2031, 3, 15))) == name
+
+
+def test_ensure_partitions_only_creates_missing_months(conn):
+    create_partition(conn, "expenses", MONTH)
+
+    created = ensure_partitions(conn, "expenses", date(2031, 2, 10), date(2031, 4, 1))
+
+    assert created == ["expenses_p2031_02", "expenses_p2031_04"]
+    assert ensure_partitions(conn, "expenses", date(2031, 2, 1), date(2031, 4, 1)) == []
+
+
+def test_startup_maintenance_skips_while_another_process_holds_the_lock(pg_engine):
+    with pg_engine.connect() as holder:
+        holder.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+        try:
+            assert maintain_partitions(pg_engine, today=MONTH, wait=False) == []
+        finally:
+            holder.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+
+    with pg_engine.connect() as conn:
+        assert MONTH not in list_partitions(conn, "expenses")
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("passlib")
+
+from fastapi import HTTPException  # noqa: E402
+
+from app.core.password_hasher import PasswordHasher  # noqa: E402
+
+
+def _blocking(started: threading.Event, release: threading.Event) -> str:
+    started.set()
+    release.wait(5)
+    return "done"
+
+
+@pytest.fixture
+def hasher():
+    # A thread pool stands in for the process pool: same Future semantics
+    hasher = PasswordHasher(max_workers=1, max_pending=1, rounds=4)
+    hasher._executor = ThreadPoolExecutor(max_workers=1)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_cancelled_caller_keeps_the_slot_until_the_job_finishes(hasher):
+    started, release = threading.Event(), threading.Event()
+
+    async def scenario():
+        task = asyncio.create_task(hasher._submit(_blocking, started, release))
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # The worker is still busy: the slot must stay taken, so new work is refused
+        assert hasher.pending == 1
+        with pytest.raises(HTTPException) as busy:
+            await hasher._submit(_blocking, started, release)
+        assert busy.value.status_code == 503
+        assert busy.value.headers["Retry-After"]
+
+        release.set()
+        for _ in range(200):
+            if hasher.pending == 0:
+                break
+            await asyncio.sleep(0.005)
+        return hasher.pending
+
+    assert asyncio.run(scenario()) == 0
+    assert hasher.rejected == 1
+
+
+def test_completed_calls_release_their_slot(hasher):
+    started, release = threading.Event(), threading.Event()
+    release.set()
+
+    async def twice():
+        results = [await hasher._submit(_blocking, started, release) for _ in range(2)]
+        await asyncio.sleep(0)  # let the done-callbacks run
+        return results
+
+    assert asyncio.run(twice()) == ["done", "done"]
+    assert hasher.pending == 0
+
+
+def test_hash_and_verify_round_trip_upgrades_old_hashes():
+    weak, strong = PasswordHasher(1, 4, rounds=4), PasswordHasher(1, 4, rounds=5)
+    try:
+        async def scenario():
+            hashed = await weak.hash("s3cret")
+            assert await weak.verify_and_update("wrong", hashed) == (False, None)
+            assert await weak.verify_and_update("s3cret", hashed) == (True, None)
+            return await strong.verify_and_update("s3cret", hashed)
+
+        valid, new_hash = asyncio.run(scenario())
+    finally:
+        weak.shutdown()
+        strong.shutdown()
+
+    assert valid and new_hash.startswith("$2b$05$")
+
+
+@pytest.mark.bench
+def test_bench_login_burst_vs_concurrent_reads():
+    """
+    Reads (small threadpool jobs, like a sync crud call) while 40 logins
+    are in flight: bcrypt on the request threadpool, as before, against
+    the dedicated process pool.
+    """
+    from fastapi.concurrency import run_in_threadpool
+
+    from app.core.password_hasher import _verify_and_update
+
+    rounds, logins, reads = 10, 40, 400
+    hasher = PasswordHasher(max_workers=2, max_pending=logins, rounds=rounds)
+
+    def read_job():
+        return sum(range(1000))
+
+    async def run(login):
+        hashed = await hasher.hash("s3cret")
+        await login(hashed)  # warm up the pool
+
+        async def reader():
+            started = time.perf_counter()
+            for _ in range(reads):
+                await run_in_threadpool(read_job)
+            return reads / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        login_tasks = [asyncio.create_task(login(hashed)) for _ in range(logins)]
+        reads_per_second = await reader()
+        await asyncio.gather(*login_tasks)
+        return logins / (time.perf_counter() - started), reads_per_second
+
+    async def inline(hashed):
+        return await run_in_threadpool(_verify_and_update, "s3cret", hashed, rounds)
+
+    async def offloaded(hashed):
+        return await hasher.verify_and_update("s3cret", hashed)
+
+    try:
+        results = {"threadpool": asyncio.run(run(inline)), "process pool": asyncio.run(run(offloaded))}
+    finally:
+        hasher.shutdown()
+    for name, (logins_per_second, reads_per_second) in results.items():
+        print(f"\nbcrypt on {name:>12}: {logins_per_second:,.1f} logins/s, "
+              f"{reads_per_second:,.0f} reads/s during the burst")
+
+    assert results["process pool"][1] > results["threadpool"][1]
@@ -0,0 +1,93 @@
+"""
+Authenticating a request loads the identity columns of one user row and
+nothing else, so its cost does not grow with the user's expense count.
+Needs Postgres: set TEST_DATABASE_URL.
+"""
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import event, inspect, text  # noqa: E402
+from sqlalchemy.exc import InvalidRequestError  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from app.crud.user import get_principal_by_email  # noqa: E402
+from app.models import category, expense  # noqa: E402,F401  (relationship targets)
+from app.models.user import User  # noqa: E402
+from app.schemas.user import Principal  # noqa: E402
+
+
+def _add_user(session, user_id: int, expenses: int = 0, deleted: bool = False) -> str:
+    email = f"user{user_id}@example.com"
+    session.execute(text(
+        "INSERT INTO users (id, email, full_name, hashed_password, is_deleted, created_at, updated_at) "
+        "VALUES (:id, :email, 'Test User', 'x', :deleted, now(), now())"
+    ), {"id": user_id, "email": email, "deleted": deleted})
+    session.execute(text(
+        "INSERT INTO expenses (title, amount_minor, currency, date, user_id, is_deleted, created_at, updated_at) "
+        "SELECT 'e', n, 'USD', date '2026-10-01' + (n % 90), :id, false, now(), now() "
+        "FROM generate_series(1, :n) n"
+    ), {"id": user_id, "n": expenses})
+    return email
+
+
+def _statements(session) -> list:
+    statements = []
+    event.listen(session.connection(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def test_principal_lookup_loads_only_identity_columns(pg_session):
+    email = _add_user(pg_session, 1, expenses=500)
+    statements = _statements(pg_session)
+
+    user = get_principal_by_email(pg_session, email)
+    principal = Principal.model_validate(user)
+
+    assert principal == Principal(id=1, email=email, full_name="Test User")
+    assert len(statements) == 1
+    assert "expenses" not in statements[0] and "hashed_password" not in statements[0]
+    assert {"hashed_password", "created_at", "updated_at", "deleted_at",
+            "categories", "expenses"} <= inspect(user).unloaded
+    with pytest.raises(InvalidRequestError):
+        user.expenses  # raiseload: no lazy load behind the caller's back
+    assert len(statements) == 1
+
+
+def test_soft_deleted_user_has_no_principal(pg_session):
+    email = _add_user(pg_session, 1, deleted=True)
+
+    assert get_principal_by_email(pg_session, email) is None
+
+
+def _per_call_ms(session, load, email: str, rounds: int) -> float:
+    load(session, email)  # warm up
+    started = time.perf_counter()
+    for _ in range(rounds):
+        session.expunge_all()
+        load(session, email)
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def _with_expenses_joined(session, email: str):
+    """What every authenticated request did while User.expenses was lazy="joined"."""
+    return session.query(User).options(joinedload(User.expenses)).filter(User.email == email).first()
+
+
+@pytest.mark.bench
+def test_bench_auth_cost_is_flat_in_expense_count(pg_session):
+    lean, joined = {}, {}
+    for user_id, count in enumerate((0, 1_000, 20_000), start=1):
+        email = _add_user(pg_session, user_id, expenses=count)
+        pg_session.execute(text("ANALYZE users, expenses"))
+        lean[count] = _per_call_ms(pg_session, get_principal_by_email, email, rounds=200)
+        joined[count] = _per_call_ms(pg_session, _with_expenses_joined, email, rounds=5)
+        print(f"\n{count:>6} expenses: principal load {lean[count]:.3f} ms, "
+              f"with expenses joined {joined[count]:.3f} ms")
+
+    assert lean[20_000] < 2 * lean[0] + 0.2
+    assert joined[20_000] > 10 * lean[20_000]
@@ -0,0 +1,187 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("redis")
+
+from app.core import rate_limit_backends  # noqa: E402
+from app.core.rate_limit_backends import (  # noqa: E402
+    CircuitBreaker,
+    LocalRateLimiter,
+    RateLimitResult,
+    RedisRateLimiter,
+    ResilientRateLimiter,
+)
+
+
+class StubPrimary:
+    """Stands in for RedisRateLimiter; `hang` makes hit() wait until cancelled."""
+
+    limit = 5
+
+    def __init__(self, hang: bool = False):
+        self.hang = hang
+        self.calls = 0
+
+    async def hit(self, redis, identifier):
+        self.calls += 1
+        if self.hang:
+            await asyncio.Event().wait()
+        return RateLimitResult(True, self.limit, self.limit - 1, 1.0)
+
+
+def _limiter(primary, breaker) -> ResilientRateLimiter:
+    return ResilientRateLimiter(primary, LocalRateLimiter(limit=5, window_seconds=60), breaker, timeout=5)
+
+
+def _open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure(RuntimeError("down"))
+    return breaker
+
+
+@pytest.fixture(autouse=True)
+def fake_redis_client(monkeypatch):
+    monkeypatch.setattr(rate_limit_backends.redis_client, "client", object())
+
+
+def test_cancelled_half_open_trial_releases_the_breaker():
+    breaker = _open_breaker()
+    hanging = StubPrimary(hang=True)
+
+    async def cancel_trial():
+        task = asyncio.create_task(_limiter(hanging, breaker).hit("1.2.3.4"))
+        await asyncio.sleep(0.01)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+
+    # The next request runs a fresh trial instead of being stuck on the fallback
+    assert breaker.state == CircuitBreaker.OPEN
+    primary = StubPrimary()
+    result = asyncio.run(_limiter(primary, breaker).hit("1.2.3.4"))
+    assert primary.calls == 1
+    assert result.remaining == 4
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_call_while_closed_is_not_counted_as_a_failure():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+
+    async def cancel_call():
+        task = asyncio.create_task(_limiter(StubPrimary(hang=True), breaker).hit("1.2.3.4"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_call())
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+# ---------- Lua strategies (fakeredis runs the scripts with a real Lua interpreter) ----------
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.mark.parametrize("strategy", ["fixed_window", "sliding_window", "token_bucket"])
+def test_strategy_allows_up_to_the_limit_then_blocks(fake_redis, strategy):
+    limiter = RedisRateLimiter(strategy, limit=3, window_seconds=60)
+
+    async def hits():
+        return [await limiter.hit(fake_redis, "1.2.3.4") for _ in range(4)]
+
+    results = asyncio.run(hits())
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [2, 1, 0]
+    assert results[3].remaining == 0
+    assert 0 < results[3].reset_after <= 60
+    assert results[3].retry_after >= 1
+
+
+@pytest.mark.parametrize("strategy", ["fixed_window", "sliding_window", "token_bucket"])
+def test_identifiers_are_counted_separately(fake_redis, strategy):
+    limiter = RedisRateLimiter(strategy, limit=1, window_seconds=60)
+
+    async def hits():
+        return [await limiter.hit(fake_redis, ip) for ip in ("1.1.1.1", "2.2.2.2", "1.1.1.1")]
+
+    assert [r.allowed for r in asyncio.run(hits())] == [True, True, False]
+
+
+@pytest.mark.parametrize("strategy", ["fixed_window", "sliding_window", "token_bucket"])
+def test_concurrent_hits_never_exceed_the_limit(fake_redis, strategy):
+    limiter = RedisRateLimiter(strategy, limit=10, window_seconds=60)
+
+    async def burst():
+        return await asyncio.gather(*(limiter.hit(fake_redis, "1.2.3.4") for _ in range(50)))
+
+    results = asyncio.run(burst())
+
+    assert sum(r.allowed for r in results) == 10
+    assert sorted(r.remaining for r in results if r.allowed) == list(range(10))
+
+
+def test_fixed_window_sets_the_window_as_ttl(fake_redis):
+    limiter = RedisRateLimiter("fixed_window", limit=5, window_seconds=60)
+
+    async def hit_and_ttl():
+        await limiter.hit(fake_redis, "1.2.3.4")
+        return await fake_redis.pttl("rate_limit:fixed_window:1.2.3.4")
+
+    assert 0 < asyncio.run(hit_and_ttl()) <= 60_000
+
+
+@pytest.mark.parametrize("strategy", ["fixed_window", "sliding_window", "token_bucket"])
+def test_script_is_reloaded_after_noscript(fake_redis, strategy):
+    limiter = RedisRateLimiter(strategy, limit=3, window_seconds=60)
+
+    async def flush_between_hits():
+        await limiter.load(fake_redis)
+        sha = limiter._get_script(fake_redis).sha
+        first = await limiter.hit(fake_redis, "1.2.3.4")
+        await fake_redis.script_flush()
+        assert await fake_redis.script_exists(sha) == [False]
+        second = await limiter.hit(fake_redis, "1.2.3.4")  # EVALSHA -> NOSCRIPT -> reload
+        return first, second, await fake_redis.script_exists(sha)
+
+    first, second, exists = asyncio.run(flush_between_hits())
+
+    assert (first.remaining, second.remaining) == (2, 1)  # state survived, only the script was lost
+    assert exists == [True]
+
+
+@pytest.mark.parametrize("windows_back, allowed", [(1, False), (2, True)])
+def test_sliding_window_weights_only_the_previous_window(fake_redis, windows_back, allowed):
+    limiter = RedisRateLimiter("sliding_window", limit=1, window_seconds=60)
+    key = "rate_limit:sliding_window:1.2.3.4"
+
+    async def hit_after_earlier_window():
+        seconds, micros = await fake_redis.time()
+        now = seconds * 1000 + micros // 1000
+        cur_start = now - now % limiter.window_ms
+        await fake_redis.hset(key, mapping={
+            "start": cur_start - windows_back * limiter.window_ms, "cur": 1, "prev": 0,
+        })
+        return await limiter.hit(fake_redis, "1.2.3.4")
+
+    result = asyncio.run(hit_after_earlier_window())
+
+    # One hit in the previous window still overlaps the sliding window; older ones don't count
+    assert result.allowed is allowed
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError, match="RATE_LIMIT_STRATEGY"):
+        RedisRateLimiter("leaky", limit=1, window_seconds=1)
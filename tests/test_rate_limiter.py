@@ -0,0 +1,183 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("jose")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, HTTPException  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.core import rate_limiter as rate_limiter_module  # noqa: E402
+from app.core.rate_limit_backends import (  # noqa: E402
+    CircuitBreaker,
+    LocalRateLimiter,
+    RedisRateLimiter,
+    ResilientRateLimiter,
+)
+from app.core.rate_limiter import RateLimitMiddleware  # noqa: E402
+from app.core.redis_client import redis_client  # noqa: E402
+from app.core.token import create_access_token  # noqa: E402
+
+
+def _limiter(limit: int) -> ResilientRateLimiter:
+    # No Redis client: every hit goes to the local fallback
+    return ResilientRateLimiter(
+        RedisRateLimiter("fixed_window", limit, 60), LocalRateLimiter(limit, 60),
+        CircuitBreaker("test", failure_threshold=1, reset_timeout=60), timeout=1,
+    )
+
+
+def _app(limit: int, middleware=RateLimitMiddleware) -> FastAPI:
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.get("/")
+    async def health():
+        return {"ok": True}
+
+    @app.get("/items")
+    async def items():
+        app.state.calls += 1
+        return {"items": []}
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([b"a", b"b", b"c"]), media_type="text/plain")
+
+    rate_limiter_module.rate_limiter = _limiter(limit)
+    if middleware is not None:
+        app.add_middleware(middleware, exempt_paths=["/"])
+    return app
+
+
+@pytest.fixture(autouse=True)
+def local_limiter(monkeypatch):
+    monkeypatch.setattr(redis_client, "client", None)
+    monkeypatch.setattr(rate_limiter_module, "rate_limiter", rate_limiter_module.rate_limiter)
+
+
+def test_allowed_requests_get_limit_headers():
+    client = TestClient(_app(limit=2))
+
+    first, second = client.get("/items"), client.get("/items")
+
+    assert (first.status_code, second.status_code) == (200, 200)
+    assert first.headers["X-RateLimit-Limit"] == "2"
+    assert (first.headers["X-RateLimit-Remaining"], second.headers["X-RateLimit-Remaining"]) == ("1", "0")
+    assert "Retry-After" not in first.headers
+
+
+def test_over_the_limit_is_a_429_that_never_reaches_the_app():
+    app = _app(limit=2)
+    client = TestClient(app)
+    client.get("/items")
+    client.get("/items")
+
+    response = client.get("/items")
+
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Too Many Requests! Limit is 2 per 60 seconds."}
+    assert response.headers["content-length"] == str(len(response.content))
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+    assert 1 <= int(response.headers["Retry-After"]) <= 60
+    assert app.state.calls == 2
+
+
+def test_exempt_paths_are_never_limited():
+    client = TestClient(_app(limit=1))
+
+    responses = [client.get("/") for _ in range(5)]
+
+    assert [r.status_code for r in responses] == [200] * 5
+    assert "X-RateLimit-Limit" not in responses[0].headers
+    assert client.get("/items").status_code == 200  # exempt hits didn't use up the budget
+
+
+def test_streaming_responses_pass_through_with_headers():
+    client = TestClient(_app(limit=2))
+
+    response = client.get("/stream")
+
+    assert response.content == b"abc"
+    assert response.headers["X-RateLimit-Remaining"] == "1"
+
+
+def test_authenticated_requests_are_limited_per_subject():
+    client = TestClient(_app(limit=1))
+    alice = {"Authorization": f"Bearer {create_access_token('alice@example.com')}"}
+    bob = {"Authorization": f"Bearer {create_access_token('bob@example.com')}"}
+
+    assert client.get("/items", headers=alice).status_code == 200
+    assert client.get("/items", headers=bob).status_code == 200
+    assert client.get("/items", headers=alice).status_code == 429
+
+
+def test_identifier_falls_back_to_the_client_address():
+    assert RateLimitMiddleware.get_user_identifier({"headers": [], "client": ("10.0.0.1", 5000)}) == "10.0.0.1"
+    assert RateLimitMiddleware.get_user_identifier({"headers": []}) == "anonymous"
+
+
+def test_non_http_scopes_pass_straight_through():
+    seen = []
+
+    async def inner(scope, receive, send):
+        seen.append(scope["type"])
+
+    rate_limiter_module.rate_limiter = _limiter(0)  # would reject every HTTP request
+    middleware = RateLimitMiddleware(inner, exempt_paths=[])
+    asyncio.run(middleware({"type": "lifespan"}, None, None))
+
+    assert seen == ["lifespan"]
+
+
+class BaseHTTPRateLimitMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation RateLimitMiddleware replaced, kept for comparison."""
+
+    def __init__(self, app, exempt_paths=()):
+        super().__init__(app)
+        self.limiter = rate_limiter_module.rate_limiter
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def dispatch(self, request, call_next):
+        if request.url.path in self.exempt_paths:
+            return await call_next(request)
+        result = await self.limiter.hit(request.client.host if request.client else "anonymous")
+        if not result.allowed:
+            raise HTTPException(status_code=429, detail="Too Many Requests!")
+        response = await call_next(request)
+        response.headers.update(RateLimitMiddleware.limit_headers(result))
+        return response
+
+
+async def _requests_per_second(app, requests: int, concurrency: int = 50) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(n):
+            for _ in range(n):
+                response = await client.get("/items")
+                assert response.status_code == 200
+
+        await worker(50)  # warm up
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+
+@pytest.mark.bench
+def test_bench_pure_asgi_vs_base_http_middleware():
+    requests = 5_000
+    results = {}
+    for name, middleware in (("no rate limiting", None),
+                             ("BaseHTTPMiddleware", BaseHTTPRateLimitMiddleware),
+                             ("pure ASGI", RateLimitMiddleware)):
+        app = _app(limit=10 * requests, middleware=middleware)
+        results[name] = max(asyncio.run(_requests_per_second(app, requests)) for _ in range(3))
+        print(f"\n{name:>18}: {results[name]:,.0f} req/s")
+
+    assert results["pure ASGI"] > results["BaseHTTPMiddleware"]
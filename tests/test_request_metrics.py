@@ -0,0 +1,110 @@
+"""
+SQL and Redis work must be counted against the request that did it, even
+when many requests interleave on the event loop and in the threadpool.
+"""
+import asyncio
+import random
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("prometheus_client")
+pytest.importorskip("httpx")
+fakeredis = pytest.importorskip("fakeredis")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from app.core.redis_client import TimedRedis  # noqa: E402
+from app.core.request_metrics import RequestMetricsMiddleware, current_stats  # noqa: E402
+from app.db.session import instrument_engine  # noqa: E402
+
+
+class FakeTimedRedis(TimedRedis, fakeredis.FakeAsyncRedis):
+    """TimedRedis timing, fakeredis storage."""
+
+
+@pytest.fixture
+def recorded(monkeypatch) -> dict:
+    """Request path -> the RequestStats RequestMetricsMiddleware finished it with."""
+    stats_by_path = {}
+    finish = RequestMetricsMiddleware.finish
+
+    def record(middleware, scope, stats, status_code, elapsed):
+        stats_by_path[scope["path"]] = stats
+        finish(middleware, scope, stats, status_code, elapsed)
+
+    monkeypatch.setattr(RequestMetricsMiddleware, "finish", record)
+    return stats_by_path
+
+
+def _app() -> FastAPI:
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    redis = FakeTimedRedis()
+
+    def query(n: int) -> None:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT :n"), {"n": n})
+
+    app = FastAPI()
+
+    @app.get("/work/{request_id}/{statements}/{commands}")
+    async def work(request_id: int, statements: int, commands: int):
+        # Interleave threadpool SQL and Redis awaits with the other requests
+        for i in range(max(statements, commands)):
+            if i < statements:
+                await run_in_threadpool(query, i)
+            if i < commands:
+                await redis.incr(f"counter:{request_id}")
+            await asyncio.sleep(random.random() / 1000)
+        return {"request_id": request_id}
+
+    app.add_middleware(RequestMetricsMiddleware)
+    return app
+
+
+def test_concurrent_requests_get_their_own_counts(recorded):
+    app = _app()
+    work = {request_id: (random.randint(0, 12), random.randint(0, 12)) for request_id in range(40)}
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.get(f"/work/{request_id}/{statements}/{commands}")
+                for request_id, (statements, commands) in work.items()
+            ))
+
+    responses = asyncio.run(burst())
+
+    for (request_id, (statements, commands)), response in zip(work.items(), responses):
+        stats = recorded[f"/work/{request_id}/{statements}/{commands}"]
+        assert (stats.db_count, stats.redis_count) == (statements, commands)
+        assert f'db-count;desc="statements";dur={statements}' in response.headers["Server-Timing"]
+    assert current_stats.get() is None
+
+
+def test_background_work_is_not_counted_against_requests(recorded):
+    app = _app()
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    def background(n: int) -> None:
+        for _ in range(n):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+    async def with_background_queries():
+        # Started outside any request: its context has no RequestStats
+        worker = asyncio.create_task(run_in_threadpool(background, 200))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await asyncio.gather(*(client.get(f"/work/{i}/3/0") for i in range(10)))
+        await worker
+
+    asyncio.run(with_background_queries())
+
+    assert [stats.db_count for stats in recorded.values()] == [3] * 10
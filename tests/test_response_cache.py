@@ -0,0 +1,139 @@
+import asyncio
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("numpy")
+pytest.importorskip("redis")
+pytest.importorskip("sqlalchemy")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.redis_client import redis_client  # noqa: E402
+from app.core.response_cache import response_cache  # noqa: E402
+from app.deps import get_current_user, get_db  # noqa: E402
+from app.models import user  # noqa: E402,F401  (registers the "User" relationship target)
+from app.models.category import Category  # noqa: E402
+from app.models.expense import Expense  # noqa: E402
+from app.routes import expenses as expense_routes  # noqa: E402
+from app.schemas.user import Principal  # noqa: E402
+from app.services import analytics_service  # noqa: E402
+
+NOW = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.fail_incr = False
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        if self.fail_incr:
+            raise ConnectionError("INCR failed")
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+def _expense():
+    expense = Expense(
+        id=1, title="Lunch", amount_minor=1230, currency="USD", date=date(2026, 10, 1),
+        description=None, category_id=1, user_id=1, is_deleted=False,
+        created_at=NOW, updated_at=NOW,
+    )
+    expense.category = Category(id=1, name="Food", user_id=1)
+    return expense
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(redis_client, "client", fake)
+    monkeypatch.setattr(response_cache, "_dirty", {})
+    return fake
+
+
+@pytest.fixture
+def client(monkeypatch, fake_redis):
+    monkeypatch.setattr(expense_routes, "list_expenses", lambda db, **kw: [_expense()])
+    monkeypatch.setattr(expense_routes, "list_expenses_page", lambda db, **kw: ([_expense()], "next"))
+    monkeypatch.setattr(expense_routes, "period_summary", lambda db, **kw: [{
+        "period_start": date(2026, 10, 1), "category_id": 1, "category": "Food",
+        "currency": "USD", "total_amount": Decimal("12.30"), "count": 1,
+    }])
+    monkeypatch.setattr(expense_routes, "monthly_summary", lambda db, month, year, user_id: [
+        {"category": "Food", "currency": "USD", "total_minor": 1230},
+    ])
+    monkeypatch.setattr(analytics_service, "analyze", lambda user_id, **kw: {
+        "currency": "USD", "count": 1, "total_amount": Decimal("12.30"),
+        "categories": [{"category_id": 1, "total_amount": Decimal("12.30"), "count": 1}],
+        "percentiles": [{"q": 50.0, "amount": Decimal("12.30")}],
+        "running_balance": [{"date": date(2026, 10, 1), "total_amount": Decimal("12.30"),
+                             "balance": Decimal("12.30")}],
+    })
+
+    app = FastAPI()
+    app.include_router(expense_routes.router)
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=1, email="a@example.com")
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("url", [
+    "/expenses/",
+    "/expenses/page",
+    "/expenses/summary?start_date=2026-10-01&end_date=2026-10-31",
+    "/expenses/summary/?month=10&year=2026",
+    "/expenses/analytics",
+])
+def test_cached_endpoint_hit_matches_miss(client, url):
+    miss = client.get(url)
+    hit = client.get(url)
+
+    assert miss.status_code == 200, miss.text
+    assert (miss.headers["X-Cache"], hit.headers["X-Cache"]) == ("MISS", "HIT")
+    assert hit.content == miss.content
+    assert "12.3" in miss.text and '"12.30"' not in miss.text  # amounts are JSON numbers
+
+
+def test_list_serializes_expense_read_fields(client):
+    item = client.get("/expenses/").json()[0]
+    assert item["amount"] == 12.3
+    assert item["amount_minor"] == 1230
+    assert item["description"] is None
+    assert item["category"] == {"id": 1, "name": "Food", "user_id": 1}
+    assert item["created_at"].startswith("2026-10-01T12:00:00")
+
+
+def test_failed_invalidation_bypasses_the_cache_until_the_bump_succeeds(client, fake_redis):
+    assert client.get("/expenses/").headers["X-Cache"] == "MISS"
+    assert client.get("/expenses/").headers["X-Cache"] == "HIT"
+
+    fake_redis.fail_incr = True
+    asyncio.run(response_cache.invalidate_user(1))
+
+    # The stale entry is still in Redis, but is never served
+    assert client.get("/expenses/").headers["X-Cache"] == "BYPASS"
+    assert response_cache.stats()["dirty_users"] == 1
+
+    fake_redis.fail_incr = False
+    assert client.get("/expenses/").headers["X-Cache"] == "MISS"  # bumped on the way in
+    assert client.get("/expenses/").headers["X-Cache"] == "HIT"
+    assert response_cache.stats()["dirty_users"] == 0
+
+
+def test_dirty_marker_only_affects_that_user(client, fake_redis):
+    fake_redis.fail_incr = True
+    asyncio.run(response_cache.invalidate_user(2))
+
+    assert client.get("/expenses/").headers["X-Cache"] == "MISS"
+    assert client.get("/expenses/").headers["X-Cache"] == "HIT"
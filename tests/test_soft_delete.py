@@ -0,0 +1,67 @@
+"""
+Soft-deleted rows are invisible to ORM queries and no longer reserve their
+category name (alembic revision 0009). Needs Postgres: set TEST_DATABASE_URL.
+"""
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import select, text  # noqa: E402
+from sqlalchemy.exc import IntegrityError  # noqa: E402
+
+from app.crud.category import create_category, get_category, get_category_by_name, list_categories  # noqa: E402
+from app.db import soft_delete  # noqa: E402,F401  (installs the global filter)
+from app.models import expense, user  # noqa: E402,F401  (relationship targets)
+from app.models.category import Category  # noqa: E402
+
+
+@pytest.fixture
+def db(pg_session):
+    for user_id in (1, 2):
+        pg_session.execute(text(
+            "INSERT INTO users (id, email, hashed_password, is_deleted, created_at, updated_at) "
+            "VALUES (:id, 'user' || :id || '@example.com', 'x', false, now(), now())"
+        ), {"id": user_id})
+    return pg_session
+
+
+def _soft_delete(db, category: Category) -> None:
+    category.soft_delete()
+    db.commit()
+    db.expunge_all()
+
+
+def test_deleted_rows_are_filtered_from_orm_queries(db):
+    kept_id = create_category(db, "Food", user_id=1).id
+    deleted = create_category(db, "Travel", user_id=1)
+    deleted_id = deleted.id
+    _soft_delete(db, deleted)
+
+    assert get_category(db, deleted_id) is None
+    assert get_category_by_name(db, "Travel") is None
+    assert [c.name for c in list_categories(db, user_id=1)] == ["Food"]
+    assert get_category(db, kept_id).name == "Food"
+
+    everything = db.execute(
+        select(Category.name).order_by(Category.id).execution_options(include_deleted=True)
+    ).scalars().all()
+    assert everything == ["Food", "Travel"]
+
+
+def test_a_deleted_name_can_be_created_again(db):
+    _soft_delete(db, create_category(db, "Food", user_id=1))
+
+    again = create_category(db, "Food", user_id=2)
+
+    assert get_category_by_name(db, "Food").id == again.id
+    assert db.execute(text("SELECT count(*) FROM categories WHERE name = 'Food'")).scalar_one() == 2
+
+
+def test_live_names_stay_unique(db):
+    create_category(db, "Food", user_id=1)
+
+    with pytest.raises(IntegrityError, match="uq_categories_name_live"):
+        with db.begin_nested():
+            db.add(Category(name="Food", user_id=2))
+            db.flush()